@@ -2,16 +2,64 @@
 """
 Barcha notification textlari va yuborish logikasi shu yerda
 Vazifasi: Telegram xabarlarini yuborish
+
+Main bot client: FastAPI event loop ida bitta (lazy yaratiladigan) Bot - aiohttp
+connection pool i qayta ishlatiladi, har notification uchun yangi TLS handshake yo'q.
+enable_shared_client() (startup) chaqirilmagan loop larda (admin async_to_sync,
+Celery asyncio.run) - avvalgidek vaqtinchalik Bot, ishlatib yopiladi.
 """
+import asyncio
 import os
 import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
 from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
 
 from bots.main_bot.buttons.inline import get_bot_management_keyboard
-from shared.constants import MESSAGES
+from shared.constants import MAIN_BOT_CLIENT, MESSAGES
+from shared.telegram_governor import create_bot
 
 logger = logging.getLogger(__name__)
 
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_bot: Optional[Bot] = None
+
+
+def enable_shared_client():
+    """Joriy (uzoq yashaydigan) loop da main bot client ni umumiy qilish - FastAPI startup"""
+    global _shared_loop
+    _shared_loop = asyncio.get_running_loop()
+
+
+async def close_shared_client():
+    """Umumiy client session ini yopish - FastAPI shutdown"""
+    global _shared_bot, _shared_loop
+    bot, _shared_bot, _shared_loop = _shared_bot, None, None
+    if bot:
+        await bot.session.close()
+
+
+@asynccontextmanager
+async def main_bot_client(token: Optional[str] = None) -> AsyncIterator[Bot]:
+    """Main bot - umumiy loop da umumiy client, boshqa loop da vaqtinchalik"""
+    global _shared_bot
+    main_token = os.getenv('TELEGRAM_BOT_TOKEN')
+    token = token or main_token
+
+    if token == main_token and _shared_loop is not None and asyncio.get_running_loop() is _shared_loop:
+        if _shared_bot is None:
+            _shared_bot = create_bot(token, session=AiohttpSession(limit=MAIN_BOT_CLIENT['connection_limit']))
+        yield _shared_bot
+        return
+
+    bot = create_bot(token)
+    try:
+        yield bot
+    finally:
+        await bot.session.close()
+
 
 class NotificationService:
     """Barcha notification logikasi"""
@@ -49,9 +97,8 @@ class NotificationService:
 
             keyboard = get_bot_management_keyboard(bot_id)
 
-            bot = Bot(token=self.main_bot_token)
-            await bot.send_message(int(self.super_admin_id), text=text, reply_markup=keyboard, parse_mode="HTML")
-            await bot.session.close()
+            async with main_bot_client(self.main_bot_token) as bot:
+                await bot.send_message(int(self.super_admin_id), text=text, reply_markup=keyboard, parse_mode="HTML")
 
             logger.info(f"Superadmin notified about new bot: {bot_username}")
 
@@ -82,9 +129,8 @@ class NotificationService:
             from bots.main_bot.buttons.inline import get_contact_admin_keyboard
             keyboard = await get_contact_admin_keyboard()
 
-            bot = Bot(token=self.main_bot_token)
-            await bot.send_message(user_tg_id, text=text, reply_markup=keyboard, parse_mode="HTML")
-            await bot.session.close()
+            async with main_bot_client(self.main_bot_token) as bot:
+                await bot.send_message(user_tg_id, text=text, reply_markup=keyboard, parse_mode="HTML")
 
             logger.info(f"User {user_tg_id} notified about competition completion")
 
@@ -104,14 +150,8 @@ class NotificationService:
             return
 
         try:
-            text = MESSAGES['bot_running'].format(
-                bot_username=bot_username,
-                bot_id=bot_id
-            )
-
-            bot = Bot(token=self.main_bot_token)
-            await bot.send_message(chat_id=owner_tg_id, text=text, parse_mode="HTML")
-            await bot.session.close()
+            async with main_bot_client(self.main_bot_token) as bot:
+                await bot.send_message(**self._bot_run_owner_message(owner_tg_id, bot_username, bot_id))
 
             logger.info(f"Owner {owner_tg_id} notified about bot running")
 
@@ -130,15 +170,42 @@ class NotificationService:
             return
 
         try:
-            text = f"✅ <b>Bot ishga tushdi!</b>\n\n🤖 <b>Bot:</b> @{bot_username}\n🆔 <b>ID:</b> {bot_id}\n🔗 <b>Link:</b> https://t.me/{bot_username}\n\n📊 Endi ishtirokchilar qatnashishni boshlaydi!"
-
-            bot = Bot(token=self.main_bot_token)
-            await bot.send_message(chat_id=int(self.super_admin_id), text=text, parse_mode="HTML")
-            await bot.session.close()
+            async with main_bot_client(self.main_bot_token) as bot:
+                await bot.send_message(**self._bot_run_superadmin_message(bot_username, bot_id))
 
         except Exception as e:
             logger.error(f"Superadmin run notification error: {e}")
 
+    async def send_bot_run_notifications(self, owner_tg_id: int, bot_username: str, bot_id: int) -> List[bool]:
+        """
+        Bot run bo'lganda owner va superadmin ga - bitta send_batch orqali
+
+        Args:
+            owner_tg_id: Owner telegram ID
+            bot_username: Bot username
+            bot_id: Bot ID
+        """
+        messages = [self._bot_run_owner_message(owner_tg_id, bot_username, bot_id)]
+        if self.super_admin_id:
+            messages.append(self._bot_run_superadmin_message(bot_username, bot_id))
+
+        results = await self.send_batch(messages)
+        if results and results[0]:
+            logger.info(f"Owner {owner_tg_id} notified about bot running")
+        return results
+
+    @staticmethod
+    def _bot_run_owner_message(owner_tg_id: int, bot_username: str, bot_id: int) -> Dict[str, Any]:
+        text = MESSAGES['bot_running'].format(bot_username=bot_username, bot_id=bot_id)
+        return {'chat_id': owner_tg_id, 'text': text, 'parse_mode': "HTML"}
+
+    def _bot_run_superadmin_message(self, bot_username: str, bot_id: int) -> Dict[str, Any]:
+        text = (
+            f"✅ <b>Bot ishga tushdi!</b>\n\n🤖 <b>Bot:</b> @{bot_username}\n🆔 <b>ID:</b> {bot_id}\n"
+            f"🔗 <b>Link:</b> https://t.me/{bot_username}\n\n📊 Endi ishtirokchilar qatnashishni boshlaydi!"
+        )
+        return {'chat_id': int(self.super_admin_id), 'text': text, 'parse_mode': "HTML"}
+
     async def send_custom_message(self, user_id: int, text: str, parse_mode: str = "HTML", reply_markup=None):
         """
         Custom xabar yuborish
@@ -153,10 +220,36 @@ class NotificationService:
             return False
 
         try:
-            bot = Bot(token=self.main_bot_token)
-            await bot.send_message(chat_id=user_id, text=text, parse_mode=parse_mode, reply_markup=reply_markup)
-            await bot.session.close()
+            async with main_bot_client(self.main_bot_token) as bot:
+                await bot.send_message(chat_id=user_id, text=text, parse_mode=parse_mode, reply_markup=reply_markup)
             return True
         except Exception as e:
             logger.error(f"Send custom message error: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    async def send_batch(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Bir nechta xabarni bitta client orqali parallel yuborish
+
+        Args:
+            messages: send_message argumentlari: [{'chat_id': ..., 'text': ..., 'parse_mode': ...}, ...]
+
+        Returns:
+            Har bir xabar uchun yuborildimi
+        """
+        if not self.main_bot_token or not messages:
+            return [False] * len(messages)
+
+        slots = asyncio.Semaphore(MAIN_BOT_CLIENT['batch_concurrency'])
+
+        async def _send(bot: Bot, message: Dict[str, Any]) -> bool:
+            async with slots:
+                try:
+                    await bot.send_message(**message)
+                    return True
+                except Exception as e:
+                    logger.error(f"Batch message to {message.get('chat_id')} error: {e}")
+                    return False
+
+        async with main_bot_client(self.main_bot_token) as bot:
+            return list(await asyncio.gather(*[_send(bot, message) for message in messages]))
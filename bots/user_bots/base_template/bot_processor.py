@@ -7,20 +7,126 @@ Bot Processor - TO'LIQ TO'G'IRLANGAN
 """
 import os
 import logging
+import urllib.parse
 from typing import Dict, Any, Optional
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from cryptography.fernet import Fernet
-from asgiref.sync import sync_to_async
+from bots.user_bots.base_template import webhook_reply
+from bots.user_bots.base_template.cache.render_cache import (REFERRAL_LINK, RenderedView, drop_referral_view,
+                                                              get_referral_view, get_view, peek_referral_view)
+from shared import async_db, media_cache, referral_posts
+from shared.utils import clean_channel_username
+from shared.outbound_queue import create_queued_bot
+from shared.db_executor import db_sync_to_async
 
 logger = logging.getLogger(__name__)
 
+MAIN_MENU_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="🚀 Konkursda qatnashish")],
+        [KeyboardButton(text="🎁 Sovg'alar"), KeyboardButton(text="📊 Ballarim")],
+        [KeyboardButton(text="🏆 Reyting"), KeyboardButton(text="📜 Shartlar")]
+    ],
+    resize_keyboard=True
+)
+
+PRIZE_EMOJIS = {
+    1: "🥇", 2: "🥈", 3: "🥉", 4: "4️⃣", 5: "5️⃣", 6: "6️⃣", 7: "7️⃣", 8: "8️⃣", 9: "9️⃣", 10: "🔟"
+}
+
+
+def render_channels(settings: Dict[str, Any]) -> RenderedView:
+    """Kanallar ro'yxati va "A'zo bo'ldim" tugmasi"""
+    msg_text = f"⚡ <b>{settings.get('name') or 'Konkurs'}</b>"
+    if settings.get("description"):
+        msg_text += f"\n\n{settings['description']}"
+    msg_text += "\n\nKeyin \"✅ A'zo bo'ldim\" tugmasini bosing:"
+
+    buttons = []
+    for ch in settings.get("channels", []):
+        clean_name = clean_channel_username(str(ch.get("channel_username") or ""))
+        if not clean_name:
+            continue
+        name = ch.get("channel_name", "") or ch.get("channel_username")
+        buttons.append([InlineKeyboardButton(text=name, url=f"https://t.me/{clean_name}")])
+
+    buttons.append([InlineKeyboardButton(text="✅ A'zo bo'ldim", callback_data="check_subscription")])
+    return RenderedView(msg_text, "HTML", InlineKeyboardMarkup(inline_keyboard=buttons))
+
+
+def render_prizes(settings: Dict[str, Any]) -> RenderedView:
+    """
+    🎁 Sovg'alar
+
+    Type bo'yicha:
+    - text → description dan oladi
+    - number → prize_amount dan oladi
+    """
+    prizes = settings.get("prizes", [])
+    if not prizes:
+        return RenderedView("🎁 Sovg'alar hozircha belgilanmagan.")
+
+    text = "🎁 *KONKURS SOVG'ALARI* 🎁\n\n"
+    for prize in prizes:
+        place = prize.get("place", 0)
+        emoji = PRIZE_EMOJIS.get(place, f"{place}.")
+        prize_name = prize.get("prize_name", "")
+        description = prize.get("description", "")
+        amount = prize.get("prize_amount")
+
+        # TYPE BO'YICHA FORMATLASH
+        if prize.get("type", "number") == "text":
+            title = description or prize_name or "Sovg'a"
+        elif amount:
+            title = f"{prize_name} - {int(amount):,} so'm" if prize_name else f"{int(amount):,} so'm"
+        else:
+            title = prize_name or "Sovg'a"
+        text += f"{emoji} *{place}-o'rin:* {title}\n\n"
+
+    text += "🚀 G'olib bo'lish uchun do'stlaringizni taklif qiling!"
+    return RenderedView(text, "Markdown")
+
+
+def render_rules(settings: Dict[str, Any]) -> RenderedView:
+    """📜 Shartlar"""
+    rules = settings.get("rules_text", "") or "Konkurs qoidalari hali belgilanmagan."
+    return RenderedView(f"📜 *KONKURS QOIDALARI*\n\n{rules}", "Markdown")
+
+
+def render_konkurs_post(settings: Dict[str, Any]) -> RenderedView:
+    """
+    🚀 Konkursda qatnashish - referral post shabloni (havola o'rnida REFERRAL_LINK)
+
+    POST FORMATI:
+    - Admin paneldan description
+    - Referral link
+    - Share button (to'liq post bilan)
+    """
+    description = settings.get("description", "")
+    intro = f"{description}\n\n" if description else "🎁 Konkursda ishtirok eting va sovg'alar yutib oling!\n\n"
+
+    text = intro + f"📎 Havola:\n{REFERRAL_LINK}\n\n"
+    text += "👆 Havolani bosib nusxa oling va do'stlaringizga yuboring!"
+
+    # Share uchun TO'LIQ POST (URL encode)
+    share_text = intro + f"📎 Havola:\n{REFERRAL_LINK}"
+    share_url = (f"https://t.me/share/url?url={urllib.parse.quote(REFERRAL_LINK, safe='')}"
+                 f"&text={urllib.parse.quote(share_text, safe='')}")
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📤 Do'stlarga ulashish", url=share_url)]
+    ])
+    return RenderedView(text, None, keyboard)
+
 
 class BotProcessor:
     """B Bot update processor"""
 
     # Referral code cache (Redis yo'q bo'lganda)
     _referral_cache: Dict[str, str] = {}
+    # Sozlamada bot_username bo'lmasa - getMe natijasi (bot bo'yicha bir marta)
+    _bot_usernames: Dict[int, str] = {}
 
     def __init__(self, bot_id: int):
         self.bot_id = bot_id
@@ -30,6 +136,11 @@ class BotProcessor:
     async def process_update(self, update: Dict[str, Any]):
         """Asosiy update processor"""
         try:
+            # Kanal a'zoligi o'zgarishi - bot init va settings kerak emas
+            from shared.channel_membership import apply_update
+            if apply_update(update):
+                return
+
             # Bot init
             await self._init_bot()
             if not self.bot:
@@ -56,14 +167,14 @@ class BotProcessor:
         try:
             token = await self._get_token()
             if token:
-                self.bot = Bot(token=token)
+                self.bot = create_queued_bot(token)
         except Exception as e:
             logger.error(f"Bot init error: {e}")
 
     async def _get_token(self) -> Optional[str]:
         """Token olish"""
 
-        @sync_to_async
+        @db_sync_to_async
         def _get():
             try:
                 from django_app.core.models import BotSetUp
@@ -84,6 +195,8 @@ class BotProcessor:
             self.settings = await service.get_competition_settings(self.bot_id)
             if not self.settings:
                 logger.warning(f"Settings not found for bot {self.bot_id}")
+            elif webhook_reply.is_enabled():
+                webhook_reply.remember_settings(self.bot_id, self.settings, self.bot.id)
         except Exception as e:
             logger.error(f"Load settings error: {e}")
 
@@ -117,14 +230,18 @@ class BotProcessor:
         """Callback process"""
         data = callback.get("data", "")
 
+        answered = False
         if data == "check_subscription":
-            await self._handle_check_subscription(callback)
+            answered = await self._handle_check_subscription(callback)
+        elif data == "rating_around" or data.startswith("rating_page:"):
+            answered = await self._handle_rating_page(callback)
 
-        # Answer callback
-        try:
-            await self.bot.answer_callback_query(callback["id"])
-        except:
-            pass
+        # Answer callback (handler alert bilan javob bermagan bo'lsa - callback ga bir marta javob beriladi)
+        if not answered:
+            try:
+                await self.bot.answer_callback_query(callback["id"])
+            except:
+                pass
 
     async def _handle_start(self, message: Dict[str, Any]):
         """/start handler"""
@@ -180,57 +297,27 @@ class BotProcessor:
                 pass
 
     async def _show_channels(self, user_id: int, channels: list):
-        """Kanallarni ko'rsatish"""
-        competition_name = self.settings.get("name", "Konkurs")
-        description = self.settings.get("description", "")
-
-        msg_text = f"⚡ <b>{competition_name}</b>"
-        if description:
-            msg_text += f"\n\n{description}"
-        msg_text += "\n\nKeyin \"✅ A'zo bo'ldim\" tugmasini bosing:"
-
-        buttons = []
-
-        for ch in channels:
-            raw_username = ch.get("channel_username", "")
-            name = ch.get("channel_name", "") or raw_username
-
-            if not raw_username:
-                continue
-
-            # Username ni to'g'ri tozalash
-            clean_name = str(raw_username).replace("@", "").replace("https://t.me/", "").replace("http://t.me/",
-                                                                                                 "").strip()
-
-            if not clean_name:
-                continue
-
-            url = f"https://t.me/{clean_name}"
-            buttons.append([InlineKeyboardButton(text=name, url=url)])
-
-        buttons.append([InlineKeyboardButton(text="✅ A'zo bo'ldim", callback_data="check_subscription")])
-
-        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-
+        """Kanallarni ko'rsatish - tayyor matn va klaviatura render cache dan"""
+        view = get_view(self.settings, "channels", render_channels)
         try:
-            await self.bot.send_message(user_id, msg_text, reply_markup=keyboard, parse_mode="HTML")
+            await self.bot.send_message(user_id, **view.as_kwargs())
         except Exception as e:
             logger.error(f"Show channels error: {e}")
             await self.bot.send_message(user_id, "Iltimos, kanallarga qo'shiling va qaytadan /start bosing.")
 
-    async def _handle_check_subscription(self, callback: Dict[str, Any]):
-        """A'zo bo'ldim tugmasi bosilganda"""
+    async def _handle_check_subscription(self, callback: Dict[str, Any]) -> bool:
+        """A'zo bo'ldim tugmasi bosilganda; callback ga javob berilgan bo'lsa True"""
         user_id = callback["from"]["id"]
         message_id = callback["message"]["message_id"]
 
         try:
             if not self.settings:
                 await self.bot.answer_callback_query(callback["id"], "❌ Bot sozlamalari topilmadi!", show_alert=True)
-                return
+                return True
 
             from bots.user_bots.base_template.services.channel_service import ChannelService
             channel_service = ChannelService(self.settings)
-            result = await channel_service.check_user_channels(user_id, self.bot)
+            result = await channel_service.check_user_channels(user_id, self.bot, recheck=True)
 
             if result["all_joined"]:
                 message = {"from": callback["from"], "chat": callback["message"]["chat"]}
@@ -245,10 +332,14 @@ class BotProcessor:
                 await self.bot.answer_callback_query(callback["id"],
                                                      f"⚠️ Hali {not_joined_count} ta kanalga obuna bo'lmagansiz!",
                                                      show_alert=True)
+                return True
 
         except Exception as e:
             logger.error(f"Check subscription error: {e}", exc_info=True)
             await self.bot.answer_callback_query(callback["id"], "❌ Xatolik!", show_alert=True)
+            return True
+
+        return False
 
     async def _register_user(self, message: Dict[str, Any]):
         """Foydalanuvchini RO'YXATDAN O'TKAZISH"""
@@ -304,7 +395,12 @@ class BotProcessor:
         text += "👇 Quyidagi tugmalar orqali konkursda ishtirok eting:"
 
         keyboard = self._get_main_menu_keyboard()
-        await self.bot.send_message(user_id, text, reply_markup=keyboard, parse_mode="Markdown")
+        await self._send_with_image(user_id, "welcome_image", text, reply_markup=keyboard, parse_mode="Markdown")
+
+    async def _send_with_image(self, user_id: int, image_field: str, text: str, **kwargs):
+        """Konkurs rasmi (welcome_image / promo_image) bilan xabar - rasm file_id orqali"""
+        image_name = self.settings.get(image_field) if self.settings else None
+        await media_cache.send_with_image(self.bot, self.bot_id, user_id, image_name, text, **kwargs)
 
     async def _send_menu(self, user_id: int, text: str = "👇 Asosiy menyu:"):
         """Menu ko'rsatish"""
@@ -312,15 +408,8 @@ class BotProcessor:
         await self.bot.send_message(user_id, text, reply_markup=keyboard)
 
     def _get_main_menu_keyboard(self) -> ReplyKeyboardMarkup:
-        """Asosiy menu keyboard"""
-        return ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="🚀 Konkursda qatnashish")],
-                [KeyboardButton(text="🎁 Sovg'alar"), KeyboardButton(text="📊 Ballarim")],
-                [KeyboardButton(text="🏆 Reyting"), KeyboardButton(text="📜 Shartlar")]
-            ],
-            resize_keyboard=True
-        )
+        """Asosiy menu keyboard (o'zgarmaydi - bir marta yaratilgan)"""
+        return MAIN_MENU_KEYBOARD
 
     async def _save_referral_code(self, user_id: int, code: str):
         """Referral kodni saqlash"""
@@ -347,139 +436,61 @@ class BotProcessor:
             return BotProcessor._referral_cache.get(f"{self.bot_id}:{user_id}")
 
     async def _get_participant(self, user_id: int):
-        """Participant olish"""
-
-        @sync_to_async
-        def _get():
-            try:
-                from django_app.core.models import Participant
-                return Participant.objects.select_related('user').get(
-                    user__telegram_id=user_id,
-                    competition__bot_id=self.bot_id,
-                    is_participant=True
-                )
-            except:
-                return None
-
-        return await _get()
+        """Participant olish (user yuklanmaydi - faqat Participant field lari)"""
+        try:
+            from django_app.core.models import Participant
+            return await async_db.fetch_instance(Participant.objects.filter(
+                user__telegram_id=user_id,
+                competition__bot_id=self.bot_id,
+                is_participant=True
+            ))
+        except Exception as e:
+            logger.error(f"Get participant error: {e}")
+            return None
 
     # ============ MENU HANDLERS ============
 
     async def _handle_konkurs(self, message: Dict[str, Any]):
-        """
-        🚀 Konkursda qatnashish - Referral post
-
-        POST FORMATI:
-        - Admin paneldan description
-        - Referral link
-        - Share button (to'liq post bilan)
-        """
+        """🚀 Konkursda qatnashish - ishtirokchining tayyor referral posti (render cache)"""
         user_id = message["from"]["id"]
 
         try:
-            participant = await self._get_participant(user_id)
-            if not participant:
-                await self.bot.send_message(user_id, "❌ Avval /start ni bosing va kanallarga qo'shiling!")
-                return
-
-            # Bot username ni olish
-            bot_username = self.settings.get("bot_username", "")
-            if not bot_username:
-                me = await self.bot.get_me()
-                bot_username = me.username
-
-            referral_link = f"https://t.me/{bot_username}?start=ref_{participant.referral_code}"
-
-            # Admin paneldan description olish
-            description = self.settings.get("description", "")
-
-            # POST YARATISH - Description + Link (HTML format)
-            if description:
-                text = f"{description}\n\n"
-            else:
-                text = "🎁 Konkursda ishtirok eting va sovg'alar yutib oling!\n\n"
-
-            text += f"📎 Havola:\n{referral_link}\n\n"
-            text += "👆 Havolani bosib nusxa oling va do'stlaringizga yuboring!"
-
-            # Share uchun TO'LIQ POST (URL encode)
-            import urllib.parse
-
-            share_text = ""
-            if description:
-                share_text = f"{description}\n\n"
-            else:
-                share_text = "🎁 Konkursda ishtirok eting va sovg'alar yutib oling!\n\n"
-            share_text += f"📎 Havola:\n{referral_link}"
-
-            # URL encode - maxsus belgilarni to'g'ri encode qilish
-            encoded_text = urllib.parse.quote(share_text, safe='')
-            share_url = f"https://t.me/share/url?url={urllib.parse.quote(referral_link, safe='')}&text={encoded_text}"
-
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="📤 Do'stlarga ulashish", url=share_url)]
-            ])
+            settings = self.settings
+            if not settings.get("bot_username"):
+                bot_username = BotProcessor._bot_usernames.get(self.bot_id)
+                if not bot_username:
+                    me = await self.bot.get_me()
+                    bot_username = BotProcessor._bot_usernames[self.bot_id] = me.username
+                settings = dict(settings, bot_username=bot_username)
+
+            # Avval bosgan ishtirokchi - DB ga murojaatsiz (ishtirokchi yaqinda tekshirilgan bo'lsa)
+            view = None
+            if referral_posts.is_verified(self.bot_id, user_id):
+                view = peek_referral_view(settings, "konkurs_post", user_id)
+            if view is None:
+                participant = await self._get_participant(user_id)
+                if not participant or participant.is_blocked:
+                    drop_referral_view(settings, "konkurs_post", user_id)
+                    await self.bot.send_message(user_id, "❌ Avval /start ni bosing va kanallarga qo'shiling!")
+                    return
+                view = get_referral_view(
+                    settings, "konkurs_post", user_id, participant.referral_code, render_konkurs_post
+                )
+                referral_posts.mark_verified(self.bot_id, user_id)
 
-            # HTML parse_mode ishlatamiz (Markdown muammolardan qochish uchun)
-            await self.bot.send_message(user_id, text, reply_markup=keyboard)
+            await self._send_with_image(user_id, "promo_image", view.text, reply_markup=view.reply_markup)
 
         except Exception as e:
             logger.error(f"Handle konkurs error: {e}", exc_info=True)
             await self.bot.send_message(user_id, "❌ Xatolik yuz berdi. Qaytadan urinib ko'ring.")
 
     async def _handle_prizes(self, message: Dict[str, Any]):
-        """
-        🎁 Sovg'alar
-
-        Type bo'yicha:
-        - text → description dan oladi
-        - number → prize_amount dan oladi
-        """
+        """🎁 Sovg'alar - render cache dan"""
         user_id = message["from"]["id"]
 
         try:
-            prizes = self.settings.get("prizes", [])
-
-            if not prizes:
-                await self.bot.send_message(user_id, "🎁 Sovg'alar hozircha belgilanmagan.")
-                return
-
-            text = "🎁 *KONKURS SOVG'ALARI* 🎁\n\n"
-
-            emojis = {1: "🥇", 2: "🥈", 3: "🥉", 4: "4️⃣", 5: "5️⃣", 6: "6️⃣", 7: "7️⃣", 8: "8️⃣", 9: "9️⃣", 10: "🔟"}
-
-            for prize in prizes:
-                place = prize.get("place", 0)
-                emoji = emojis.get(place, f"{place}.")
-                prize_name = prize.get("prize_name", "")
-                prize_type = prize.get("type", "number")  # text yoki number
-                description = prize.get("description", "")
-                amount = prize.get("prize_amount")
-
-                # TYPE BO'YICHA FORMATLASH
-                if prize_type == "text":
-                    # Text type - description dan oladi
-                    if description:
-                        text += f"{emoji} *{place}-o'rin:* {description}\n\n"
-                    elif prize_name:
-                        text += f"{emoji} *{place}-o'rin:* {prize_name}\n\n"
-                    else:
-                        text += f"{emoji} *{place}-o'rin:* Sovg'a\n\n"
-                else:
-                    # Number type - amount dan oladi
-                    if amount:
-                        if prize_name:
-                            text += f"{emoji} *{place}-o'rin:* {prize_name} - {int(amount):,} so'm\n\n"
-                        else:
-                            text += f"{emoji} *{place}-o'rin:* {int(amount):,} so'm\n\n"
-                    elif prize_name:
-                        text += f"{emoji} *{place}-o'rin:* {prize_name}\n\n"
-                    else:
-                        text += f"{emoji} *{place}-o'rin:* Sovg'a\n\n"
-
-            text += "🚀 G'olib bo'lish uchun do'stlaringizni taklif qiling!"
-
-            await self.bot.send_message(user_id, text, parse_mode="Markdown")
+            view = get_view(self.settings, "prizes", render_prizes)
+            await self.bot.send_message(user_id, **view.as_kwargs())
 
         except Exception as e:
             logger.error(f"Handle prizes error: {e}")
@@ -526,53 +537,61 @@ class BotProcessor:
             rating_service = RatingService(self.bot_id)
             text = await rating_service.get_rating_text(user_id)
 
-            await self.bot.send_message(user_id, text, parse_mode="HTML", disable_web_page_preview=True)
+            from bots.user_bots.base_template.keyboards.inline import get_leaderboard_keyboard
+            await self.bot.send_message(
+                user_id, text, reply_markup=get_leaderboard_keyboard(),
+                parse_mode="HTML", disable_web_page_preview=True
+            )
         except Exception as e:
             logger.error(f"Handle rating error: {e}", exc_info=True)
             await self.bot.send_message(user_id, "❌ Xatolik yuz berdi.")
 
+    async def _handle_rating_page(self, callback: Dict[str, Any]) -> bool:
+        """Reyting sahifasi / atrofim - xabarni tahrirlash; callback ga javob berilgan bo'lsa True"""
+        user_id = callback["from"]["id"]
+        data = callback.get("data", "")
+
+        try:
+            from bots.user_bots.base_template.services.rating_service import RatingService
+            from bots.user_bots.base_template.keyboards.inline import get_leaderboard_keyboard
+
+            page = int(data.split(":", 1)[1]) if data.startswith("rating_page:") else None
+            result = await RatingService(self.bot_id).get_page(user_id, page)
+
+            if not result:
+                await self.bot.answer_callback_query(
+                    callback["id"], "⏳ Reyting tayyorlanmoqda, birozdan keyin urinib ko'ring.", show_alert=True
+                )
+                return True
+
+            await self.bot.edit_message_text(
+                chat_id=callback["message"]["chat"]["id"],
+                message_id=callback["message"]["message_id"],
+                text=result['text'],
+                reply_markup=get_leaderboard_keyboard(result['page'], result['total_pages']),
+                parse_mode="HTML",
+                disable_web_page_preview=True
+            )
+        except Exception as e:
+            logger.error(f"Handle rating page error: {e}")
+
+        return False
+
     async def _handle_rules(self, message: Dict[str, Any]):
-        """📜 Shartlar"""
+        """📜 Shartlar - render cache dan"""
         user_id = message["from"]["id"]
 
         try:
-            rules = self.settings.get("rules_text", "")
-            if not rules:
-                rules = "Konkurs qoidalari hali belgilanmagan."
-
-            text = f"📜 *KONKURS QOIDALARI*\n\n{rules}"
-            await self.bot.send_message(user_id, text, parse_mode="Markdown")
+            view = get_view(self.settings, "rules", render_rules)
+            await self.bot.send_message(user_id, **view.as_kwargs())
         except Exception as e:
             logger.error(f"Handle rules error: {e}")
             await self.bot.send_message(user_id, "❌ Xatolik yuz berdi.")
 
     async def _get_user_stats(self, participant) -> Dict:
-        """User statistikasini olish"""
-
-        @sync_to_async
-        def _get():
-            try:
-                from django_app.core.models import Point, Referral
-                from django_app.core.models.pointrule import PointAction
-                from django.db.models import Sum
-
-                points = Point.objects.filter(participant=participant)
-
-                channel_points = points.filter(reason=PointAction.CHANNEL_JOIN).aggregate(total=Sum('earned_points'))[
-                                     'total'] or 0
-                referral_points = points.filter(reason=PointAction.REFERRAL).aggregate(total=Sum('earned_points'))[
-                                      'total'] or 0
-
-                referral_count = Referral.objects.filter(referrer=participant.user,
-                                                         competition=participant.competition).count()
-
-                return {
-                    'channel_points': channel_points,
-                    'referral_points': referral_points,
-                    'referral_count': referral_count
-                }
-            except Exception as e:
-                logger.error(f"Get user stats error: {e}")
-                return {}
-
-        return await _get()
\ No newline at end of file
+        """User statistikasini olish - participant qatoridagi counter lardan (query yo'q)"""
+        return {
+            'channel_points': participant.channel_points,
+            'referral_points': participant.referral_points + participant.premium_referral_points,
+            'referral_count': participant.referral_count
+        }
\ No newline at end of file
@@ -0,0 +1,143 @@
+# bots/user_bots/base_template/cache/render_cache.py
+"""
+Render cache - sozlamalardan tuziladigan statik javoblar
+Vazifasi: Sovg'alar, Shartlar, kanallar klaviaturasi kabi javoblarni har bosishda
+qaytadan formatlamaslik
+
+Kalit: (bot_id, settings_version, view). settings_version - sozlamalar mazmunining
+hash i (CompetitionService qo'yadi), sozlama o'zgarsa kalit ham o'zgaradi - invalidation
+kerak emas, eski yozuvlar LRU dan chiqib ketadi.
+
+Jarayon ichida saqlanadi: tayyor matn va aiogram markup obyekti - handler hech qanday
+formatlash qilmaydi. Redis ishlatilmaydi: tarmoq roundtrip i render dan qimmat.
+
+Shaxsiy javoblar (taklif posti): shablon REFERRAL_LINK o'rinbosari bilan bir marta
+render qilinadi, ishtirokchi uchun faqat havola qo'yiladi (matn, url, share url dagi
+encode qilingan ko'rinishi) va natija alohida LRU da saqlanadi.
+"""
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+from aiogram.types import InlineKeyboardMarkup
+
+from shared.constants import RENDER_CACHE_SETTINGS
+from shared.utils import clean_channel_username
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedView(NamedTuple):
+    """Yuborishga tayyor javob"""
+    text: str
+    parse_mode: Optional[str] = None
+    reply_markup: Any = None
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        """send_message(chat_id, **view.as_kwargs())"""
+        return {'text': self.text, 'parse_mode': self.parse_mode, 'reply_markup': self.reply_markup}
+
+
+REFERRAL_LINK = '\x00referral_link\x00'  # Shablondagi havola o'rni
+_QUOTED_REFERRAL_LINK = quote(REFERRAL_LINK, safe='')
+
+_views: "OrderedDict[Tuple[int, str, str], RenderedView]" = OrderedDict()
+_posts: "OrderedDict[Tuple[int, str, str, int], RenderedView]" = OrderedDict()
+_stats = {'hits': 0, 'misses': 0, 'post_hits': 0, 'post_misses': 0}
+
+
+def settings_version(settings: Dict[str, Any]) -> str:
+    """Sozlamalar mazmunining qisqa hash i"""
+    payload = {key: value for key, value in settings.items() if key != 'version'}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def get_view(settings: Dict[str, Any], view: str, render: Callable[[Dict[str, Any]], RenderedView]) -> RenderedView:
+    """Tayyor javob - cache da bo'lmasa render(settings) bir marta chaqiriladi"""
+    key = (settings.get('bot_id'), settings.get('version') or settings_version(settings), view)
+
+    rendered = _views.get(key)
+    if rendered is not None:
+        _views.move_to_end(key)
+        _stats['hits'] += 1
+        return rendered
+
+    _stats['misses'] += 1
+    rendered = _views[key] = render(settings)
+    if len(_views) > RENDER_CACHE_SETTINGS['max_entries']:
+        _views.popitem(last=False)
+    return rendered
+
+
+def referral_link(bot_username: str, referral_code: str) -> str:
+    return f"https://t.me/{clean_channel_username(bot_username)}?start=ref_{referral_code}"
+
+
+def _fill(value: Optional[str], link: str) -> Optional[str]:
+    if not value:
+        return value
+    return value.replace(REFERRAL_LINK, link).replace(_QUOTED_REFERRAL_LINK, quote(link, safe=''))
+
+
+def _personalize(template: RenderedView, link: str) -> RenderedView:
+    """Shablonga havolani qo'yish (matn va inline tugmalar)"""
+    markup = template.reply_markup
+    if isinstance(markup, InlineKeyboardMarkup):
+        markup = InlineKeyboardMarkup(inline_keyboard=[
+            [button.model_copy(update={
+                'url': _fill(button.url, link),
+                'switch_inline_query': _fill(button.switch_inline_query, link)
+            }) for button in row]
+            for row in markup.inline_keyboard
+        ])
+    return RenderedView(_fill(template.text, link), template.parse_mode, markup)
+
+
+def _post_key(settings: Dict[str, Any], view: str, user_id: int) -> Tuple[int, str, str, int]:
+    return settings.get('bot_id'), settings.get('version') or settings_version(settings), view, user_id
+
+
+def peek_referral_view(settings: Dict[str, Any], view: str, user_id: int) -> Optional[RenderedView]:
+    """Ishtirokchining cache dagi posti (bo'lmasa None - participant ni o'qish kerak)"""
+    key = _post_key(settings, view, user_id)
+    rendered = _posts.get(key)
+    if rendered is not None:
+        _posts.move_to_end(key)
+        _stats['post_hits'] += 1
+    return rendered
+
+
+def get_referral_view(settings: Dict[str, Any], view: str, user_id: int, referral_code: str,
+                      render: Callable[[Dict[str, Any]], RenderedView]) -> RenderedView:
+    """
+    Ishtirokchining taklif posti - shablon get_view() orqali (versiya bo'yicha bir marta),
+    havola qo'yilgan natija (bot_id, versiya, view, user_id) bo'yicha cache da
+    """
+    rendered = peek_referral_view(settings, view, user_id)
+    if rendered is not None:
+        return rendered
+
+    _stats['post_misses'] += 1
+    template = get_view(settings, view, render)
+    link = referral_link(settings.get('bot_username', ''), referral_code)
+    rendered = _posts[_post_key(settings, view, user_id)] = _personalize(template, link)
+    if len(_posts) > RENDER_CACHE_SETTINGS['max_posts']:
+        _posts.popitem(last=False)
+    return rendered
+
+
+def drop_referral_view(settings: Dict[str, Any], view: str, user_id: int):
+    """Ishtirokchi endi ishtirokchi emas / bloklangan - posti cache dan o'chiriladi"""
+    _posts.pop(_post_key(settings, view, user_id), None)
+
+
+def get_stats() -> Dict[str, int]:
+    return dict(_stats, entries=len(_views), posts=len(_posts))
+
+
+def clear():
+    _views.clear()
+    _posts.clear()
@@ -28,7 +28,7 @@ class CallbackHandler:
 
             # Chanel check
             channel_service = ChannelService(settings)
-            channels_status = await channel_service.check_user_channels(user_id, bot)
+            channels_status = await channel_service.check_user_channels(user_id, bot, recheck=True)
 
             if not channels_status['all_joined']:
                 await self._update_channels_message(user_id, callback, bot, channels_status['not_joined'], settings)
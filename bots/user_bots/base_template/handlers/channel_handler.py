@@ -7,6 +7,7 @@ from bots.user_bots.base_template.keyboards.inline import get_channels_keyboard
 from bots.user_bots.base_template.services.point_service import PointService
 from bots.user_bots.base_template.services.registration_service import RegistrationService
 from bots.user_bots.base_template.services.channel_service import ChannelService
+from shared.point_rules import channel_join_points, referral_award
 from shared.redis_client import redis_client
 from shared.constants import MESSAGES
 
@@ -44,7 +45,7 @@ class ChannelHandler:
 
             # Kanal tekshiruvi
             channel_service = ChannelService(settings)
-            channels_status = await channel_service.check_user_channels(user_id, bot)
+            channels_status = await channel_service.check_user_channels(user_id, bot, recheck=True)
 
             # Agar hali obuna bo'lmagan kanallar bo'lsa
             if not channels_status['all_joined']:
@@ -130,7 +131,7 @@ class ChannelHandler:
 
             # Referral ballarini qo'shish (agar mavjud bo'lsa)
             if referrer and referrer.user.telegram_id != user_id:
-                await self._award_referral_points(referrer, user_data['is_premium'], settings)
+                await self._award_referral_points(referrer, user_id, user_data['is_premium'], settings)
 
             # Success message
             await bot.edit_message_text(
@@ -153,47 +154,24 @@ class ChannelHandler:
         try:
             point_rules = settings.get('point_rules', {})
 
-            # Har bir kanal uchun ball
-            base_points_per_channel = point_rules.get('channel_join', 1)
-            base_total = base_points_per_channel * channels_count
-
-            # Premium bonus
-            if is_premium:
-                premium_multiplier = point_rules.get('premium_user', 2)
-                total_points = base_total * premium_multiplier
-            else:
-                total_points = base_total
+            total_points = channel_join_points(point_rules, channels_count, is_premium)
 
             if total_points > 0:
-                participant.add_points(total_points, 'channel_join')
+                participant.add_points(total_points, 'channel_join', source_ref='registration')
                 logger.info(f"Channel points awarded: user={participant.telegram_id}, points={total_points}")
 
         except Exception as e:
             logger.error(f"Award channel points error: {e}")
 
-    async def _award_referral_points(self, referrer, is_premium_referred: bool, settings: Dict):
+    async def _award_referral_points(self, referrer, referred_id: int, is_premium_referred: bool, settings: Dict):
         """Referral ballarini qo'shish"""
         try:
             point_rules = settings.get('point_rules', {})
 
-            # Oddiy referral ball
-            base_referral_points = point_rules.get('referral', 5)
-
-            # Premium referral uchun
-            if is_premium_referred:
-                premium_referral_points = point_rules.get('premium_ref', 0)
-                if premium_referral_points > 0:
-                    total_points = premium_referral_points
-                else:
-                    # Default: 2x
-                    total_points = base_referral_points * 2
-                reason = 'premium_ref'
-            else:
-                total_points = base_referral_points
-                reason = 'referral'
+            total_points, reason = referral_award(point_rules, is_premium_referred)
 
             if total_points > 0:
-                referrer.add_points(total_points, reason)
+                referrer.add_points(total_points, reason, source_ref=f"referred:{referred_id}")
                 logger.info(f"Referral points awarded: referrer={referrer.telegram_id}, points={total_points}")
 
         except Exception as e:
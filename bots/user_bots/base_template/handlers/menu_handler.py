@@ -8,13 +8,13 @@ from typing import Dict, Any
 
 from aiogram import Bot
 
+from bots.user_bots.base_template.cache.render_cache import RenderedView, get_view
 from bots.user_bots.base_template.services.competition_service import CompetitionService
 from bots.user_bots.base_template.services.user_service import UserService
 from bots.user_bots.base_template.services.point_service import PointService
-from bots.user_bots.base_template.services.prize_service import PrizeService
 from bots.user_bots.base_template.services.rating_service import RatingService
 from bots.user_bots.base_template.services.invitation_service import InvitationService
-from bots.user_bots.base_template.keyboards.inline import get_invitation_keyboard
+from bots.user_bots.base_template.keyboards.inline import get_leaderboard_keyboard
 from shared.redis_client import redis_client
 from shared.utils import format_points, truncate_text, get_prize_emoji, clean_channel_username
 from shared.constants import MESSAGES, RATE_LIMITS, CACHE_KEYS
@@ -22,6 +22,43 @@ from shared.constants import MESSAGES, RATE_LIMITS, CACHE_KEYS
 logger = logging.getLogger(__name__)
 
 
+def render_prizes(settings: Dict[str, Any]) -> RenderedView:
+    """Sovg'alar ro'yxati"""
+    prizes = settings.get('prizes', [])
+    if not prizes:
+        return RenderedView(MESSAGES['no_prizes'], "Markdown")
+
+    text = MESSAGES['prizes_header']
+    for prize in prizes:
+        emoji = get_prize_emoji(prize['place'])
+        place_text = f"{prize['place']}-o'rin"
+
+        if prize['type'] == 'number' and prize.get('prize_amount'):
+            amount = f"{int(float(prize['prize_amount'])):,} soʻm"
+            display_text = f"{prize['prize_name']} ({amount})" if prize.get('prize_name') else amount
+        elif prize.get('prize_name'):
+            display_text = prize['prize_name']
+        else:
+            display_text = place_text
+
+        text += f"{emoji} *{place_text}:* {display_text}\n"
+
+        if prize.get('description'):
+            desc = truncate_text(prize['description'], 100)
+            text += f"   📝 {desc}\n"
+
+        text += "\n"
+
+    text += MESSAGES['prizes_footer']
+    return RenderedView(text, "Markdown")
+
+
+def render_rules(settings: Dict[str, Any]) -> RenderedView:
+    """Konkurs qoidalari"""
+    rules_text = settings.get('rules_text') or MESSAGES['rules_default']
+    return RenderedView(MESSAGES['rules_header'] + rules_text, "Markdown")
+
+
 class MenuHandlers:
 
     def __init__(self, bot_id: int):
@@ -29,7 +66,6 @@ class MenuHandlers:
         self.competition_service = CompetitionService()
         self.user_service = UserService()
         self.point_service = PointService(bot_id)
-        self.prize_service = PrizeService(bot_id)
         self.rating_service = RatingService(bot_id)
         self.invitation_service = InvitationService(bot_id)
 
@@ -42,29 +78,23 @@ class MenuHandlers:
                 await bot.send_message(user_id, MESSAGES['rate_limited'])
                 return
 
-            # Participant olish
-            participant = await self.user_service.get_participant_by_user_id(user_id, self.bot_id)
-            if not participant:
-                await bot.send_message(user_id, MESSAGES['not_registered'], parse_mode="Markdown")
-                return
-
             # Competition settings
             settings = await self.competition_service.get_competition_settings(self.bot_id)
             if not settings:
                 await bot.send_message(user_id, MESSAGES['settings_not_found'])
                 return
 
-            # Taklif posti generatsiya
-            invitation_text = await self.invitation_service.generate_invitation_post(settings, participant)
-
-            # Referral link
-            bot_username = clean_channel_username(settings.get('bot_username', ''))
-            referral_link = f"https://t.me/{bot_username}?start=ref_{participant.referral_code}"
-
-            keyboard = get_invitation_keyboard(referral_link)
+            # Taklif posti - avval tuzilgan bo'lsa participant o'qilmaydi
+            view = self.invitation_service.get_cached_view(settings, user_id)
+            if view is None:
+                participant = await self.user_service.get_participant_by_user_id(user_id, self.bot_id)
+                if not participant:
+                    await bot.send_message(user_id, MESSAGES['not_registered'], parse_mode="Markdown")
+                    return
+                view = self.invitation_service.get_invitation_view(settings, user_id, participant.referral_code)
 
             # Taklif postini yuborish
-            await bot.send_message(user_id, invitation_text, reply_markup=keyboard, parse_mode="Markdown")
+            await bot.send_message(user_id, **view.as_kwargs())
             await bot.send_message(user_id, MESSAGES['invitation_share_instruction'], parse_mode="Markdown")
 
         except Exception as e:
@@ -86,38 +116,14 @@ class MenuHandlers:
                 await bot.send_message(user_id, MESSAGES['rate_limited'])
                 return
 
-            # Sovrinlarni olish
-            prizes = await self.prize_service.get_prizes()
-            if not prizes:
-                await bot.send_message(user_id, MESSAGES['no_prizes'], parse_mode="Markdown")
+            # Sozlamalar (sovg'alar shu yerda) - tayyor javob render cache dan
+            settings = await self.competition_service.get_competition_settings(self.bot_id)
+            if not settings:
+                await bot.send_message(user_id, MESSAGES['settings_not_found'])
                 return
 
-            # Text format
-            text = MESSAGES['prizes_header']
-
-            for prize in prizes:
-                emoji = get_prize_emoji(prize['place'])
-                place_text = f"{prize['place']}-o'rin"
-
-                if prize['type'] == 'number' and prize.get('prize_amount'):
-                    amount = f"{int(float(prize['prize_amount'])):,} soʻm"
-                    display_text = f"{prize['prize_name']} ({amount})" if prize.get('prize_name') else amount
-                elif prize.get('prize_name'):
-                    display_text = prize['prize_name']
-                else:
-                    display_text = place_text
-
-                text += f"{emoji} *{place_text}:* {display_text}\n"
-
-                if prize.get('description'):
-                    desc = truncate_text(prize['description'], 100)
-                    text += f"   📝 {desc}\n"
-
-                text += "\n"
-
-            text += MESSAGES['prizes_footer']
-
-            await bot.send_message(user_id, text, parse_mode="Markdown")
+            view = get_view(settings, 'menu_prizes', render_prizes)
+            await bot.send_message(user_id, **view.as_kwargs())
 
         except Exception as e:
             logger.error(f"Handle sovgalar error: {e}", exc_info=True)
@@ -176,7 +182,10 @@ class MenuHandlers:
             # Rating text olish
             rating_text = await self.rating_service.get_rating_text(user_id)
 
-            await bot.send_message(user_id, rating_text, parse_mode="Markdown")
+            await bot.send_message(
+                user_id, rating_text, reply_markup=get_leaderboard_keyboard(),
+                parse_mode="HTML", disable_web_page_preview=True
+            )
 
         except Exception as e:
             logger.error(f"Handle reyting error: {e}", exc_info=True)
@@ -201,6 +210,31 @@ class MenuHandlers:
             logger.error(f"Refresh rating error: {e}")
             await bot.answer_callback_query(callback['id'], "Xatolik yuz berdi")
 
+    async def handle_rating_page(self, callback: Dict[str, Any], bot: Bot):
+        """Reyting sahifasi / atrofim callback"""
+        user_id = callback['from']['id']
+        data = callback.get('data', '')
+        try:
+            page = int(data.split(':', 1)[1]) if data.startswith('rating_page:') else None
+            result = await self.rating_service.get_page(user_id, page)
+
+            if not result:
+                await bot.answer_callback_query(
+                    callback['id'], "⏳ Reyting tayyorlanmoqda, birozdan keyin urinib ko'ring.", show_alert=True
+                )
+                return
+
+            await bot.edit_message_text(
+                chat_id=callback['message']['chat']['id'],
+                message_id=callback['message']['message_id'],
+                text=result['text'],
+                reply_markup=get_leaderboard_keyboard(result['page'], result['total_pages']),
+                parse_mode="HTML",
+                disable_web_page_preview=True
+            )
+        except Exception as e:
+            logger.error(f"Rating page error: {e}")
+
     async def handle_shartlar(self, message: Dict[str, Any], bot: Bot):
         """Handle 'Shartlar' button"""
         user_id = message['from']['id']
@@ -216,14 +250,8 @@ class MenuHandlers:
                 await bot.send_message(user_id, MESSAGES['settings_not_found'])
                 return
 
-            # Rules text
-            rules_text = settings.get('rules_text', '')
-            if not rules_text:
-                rules_text = MESSAGES['rules_default']
-
-            text = MESSAGES['rules_header'] + rules_text
-
-            await bot.send_message(user_id, text, parse_mode="Markdown")
+            view = get_view(settings, 'menu_rules', render_rules)
+            await bot.send_message(user_id, **view.as_kwargs())
 
         except Exception as e:
             logger.error(f"Handle shartlar error: {e}", exc_info=True)
@@ -10,12 +10,13 @@ from aiogram import Bot
 from bots.user_bots.base_template.services.competition_service import CompetitionService
 from bots.user_bots.base_template.services.registration_service import RegistrationService
 from bots.user_bots.base_template.services.channel_service import ChannelService
-from bots.user_bots.base_template.services.prize_service import PrizeService
-from bots.user_bots.base_template.keyboards.inline import get_channels_keyboard, get_invitation_keyboard
+from bots.user_bots.base_template.services.invitation_service import InvitationService
+from bots.user_bots.base_template.keyboards.inline import get_channels_keyboard
 from bots.user_bots.base_template.keyboards.reply import get_main_menu_keyboard
+from shared import media_cache
+from shared.point_rules import channel_join_points, referral_award
 from shared.redis_client import redis_client
-from shared.utils import extract_user_data, extract_referral_code, truncate_text, get_prize_emoji, \
-    clean_channel_username
+from shared.utils import extract_user_data, extract_referral_code, clean_channel_username
 from shared.constants import MESSAGES, RATE_LIMITS, CACHE_KEYS
 
 logger = logging.getLogger(__name__)
@@ -28,7 +29,7 @@ class StartHandler:
         self.bot_id = bot_id
         self.competition_service = CompetitionService()
         self.registration_service = RegistrationService(bot_id)
-        self.prize_service = PrizeService(bot_id)
+        self.invitation_service = InvitationService(bot_id)
 
     async def handle_start(self, message: Dict[str, Any], bot: Bot) -> None:
         """
@@ -106,7 +107,7 @@ class StartHandler:
 
             # Referral ballari (agar mavjud bo'lsa)
             if referrer and referrer.user.telegram_id != user_id:
-                await self._award_referral_points(referrer, user_data.get('is_premium', False), settings)
+                await self._award_referral_points(referrer, user_id, user_data.get('is_premium', False), settings)
 
             # Welcome va menu
             await self.send_welcome_and_menu(message, bot, settings, participant)
@@ -199,65 +200,26 @@ class StartHandler:
             if rules_text:
                 text += rules_text
 
-            await bot.send_message(user_id, text, parse_mode="Markdown")
+            await media_cache.send_with_image(
+                bot, self.bot_id, user_id, settings.get('welcome_image'), text, parse_mode="Markdown"
+            )
         except Exception as e:
             logger.error(f"Welcome message error: {e}")
 
     async def _send_invitation_post(self, user_id: int, bot: Bot, settings: Dict, participant):
-        """Taklif posti yuborish"""
+        """Taklif posti yuborish (render cache - InvitationService)"""
         try:
-            invitation_text = await self._generate_invitation_text(settings, participant)
-
-            bot_username = clean_channel_username(settings.get('bot_username', ''))
-            referral_link = f"https://t.me/{bot_username}?start=ref_{participant.referral_code}"
+            view = self.invitation_service.get_invitation_view(settings, user_id, participant.referral_code)
 
-            keyboard = get_invitation_keyboard(referral_link)
-
-            await bot.send_message(user_id, invitation_text, reply_markup=keyboard, parse_mode="Markdown")
+            await media_cache.send_with_image(
+                bot, self.bot_id, user_id, settings.get('promo_image'), view.text,
+                reply_markup=view.reply_markup, parse_mode=view.parse_mode
+            )
             await bot.send_message(user_id, MESSAGES['invitation_share_instruction'])
 
         except Exception as e:
             logger.error(f"Invitation post error: {e}")
 
-    async def _generate_invitation_text(self, settings: Dict, participant) -> str:
-        """Taklif posti textini generatsiya qilish"""
-        try:
-            bot_username = clean_channel_username(settings.get('bot_username', ''))
-            referral_link = f"https://t.me/{bot_username}?start=ref_{participant.referral_code}"
-
-            text = MESSAGES['invitation_header']
-            text += MESSAGES['invitation_competition'].format(name=settings.get('name', 'Konkurs'))
-
-            # Description
-            description = settings.get('description', '')
-            if description:
-                text += MESSAGES['invitation_description'].format(description=truncate_text(description, 120))
-
-            # Prizes (top 3)
-            prizes = await self.prize_service.get_prizes()
-            if prizes:
-                text += MESSAGES['invitation_prizes']
-                for prize in prizes[:3]:
-                    emoji = get_prize_emoji(prize['place'])
-                    display_text = prize.get('display_text', f"{prize['place']}-o'rin")
-                    text += f"{emoji} {display_text}\n"
-                text += "\n"
-
-            # Rules preview
-            rules_text = settings.get('rules_text', '')
-            if rules_text:
-                text += MESSAGES['invitation_rules'].format(rules=truncate_text(rules_text, 100))
-
-            # Referral link
-            text += MESSAGES['invitation_link'].format(link=referral_link)
-            text += MESSAGES['invitation_cta']
-
-            return text
-
-        except Exception as e:
-            logger.error(f"Generate invitation text error: {e}")
-            return "🎉 Do'stlaringizni taklif qiling va ballar yig'ing!"
-
     async def _send_main_menu(self, user_id: int, bot: Bot):
         """Main menu yuborish"""
         try:
@@ -272,46 +234,24 @@ class StartHandler:
             point_rules = settings.get('point_rules', {})
             channels_count = len(settings.get('channels', []))
 
-            # Har bir kanal uchun ball
-            base_points_per_channel = point_rules.get('channel_join', 1)
-            base_total = base_points_per_channel * channels_count
-
-            # Premium bonus
-            if is_premium:
-                premium_multiplier = point_rules.get('premium_user', 2)
-                total_points = base_total * premium_multiplier
-            else:
-                total_points = base_total
+            total_points = channel_join_points(point_rules, channels_count, is_premium)
 
             if total_points > 0:
-                participant.add_points(total_points, 'channel_join')
+                participant.add_points(total_points, 'channel_join', source_ref='registration')
                 logger.info(f"Channel points awarded: user={participant.telegram_id}, points={total_points}")
 
         except Exception as e:
             logger.error(f"Award channel points error: {e}")
 
-    async def _award_referral_points(self, referrer, is_premium_referred: bool, settings: Dict):
+    async def _award_referral_points(self, referrer, referred_id: int, is_premium_referred: bool, settings: Dict):
         """Referral ballarini qo'shish"""
         try:
             point_rules = settings.get('point_rules', {})
 
-            # Oddiy referral ball
-            base_referral_points = point_rules.get('referral', 5)
-
-            # Premium referral uchun
-            if is_premium_referred:
-                premium_referral_points = point_rules.get('premium_ref', 0)
-                if premium_referral_points > 0:
-                    total_points = premium_referral_points
-                else:
-                    total_points = base_referral_points * 2
-                reason = 'premium_ref'
-            else:
-                total_points = base_referral_points
-                reason = 'referral'
+            total_points, reason = referral_award(point_rules, is_premium_referred)
 
             if total_points > 0:
-                referrer.add_points(total_points, reason)
+                referrer.add_points(total_points, reason, source_ref=f"referred:{referred_id}")
                 logger.info(f"Referral points awarded: referrer={referrer.telegram_id}, points={total_points}")
 
         except Exception as e:
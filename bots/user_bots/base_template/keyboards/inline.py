@@ -5,7 +5,7 @@ Vazifasi: Barcha inline tugmalar bir joyda
 """
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from shared.constants import BUTTON_TEXTS
 from shared.utils import clean_channel_username
@@ -125,6 +125,36 @@ def get_rating_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_leaderboard_keyboard(page: Optional[int] = None, total_pages: Optional[int] = None) -> InlineKeyboardMarkup:
+    """
+    Reyting sahifalari uchun keyboard
+
+    Args:
+        page: Joriy sahifa (0 dan). None bo'lsa faqat "atrofim" tugmasi
+        total_pages: Jami sahifalar soni
+
+    Returns:
+        InlineKeyboardMarkup
+    """
+    builder = InlineKeyboardBuilder()
+
+    if page is None or total_pages is None:
+        builder.add(InlineKeyboardButton(text="📍 Mening atrofim", callback_data="rating_around"))
+        return builder.as_markup()
+
+    # Navigatsiya qatori
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text="⬅️", callback_data=f"rating_page:{page - 1}"))
+    navigation.append(InlineKeyboardButton(text="📍", callback_data="rating_around"))
+    if page < total_pages - 1:
+        navigation.append(InlineKeyboardButton(text="➡️", callback_data=f"rating_page:{page + 1}"))
+
+    builder.row(*navigation)
+    builder.row(InlineKeyboardButton(text="🏆 TOP 10", callback_data="rating_page:0"))
+    return builder.as_markup()
+
+
 def get_back_keyboard(callback_data: str = "back_to_menu") -> InlineKeyboardMarkup:
     """
     Orqaga qaytish tugmasi
@@ -1,28 +1,58 @@
 import logging
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
 from aiogram import Bot
 
+from shared.channel_membership import is_recent_member
+from shared.constants import CACHE_KEYS, CACHE_TTL
+from shared.redis_client import redis_client
+
 logger = logging.getLogger(__name__)
 
+ChatId = Union[int, str]
+
 
 class ChannelService:
+    """
+    Kanal a'zoligini tekshirish
+
+    Avval bot admin bo'lgan kanallarning a'zolar to'plami (chat_member update lari,
+    shared/channel_membership.py) tekshiriladi. So'ng (kanal, user) cache: a'zo - uzoq,
+    a'zo emas - qisqa TTL. "A'zo bo'ldim" qayta bosilganda (cooldown dan keyin) salbiy
+    natijalar qayta tekshiriladi. @username -> chat ID ham cache lanadi.
+    Qolganlari - getChatMember.
+    """
 
     def __init__(self, settings: Dict[str, Any]):
         self.settings = settings
         self.channels = settings.get("channels", [])
 
-    async def check_user_channels(self, user_id: int, bot: Bot) -> Dict[str, Any]:
+    async def check_user_channels(self, user_id: int, bot: Bot, recheck: bool = False) -> Dict[str, Any]:
         """
         Foydalanuvchi BARCHA kanallarga obunami tekshirish
 
         MUHIM: Faqat HAMMA kanalga qo'shilgan bo'lsa True qaytaradi
+
+        Args:
+            recheck: Foydalanuvchi tekshiruvni o'zi so'radi ("A'zo bo'ldim") -
+                cooldown o'tgan bo'lsa "a'zo emas" cache i e'tiborga olinmaydi
         """
         if not self.channels:
             return {"all_joined": True, "not_joined": [], "joined_count": 0, "total": 0}
 
-        tasks = [self._check_single(ch, user_id, bot) for ch in self.channels]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        chat_ids = await self._resolve_chat_ids(bot)
+        cached = self._get_cached(chat_ids, user_id, drop_negative=recheck and self._recheck_allowed(user_id))
+
+        misses = [i for i, status in enumerate(cached) if status is None]
+        checked = await asyncio.gather(
+            *[self._check_single(self.channels[i], user_id, bot, chat_ids[i]) for i in misses],
+            return_exceptions=True
+        )
+        self._store(chat_ids, user_id, misses, checked)
+
+        results = [{"channel": channel, "status": status} for channel, status in zip(self.channels, cached)]
+        for i, result in zip(misses, checked):
+            results[i] = result
 
         not_joined = []
         joined_count = 0
@@ -58,7 +88,7 @@ class ChannelService:
             "total": total
         }
 
-    async def _check_single(self, channel: Dict, user_id: int, bot: Bot) -> Dict:
+    async def _check_single(self, channel: Dict, user_id: int, bot: Bot, chat_id: Optional[ChatId] = None) -> Dict:
         """
         Bitta kanalni tekshirish
 
@@ -68,23 +98,8 @@ class ChannelService:
         - Guruhlar
         """
         try:
-            # Username yoki ID ni olish
-            raw_username = channel.get("channel_username", "")
-            channel_id = channel.get("channel_id")  # Private kanallar uchun ID
-
-            # Chat ID ni aniqlash
-            if channel_id:
-                # Private kanal - ID orqali
-                chat_id = channel_id
-            elif raw_username:
-                # Public kanal - username orqali
-                username = str(raw_username).replace("@", "").replace("https://t.me/", "").replace("http://t.me/",
-                                                                                                   "").strip()
-                if not username:
-                    logger.warning(f"Empty channel username: {channel}")
-                    return {"channel": channel, "status": "error", "error_type": "empty_username"}
-                chat_id = f"@{username}"
-            else:
+            chat_id = chat_id or self._chat_identifier(channel)
+            if not chat_id:
                 logger.warning(f"No username or ID for channel: {channel}")
                 return {"channel": channel, "status": "error", "error_type": "no_identifier"}
 
@@ -125,4 +140,99 @@ class ChannelService:
 
         except Exception as e:
             logger.error(f"Channel check critical error: {e}", exc_info=True)
-            return {"channel": channel, "status": "error", "error_type": "critical"}
\ No newline at end of file
+            return {"channel": channel, "status": "error", "error_type": "critical"}
+    @staticmethod
+    def _chat_identifier(channel: Dict) -> Optional[ChatId]:
+        """Private kanal - ID, public - @username"""
+        channel_id = channel.get("channel_id")
+        if channel_id:
+            return channel_id
+
+        username = str(channel.get("channel_username") or "").replace("@", "").replace(
+            "https://t.me/", "").replace("http://t.me/", "").strip()
+        return f"@{username}" if username else None
+
+    async def _resolve_chat_ids(self, bot: Bot) -> List[Optional[ChatId]]:
+        """@username larni chat ID ga aylantirish (cache bilan); aniqlanmasa @username qoladi"""
+        identifiers = [self._chat_identifier(channel) for channel in self.channels]
+        usernames = [i for i in identifiers if isinstance(i, str) and i.startswith("@")]
+        if not usernames or not redis_client.is_connected():
+            return identifiers
+
+        try:
+            keys = [CACHE_KEYS['channel_chat_id'].format(username=u[1:].lower()) for u in usernames]
+            resolved = dict(zip(usernames, redis_client.client.mget(keys)))
+        except Exception as e:
+            logger.error(f"Resolve chat ids cache error: {e}")
+            return identifiers
+
+        missing = [u for u in usernames if not resolved[u]]
+        if missing:
+            chats = await asyncio.gather(*[bot.get_chat(u) for u in missing], return_exceptions=True)
+            try:
+                pipe = redis_client.client.pipeline(transaction=False)
+                for username, chat in zip(missing, chats):
+                    key = CACHE_KEYS['channel_chat_id'].format(username=username[1:].lower())
+                    if isinstance(chat, Exception):
+                        # Aniqlanmadi - har tekshiruvda get_chat qilmaslik uchun @username ni eslab qolamiz
+                        resolved[username] = username
+                        pipe.setex(key, CACHE_TTL['channel_chat_id_unresolved'], username)
+                    else:
+                        resolved[username] = str(chat.id)
+                        pipe.setex(key, CACHE_TTL['channel_chat_id'], chat.id)
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Resolve chat ids store error: {e}")
+
+        return [
+            int(resolved[i]) if resolved.get(i) and not resolved[i].startswith("@") else i
+            for i in identifiers
+        ]
+
+    def _recheck_allowed(self, user_id: int) -> bool:
+        """Foydalanuvchi qayta tekshiruvi - cooldown da bir marta"""
+        if not redis_client.is_connected():
+            return True
+        try:
+            return bool(redis_client.client.set(
+                CACHE_KEYS['channel_recheck'].format(bot_id=self.settings.get('bot_id'), user_id=user_id), 1,
+                nx=True, ex=CACHE_TTL['channel_recheck']
+            ))
+        except Exception:
+            return True
+
+    def _get_cached(self, chat_ids: List[Optional[ChatId]], user_id: int, drop_negative: bool) -> List[Optional[str]]:
+        """Har kanal uchun a'zolar to'plami / cache dagi status (joined/not_joined) yoki None"""
+        if not redis_client.is_connected():
+            return [None] * len(chat_ids)
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            for chat_id in chat_ids:
+                pipe.zscore(CACHE_KEYS['channel_members'].format(chat_id=chat_id), user_id)
+            pipe.mget([CACHE_KEYS['channel_member'].format(chat_id=chat_id, user_id=user_id) for chat_id in chat_ids])
+            *member_scores, statuses = pipe.execute()
+        except Exception as e:
+            logger.error(f"Channel member cache get error: {e}")
+            return [None] * len(chat_ids)
+
+        return [
+            "joined" if is_recent_member(score) else
+            None if status is None or (drop_negative and status == "not_joined") else status
+            for score, status in zip(member_scores, statuses)
+        ]
+
+    def _store(self, chat_ids: List[Optional[ChatId]], user_id: int, indexes: List[int], results: List):
+        """Aniq natijalarni cache ga yozish (xatolar yozilmaydi)"""
+        if not indexes or not redis_client.is_connected():
+            return
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            for i, result in zip(indexes, results):
+                if isinstance(result, Exception) or result.get("status") not in ("joined", "not_joined"):
+                    continue
+                ttl_key = 'channel_member_joined' if result["status"] == "joined" else 'channel_member_not_joined'
+                pipe.setex(CACHE_KEYS['channel_member'].format(chat_id=chat_ids[i], user_id=user_id),
+                           CACHE_TTL[ttl_key], result["status"])
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Channel member cache store error: {e}")
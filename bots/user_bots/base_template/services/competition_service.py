@@ -3,9 +3,12 @@
 Competition Service - Bot sozlamalarini olish
 MUHIM: Faqat shu bot_id ga tegishli ma'lumotlar
 """
+import asyncio
 import logging
 from typing import Dict, Any, Optional
-from asgiref.sync import sync_to_async
+
+from bots.user_bots.base_template.cache.render_cache import settings_version
+from shared import async_db
 
 logger = logging.getLogger(__name__)
 
@@ -44,64 +47,86 @@ class CompetitionService:
             logger.error(f"Get settings error: {e}", exc_info=True)
             return None
 
-    @sync_to_async
-    def _fetch_from_db(self, bot_id: int) -> Optional[Dict[str, Any]]:
-        """Database dan olish"""
+    async def _fetch_from_db(self, bot_id: int) -> Optional[Dict[str, Any]]:
+        """Database dan olish - konkurs, keyin kanallar/qoidalar/sovg'alar parallel"""
         try:
-            from django_app.core.models import Competition
+            from django_app.core.models import Channel, Competition, PointRule, Prize
 
-            competition = Competition.objects.select_related(
-                'bot', 'bot__owner'
-            ).prefetch_related(
-                'channels', 'point_rules', 'prize_set'
-            ).filter(
+            competition = await async_db.fetch_one(Competition.objects.filter(
                 bot_id=bot_id,
                 bot__is_active=True
-            ).first()
+            ).values_list(
+                'id', 'name', 'description', 'rules_text', 'status', 'welcome_image', 'promo_image',
+                'bot__bot_username', 'bot__registration_batching', 'bot__registration_batch_size',
+                'bot__registration_batch_latency_ms'
+            ))
 
             if not competition:
                 logger.warning(f"Competition not found for bot {bot_id}")
                 return None
 
+            (competition_id, name, description, rules_text, status, welcome_image, promo_image, bot_username,
+             batching, batch_size, batch_latency_ms) = competition
+
+            channels, rules, prizes = await asyncio.gather(
+                async_db.fetch_all(Channel.objects.filter(competitions=competition_id).values_list(
+                    'id', 'channel_username', 'title', 'type'
+                )),
+                async_db.fetch_all(PointRule.objects.filter(competition_id=competition_id).values_list(
+                    'action_type', 'points'
+                )),
+                async_db.fetch_all(Prize.objects.filter(competition_id=competition_id).order_by('place').values_list(
+                    'place', 'prize_name', 'prize_amount', 'type', 'description'
+                ))
+            )
+
             # Channels
             channels_data = []
-            for ch in competition.channels.all():
+            for channel_id, channel_username, title, channel_type in channels:
                 channels_data.append({
-                    'id': ch.id,
-                    'channel_username': ch.channel_username or '',
-                    'channel_name': ch.title or ch.channel_username or '',
-                    'type': ch.type
+                    'id': channel_id,
+                    'channel_username': channel_username or '',
+                    'channel_name': title or channel_username or '',
+                    'type': channel_type
                 })
 
             # Point rules
-            point_rules = {}
-            for rule in competition.point_rules.all():
-                point_rules[rule.action_type] = rule.points
+            point_rules = {action_type: points for action_type, points in rules}
 
             # Prizes
             prizes_data = []
-            for prize in competition.prize_set.all().order_by('place'):
+            for place, prize_name, prize_amount, prize_type, prize_description in prizes:
                 prizes_data.append({
-                    'place': prize.place,
-                    'prize_name': prize.prize_name or '',
-                    'prize_amount': float(prize.prize_amount) if prize.prize_amount else None,
-                    'type': prize.type,
-                    'description': prize.description or ''
+                    'place': place,
+                    'prize_name': prize_name or '',
+                    'prize_amount': float(prize_amount) if prize_amount else None,
+                    'type': prize_type,
+                    'description': prize_description or ''
                 })
 
-            return {
-                'id': competition.id,
+            settings = {
+                'id': competition_id,
                 'bot_id': bot_id,
-                'name': competition.name or '',
-                'description': competition.description or '',
-                'rules_text': competition.rules_text or '',
-                'status': competition.status,
-                'bot_username': competition.bot.bot_username if competition.bot else '',
+                'name': name or '',
+                'description': description or '',
+                'rules_text': rules_text or '',
+                'status': status,
+                'welcome_image': welcome_image or '',  # storage nomi (media_cache kaliti)
+                'promo_image': promo_image or '',
+                'bot_username': bot_username or '',
                 'channels': channels_data,
                 'point_rules': point_rules,
-                'prizes': prizes_data
+                'prizes': prizes_data,
+                'registration_batch': {
+                    'enabled': batching,
+                    'size': batch_size,
+                    'latency_ms': batch_latency_ms
+                }
             }
+            # Render cache kaliti - sozlama o'zgarsa versiya ham o'zgaradi
+            settings['version'] = settings_version(settings)
+            return settings
 
         except Exception as e:
             logger.error(f"Fetch from DB error: {e}", exc_info=True)
-            return None
\ No newline at end of file
+            return None
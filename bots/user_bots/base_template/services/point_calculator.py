@@ -4,11 +4,11 @@ Point calculator service - TO'G'RILANGAN
 """
 import logging
 from typing import Dict, Any, Optional, Tuple
-from asgiref.sync import sync_to_async
-from django.db import transaction
-from django.utils import timezone
-from django_app.core.models import Participant, Point
+from shared.db_executor import db_sync_to_async
+from django_app.core.models import Participant
 from django_app.core.models.pointrule import PointAction
+from shared.point_ledger import award
+from shared.point_rules import channel_join_points, referral_award
 
 logger = logging.getLogger(__name__)
 
@@ -35,14 +35,9 @@ class PointCalculator:
             base_total = base_points * channels_joined
 
             # Apply premium multiplier
-            total_points = base_total
-            multiplier = 1.0
-            premium_bonus = 0
-            if is_premium:
-                premium_multiplier = self._get_rule_value(PointAction.PREMIUM_USER, 2.0)
-                multiplier = float(premium_multiplier)
-                total_points = int(base_total * multiplier)
-                premium_bonus = total_points - base_total
+            total_points = channel_join_points(self.point_rules, channels_joined, is_premium)
+            multiplier = total_points / base_total if is_premium and base_total else 1.0
+            premium_bonus = total_points - base_total
 
             breakdown = {
                 'base_points_per_channel': base_points,
@@ -66,17 +61,8 @@ class PointCalculator:
             # Get base referral points
             base_points = self._get_rule_value(PointAction.REFERRAL, 5)
 
-            total_points = base_points
-            premium_bonus = 0
-            if is_premium_referral:
-                premium_points = self._get_rule_value(PointAction.PREMIUM_REFERRAL, 10)
-                if premium_points:
-                    total_points = premium_points
-                    premium_bonus = premium_points - base_points
-                else:
-                    # Default: double points for premium referral
-                    total_points = base_points * 2
-                    premium_bonus = base_points
+            total_points, _ = referral_award(self.point_rules, is_premium_referral)
+            premium_bonus = total_points - base_points
 
             breakdown = {
                 'base_points': base_points,
@@ -93,24 +79,16 @@ class PointCalculator:
             return 5, {}
 
     async def add_points_to_participant(self, participant: Participant, points: int,
-                                      reason: str, details: Dict[str, Any] = None) -> bool:
+                                      reason: str, details: Dict[str, Any] = None,
+                                      source_ref: Optional[str] = None) -> bool:
         """Add points to participant"""
-        @sync_to_async
-        @transaction.atomic
+        @db_sync_to_async
         def _add_points():
             try:
-                # Update participant points
-                participant.current_points += points
-                participant.updated_at = timezone.now()
-                participant.save(update_fields=['current_points', 'updated_at'])
-
-                # Create point record
-                point = Point.objects.create(
-                    participant=participant,
-                    earned_points=points,
-                    reason=reason,
-                    details=details or {},
-                    created_at=timezone.now()
+                # Write-behind ledger - Participant qatori lock qilinmaydi
+                award(
+                    participant.id, participant.competition_id, participant.telegram_id,
+                    points, reason, source_ref=source_ref
                 )
 
                 logger.info(f"Added {points} points to participant {participant.id}")
@@ -5,12 +5,9 @@ Vazifasi: Foydalanuvchi ballarini hisoblash va statistika
 """
 import logging
 from typing import Dict, Any, Optional
-from asgiref.sync import sync_to_async
-from django.db.models import Sum, Case, When, Value, IntegerField
-from django.db.models.functions import Coalesce
+from shared.db_executor import db_sync_to_async
 
-from django_app.core.models import Participant, Point
-from django_app.core.models.pointrule import PointAction
+from django_app.core.models import Participant
 from shared.utils import format_points
 
 logger = logging.getLogger(__name__)
@@ -33,82 +30,27 @@ class PointService:
             Stats dict
         """
         try:
-            points_breakdown = await self._get_points_breakdown(participant.id)
+            # Denormalized counter lar - Point ustida SUM yo'q
+            referral_points = participant.referral_points + participant.premium_referral_points
+            other_points = participant.current_points - (
+                    referral_points +
+                    participant.channel_points +
+                    participant.premium_points
+            )
 
             return {
                 'total_points': participant.current_points,
                 'formatted_total': format_points(participant.current_points),
-                'referral_points': points_breakdown.get('referral', 0),
-                'channel_points': points_breakdown.get('channel_join', 0),
-                'premium_points': points_breakdown.get('premium_bonus', 0),
-                'other_points': points_breakdown.get('other', 0),
+                'referral_points': referral_points,
+                'channel_points': participant.channel_points,
+                'premium_points': participant.premium_points,
+                'other_points': max(0, other_points),
                 'has_premium': participant.is_premium
             }
         except Exception as e:
             logger.error(f"Get user stats error: {e}")
             return self._get_default_stats()
 
-    async def _get_points_breakdown(self, participant_id: int) -> Dict[str, int]:
-        """
-        Ballarni sabablarga ajratish (optimized single query)
-
-        Args:
-            participant_id: Participant ID
-
-        Returns:
-            Breakdown dict
-        """
-
-        @sync_to_async
-        def _get_breakdown():
-            try:
-                # Single query with conditional aggregation
-                points = Point.objects.filter(participant_id=participant_id)
-
-                breakdown = points.aggregate(
-                    referral_points=Coalesce(Sum(
-                        Case(
-                            When(reason__in=[PointAction.REFERRAL, PointAction.PREMIUM_REFERRAL], then='earned_points'),
-                            default=Value(0),
-                            output_field=IntegerField()
-                        )
-                    ), 0),
-                    channel_points=Coalesce(Sum(
-                        Case(
-                            When(reason=PointAction.CHANNEL_JOIN, then='earned_points'),
-                            default=Value(0),
-                            output_field=IntegerField()
-                        )
-                    ), 0),
-                    premium_points=Coalesce(Sum(
-                        Case(
-                            When(reason=PointAction.PREMIUM_USER, then='earned_points'),
-                            default=Value(0),
-                            output_field=IntegerField()
-                        )
-                    ), 0),
-                    total_points=Coalesce(Sum('earned_points'), 0)
-                )
-
-                other_points = breakdown['total_points'] - (
-                        breakdown['referral_points'] +
-                        breakdown['channel_points'] +
-                        breakdown['premium_points']
-                )
-
-                return {
-                    'referral': breakdown['referral_points'],
-                    'channel_join': breakdown['channel_points'],
-                    'premium_bonus': breakdown['premium_points'],
-                    'other': max(0, other_points)
-                }
-
-            except Exception as e:
-                logger.error(f"Get points breakdown error: {e}")
-                return {'referral': 0, 'channel_join': 0, 'premium_bonus': 0, 'other': 0}
-
-        return await _get_breakdown()
-
     def _get_default_stats(self) -> Dict[str, Any]:
         """Default stats"""
         return {
@@ -132,7 +74,7 @@ class PointService:
             Ranking info dict
         """
 
-        @sync_to_async
+        @db_sync_to_async
         def _get_ranking():
             try:
                 participant = Participant.objects.select_related('user').get(
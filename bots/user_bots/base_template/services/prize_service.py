@@ -5,7 +5,7 @@ Vazifasi: Konkurs sovrinlarini olish
 """
 import logging
 from typing import List, Dict, Any
-from asgiref.sync import sync_to_async
+from shared.db_executor import db_sync_to_async
 
 from django_app.core.models import Prize
 from shared.utils import get_prize_emoji
@@ -27,7 +27,7 @@ class PrizeService:
             Sovrinlar ro'yxati
         """
         try:
-            @sync_to_async
+            @db_sync_to_async
             def _get_prizes():
                 prizes = Prize.objects.filter(
                     competition__bot_id=self.bot_id
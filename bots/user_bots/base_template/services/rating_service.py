@@ -2,10 +2,17 @@
 """
 Rating Service - TOP 10 reyting
 USERNAME VA PROFIL LINK BILAN
+Redis ZSET (shared/leaderboard.py) tayyor bo'lsa undan o'qiladi, aks holda DB dan
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
-from asgiref.sync import sync_to_async
+from typing import Dict, Any, Optional, List, Tuple
+from shared import async_db
+from shared.db_executor import run_db
+
+from shared.constants import CACHE_KEYS, CACHE_TTL, LEADERBOARD_SETTINGS
+from shared.leaderboard import Leaderboard, competition_ranks
+from shared.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -13,40 +20,193 @@ logger = logging.getLogger(__name__)
 class RatingService:
     """Rating service"""
 
+    # Render qilinayotgan TOP bloklar (cache_key -> Future) - bir vaqtdagi so'rovlarni birlashtirish
+    _top_renders: Dict[str, asyncio.Future] = {}
+
     def __init__(self, bot_id: int):
         self.bot_id = bot_id
 
     async def get_rating_text(self, user_id: int) -> str:
         """Reyting textini olish - HTML format"""
         try:
-            top_10 = await self._get_top_10()
-            user_rank = await self._get_user_rank(user_id)
+            leaderboard = await self._get_leaderboard()
+
+            if leaderboard:
+                # O(log N) - Redis ZSET, TOP blok render cache dan
+                top_block, has_top = await self._get_top_block(leaderboard)
+                if not has_top:
+                    return top_block
+                return top_block + self._format_user_rank_line(leaderboard.rank(user_id))
+
+            top_10, user_rank = await asyncio.gather(self._get_top_10(), self._get_user_rank(user_id))
 
             return self._format_rating(top_10, user_rank, user_id)
         except Exception as e:
             logger.error(f"Get rating error: {e}")
             return "🏆 Reyting yuklanmadi. Keyinroq urinib ko'ring."
 
-    @sync_to_async
-    def _get_top_10(self) -> List[Dict]:
-        """TOP 10 ni olish"""
+    async def _get_leaderboard(self) -> Optional[Leaderboard]:
+        """
+        Tayyor leaderboard ni olish
+
+        ZSET hali qurilmagan bo'lsa fonda rebuild ishga tushiriladi va None qaytadi
+        (shu so'rov DB dan xizmat qilinadi).
+        """
+        try:
+            from bots.user_bots.base_template.services.competition_service import CompetitionService
+            settings = await CompetitionService().get_competition_settings(self.bot_id)
+            if not settings or not settings.get('id'):
+                return None
+
+            leaderboard = Leaderboard(settings['id'])
+            if leaderboard.is_ready():
+                return leaderboard
+
+            asyncio.ensure_future(run_db(leaderboard.try_rebuild))
+            return None
+        except Exception as e:
+            logger.error(f"Get leaderboard error: {e}")
+            return None
+
+    async def _get_top_block(self, leaderboard: Leaderboard) -> Tuple[str, bool]:
+        """
+        Render qilingan TOP 10 blok - konkurs va TOP versiyasi bo'yicha cache
+
+        Bir xil versiya uchun parallel so'rovlar bitta render ga birlashadi.
+
+        Returns:
+            (blok matni, TOP bo'sh emasmi)
+        """
+        top, version = leaderboard.top_with_version(10)
+        if not top:
+            return self._format_top_block([]), False
+
+        cache_key = CACHE_KEYS['rating_top'].format(competition_id=leaderboard.competition_id, version=version)
+
+        if redis_client.is_connected():
+            try:
+                cached = redis_client.client.get(cache_key)
+                if cached:
+                    return cached, True
+            except Exception as e:
+                logger.error(f"Get top block cache error: {e}")
+
+        render = self._top_renders.get(cache_key)
+        if render is None:
+            render = asyncio.ensure_future(self._render_top_block(top, cache_key))
+            self._top_renders[cache_key] = render
+            render.add_done_callback(lambda _: self._top_renders.pop(cache_key, None))
+
+        return await asyncio.shield(render), True
+
+    async def _render_top_block(self, top: List[Tuple[int, int]], cache_key: str) -> str:
+        """TOP blokni render qilish va Redis ga saqlash"""
+        top_10 = await self._with_profiles(top, competition_ranks([points for _, points in top], 0, 1))
+        block = self._format_top_block(top_10)
+
+        if redis_client.is_connected():
+            try:
+                redis_client.client.set(cache_key, block, ex=CACHE_TTL['rating_top'])
+            except Exception as e:
+                logger.error(f"Set top block cache error: {e}")
+
+        return block
+
+    async def get_page(self, user_id: int, page: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Reyting sahifasi - faqat ZSET dan (har so'rov O(log N + page_size))
+
+        Args:
+            user_id: Telegram user ID
+            page: Sahifa raqami (0 dan). None - foydalanuvchi atrofidagilar
+
+        Returns:
+            {'text', 'page', 'total_pages'} yoki None (leaderboard hali tayyor emas)
+        """
+        try:
+            leaderboard = await self._get_leaderboard()
+            if not leaderboard:
+                return None
+
+            page_size = LEADERBOARD_SETTINGS['page_size']
+            total_pages = max(1, -(-leaderboard.count() // page_size))
+            user_rank = leaderboard.rank(user_id)
+
+            if page is None:
+                position = leaderboard.position(user_id)
+                if position is None:
+                    # Reytingda yo'q - TOP sahifani ko'rsatamiz
+                    page = 0
+                else:
+                    radius = LEADERBOARD_SETTINGS['around_radius']
+                    start = max(0, position - radius)
+                    rows = await self._with_profiles(*leaderboard.ranked_range(start, position + radius))
+                    text = self._format_page(
+                        "📍 <b>Sizning atrofingiz</b>", rows, user_rank, user_id
+                    )
+                    return {'text': text, 'page': position // page_size, 'total_pages': total_pages}
+
+            page = min(max(0, page), total_pages - 1)
+            start = page * page_size
+            rows = await self._with_profiles(*leaderboard.ranked_range(start, start + page_size - 1))
+            text = self._format_page(
+                f"🏆 <b>Reyting</b> ({page + 1}/{total_pages})", rows, user_rank, user_id
+            )
+            return {'text': text, 'page': page, 'total_pages': total_pages}
+        except Exception as e:
+            logger.error(f"Get rating page error: {e}")
+            return None
+
+    async def _with_profiles(self, rows: List[Tuple[int, int]], ranks: List[int]) -> List[Dict]:
+        """ZSET qatorlariga o'rin va ism/username qo'shish - bitta unique lookup bilan"""
+        if not rows:
+            return []
+
+        from django_app.core.models import User
+        users = await async_db.fetch_all(User.objects.filter(
+            telegram_id__in=[telegram_id for telegram_id, _ in rows]
+        ).values_list('telegram_id', 'username', 'first_name', 'last_name'))
+        profiles = {
+            telegram_id: {'username': username, 'first_name': first_name, 'last_name': last_name}
+            for telegram_id, username, first_name, last_name in users
+        }
+
+        result = []
+        for rank, (telegram_id, points) in zip(ranks, rows):
+            profile = profiles.get(telegram_id, {})
+            result.append({
+                'rank': rank,
+                'telegram_id': telegram_id,
+                'username': profile.get('username') or '',
+                'first_name': profile.get('first_name') or '',
+                'last_name': profile.get('last_name') or '',
+                'points': points
+            })
+
+        return result
+
+    async def _get_top_10(self) -> List[Dict]:
+        """TOP 10 ni olish (ZSET tayyor bo'lmaganda - DB dan)"""
         try:
             from django_app.core.models import Participant
 
-            participants = Participant.objects.filter(
+            rows = await async_db.fetch_all(Participant.objects.filter(
                 competition__bot_id=self.bot_id,
                 is_participant=True
-            ).select_related('user').order_by('-current_points')[:10]
+            ).order_by('-current_points').values_list(
+                'user__telegram_id', 'user__username', 'user__first_name', 'user__last_name', 'current_points'
+            )[:10])
 
             result = []
-            for i, p in enumerate(participants, 1):
+            ranks = competition_ranks([row[-1] for row in rows], 0, 1)
+            for rank, (telegram_id, username, first_name, last_name, points) in zip(ranks, rows):
                 result.append({
-                    'rank': i,
-                    'telegram_id': p.user.telegram_id,
-                    'username': p.user.username or '',
-                    'first_name': p.user.first_name or '',
-                    'last_name': p.user.last_name or '',
-                    'points': p.current_points
+                    'rank': rank,
+                    'telegram_id': telegram_id,
+                    'username': username or '',
+                    'first_name': first_name or '',
+                    'last_name': last_name or '',
+                    'points': points
                 })
 
             return result
@@ -54,30 +214,24 @@ class RatingService:
             logger.error(f"Get top 10 error: {e}")
             return []
 
-    @sync_to_async
-    def _get_user_rank(self, user_id: int) -> Optional[Dict]:
-        """User rankini olish"""
+    async def _get_user_rank(self, user_id: int) -> Optional[Dict]:
+        """User rankini olish (ZSET tayyor bo'lmaganda - DB dan)"""
         try:
             from django_app.core.models import Participant
 
-            participant = Participant.objects.filter(
-                competition__bot_id=self.bot_id,
-                user__telegram_id=user_id,
-                is_participant=True
-            ).first()
+            participants = Participant.objects.filter(competition__bot_id=self.bot_id, is_participant=True)
 
-            if not participant:
+            row = await async_db.fetch_one(
+                participants.filter(user__telegram_id=user_id).values_list('current_points')
+            )
+            if not row:
                 return None
 
-            higher_count = Participant.objects.filter(
-                competition__bot_id=self.bot_id,
-                is_participant=True,
-                current_points__gt=participant.current_points
-            ).count()
+            higher_count = await async_db.fetch_count(participants.filter(current_points__gt=row[0]))
 
             return {
                 'rank': higher_count + 1,
-                'points': participant.current_points
+                'points': row[0]
             }
         except Exception as e:
             logger.error(f"Get user rank error: {e}")
@@ -90,49 +244,81 @@ class RatingService:
         Username bo'lsa: Ism (@username) - clickable link
         Username yo'q bo'lsa: Ism (tg://user?id=123456) - profil link
         """
+        text = self._format_top_block(top_10)
         if not top_10:
-            return "🏆 <b>TOP 10 Reyting</b>\n\nHozircha hech kim ball to'plamagan.\n🚀 Birinchi bo'ling!"
+            return text
 
-        emojis = {1: "🥇", 2: "🥈", 3: "🥉", 4: "4️⃣", 5: "5️⃣", 6: "6️⃣", 7: "7️⃣", 8: "8️⃣", 9: "9️⃣", 10: "🔟"}
+        return text + self._format_user_rank_line(user_rank)
+
+    def _format_top_block(self, top_10: List[Dict]) -> str:
+        """TOP 10 blok - barcha foydalanuvchilar uchun bir xil qism"""
+        if not top_10:
+            return "🏆 <b>TOP 10 Reyting</b>\n\nHozircha hech kim ball to'plamagan.\n🚀 Birinchi bo'ling!"
 
         text = "🏆 <b>TOP 10 Reyting</b> 🏆\n\n"
 
         for p in top_10:
-            rank = p['rank']
-            emoji = emojis.get(rank, f"{rank}.")
+            text += self._format_participant_line(p)
 
-            # Ism yaratish
-            first_name = p['first_name'] or ''
-            last_name = p['last_name'] or ''
-            full_name = f"{first_name} {last_name}".strip()
+        text += "\n" + "─" * 25 + "\n"
 
-            if not full_name:
-                full_name = "Foydalanuvchi"
+        return text
 
-            # Link yaratish
-            username = p['username']
-            telegram_id = p['telegram_id']
+    def _format_page(self, title: str, rows: List[Dict], user_rank: Optional[Dict], user_id: int) -> str:
+        """Reyting sahifasini formatlash - _format_rating bilan bir xil uslubda"""
+        if not rows:
+            return f"{title}\n\nHozircha hech kim ball to'plamagan.\n🚀 Birinchi bo'ling!"
 
-            if username:
-                # Username bor - @username formatda link
-                display_name = f'<a href="https://t.me/{username}">{full_name}</a> (@{username})'
-            else:
-                # Username yo'q - tg://user?id=XXX formatda link
-                display_name = f'<a href="tg://user?id={telegram_id}">{full_name}</a>'
+        text = f"{title}\n\n"
 
-            text += f"{emoji} <b>{rank}-o'rin:</b> {display_name} - {p['points']:,} ball\n"
+        for p in rows:
+            text += self._format_participant_line(p, highlight=p['telegram_id'] == user_id)
 
         text += "\n" + "─" * 25 + "\n"
+        text += self._format_user_rank_line(user_rank)
+
+        return text
+
+    def _format_participant_line(self, p: Dict, highlight: bool = False) -> str:
+        """Bitta ishtirokchi qatori"""
+        emojis = {1: "🥇", 2: "🥈", 3: "🥉", 4: "4️⃣", 5: "5️⃣", 6: "6️⃣", 7: "7️⃣", 8: "8️⃣", 9: "9️⃣", 10: "🔟"}
 
-        if user_rank:
-            if user_rank['rank'] <= 10:
-                text += f"✨ Siz <b>{user_rank['rank']}-o'rindasiz</b> ({user_rank['points']:,} ball)"
-            else:
-                text += f"📊 Sizning o'rningiz: <b>{user_rank['rank']}</b> ({user_rank['points']:,} ball)"
+        rank = p['rank']
+        emoji = emojis.get(rank, f"{rank}.")
+
+        # Ism yaratish
+        first_name = p['first_name'] or ''
+        last_name = p['last_name'] or ''
+        full_name = f"{first_name} {last_name}".strip()
+
+        if not full_name:
+            full_name = "Foydalanuvchi"
+
+        # Link yaratish
+        username = p['username']
+        telegram_id = p['telegram_id']
+
+        if username:
+            # Username bor - @username formatda link
+            display_name = f'<a href="https://t.me/{username}">{full_name}</a> (@{username})'
         else:
-            text += "❌ Siz hali ro'yxatdan o'tmagan"
+            # Username yo'q - tg://user?id=XXX formatda link
+            display_name = f'<a href="tg://user?id={telegram_id}">{full_name}</a>'
 
-        return text
+        line = f"{emoji} <b>{rank}-o'rin:</b> {display_name} - {p['points']:,} ball"
+        if highlight:
+            line = f"👉 {line}"
+
+        return line + "\n"
+
+    def _format_user_rank_line(self, user_rank: Optional[Dict]) -> str:
+        """Foydalanuvchining o'z o'rni"""
+        if not user_rank:
+            return "❌ Siz hali ro'yxatdan o'tmagan"
+
+        if user_rank['rank'] <= 10:
+            return f"✨ Siz <b>{user_rank['rank']}-o'rindasiz</b> ({user_rank['points']:,} ball)"
+        return f"📊 Sizning o'rningiz: <b>{user_rank['rank']}</b> ({user_rank['points']:,} ball)"
 
 # # bots/user_bots/base_template/services/rating_service.py
 # """
@@ -0,0 +1,169 @@
+# bots/user_bots/base_template/services/registration_batcher.py
+"""
+Registration Batcher - group-commit ro'yxatdan o'tish
+Vazifasi: Launch paytidagi /start to'lqinida har bir foydalanuvchi uchun alohida
+transaction ochmaslik
+
+Kanal tekshiruvidan o'tgan so'rovlar qisqa buferga tushadi. Bufer `size` ga yetganda
+yoki birinchi so'rovdan `latency_ms` o'tganda bitta transaction da commit qilinadi:
+har bir foydalanuvchi o'z savepoint ida (bittasining xatosi qolganlarini buzmaydi).
+Foydalanuvchi natijani (va welcome xabarni) faqat commit dan keyin oladi.
+
+Bufer jarayon ichida (process-local) - har bir worker o'z batch larini yig'adi.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from django.db import transaction
+
+from fastapi_app.monitoring import MetricsCollector
+from shared.constants import REGISTRATION_BATCH_SETTINGS
+from shared.db_executor import run_db
+
+logger = logging.getLogger(__name__)
+
+
+class RegistrationBatcher:
+    """Bitta bot uchun ro'yxatdan o'tish buferi"""
+
+    def __init__(self, bot_id: int):
+        self.bot_id = bot_id
+        self.size = 100
+        self.latency = 0.2
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._commits: Set[asyncio.Task] = set()
+        self.stats = {
+            'batches': 0,
+            'registrations': 0,
+            'last_size': 0,
+            'avg_fill': 0.0,
+            'avg_commit_ms': 0.0,
+            'max_commit_ms': 0.0
+        }
+
+    def configure(self, batch_settings: Dict[str, Any]):
+        """Bot sozlamasidan size / latency (global chegaralar bilan)"""
+        self.size = max(1, min(int(batch_settings.get('size') or 1), REGISTRATION_BATCH_SETTINGS['max_size']))
+        latency_ms = min(int(batch_settings.get('latency_ms') or 0), REGISTRATION_BATCH_SETTINGS['max_latency_ms'])
+        self.latency = max(latency_ms, 0) / 1000
+
+    async def submit(
+            self,
+            user_data: Dict[str, Any],
+            referral_code: Optional[str],
+            settings: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Buferga qo'shish va batch commit bo'lishini kutish"""
+        self.configure(settings.get('registration_batch', {}))
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_data, referral_code, settings, future))
+
+        if len(self._pending) >= self.size:
+            self._start_commit()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.latency, self._start_commit)
+
+        return await future
+
+    async def flush(self):
+        """Buferdagini darhol commit qilish va barcha commit larni kutish (shutdown)"""
+        self._start_commit()
+        if self._commits:
+            await asyncio.gather(*self._commits, return_exceptions=True)
+
+    def _start_commit(self):
+        """Buferni ajratib olib, commit ni fonda boshlash"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._commit(batch))
+        self._commits.add(task)
+        task.add_done_callback(self._commits.discard)
+
+    async def _commit(self, batch: List[tuple]):
+        """Batch ni commit qilish va har bir kutayotgan so'rovga natija berish"""
+        started = time.monotonic()
+        try:
+            results = await run_db(self._commit_sync, batch)
+        except Exception as e:
+            logger.error(f"Registration batch commit error: bot={self.bot_id}, size={len(batch)}, error: {e}")
+            results = [{"success": False, "error": str(e)}] * len(batch)
+        duration = time.monotonic() - started
+
+        self._record(len(batch), duration)
+
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _commit_sync(self, batch: List[tuple]) -> List[Dict[str, Any]]:
+        """Bitta transaction, har bir foydalanuvchi alohida savepoint da"""
+        from bots.user_bots.base_template.services.registration_service import RegistrationService
+
+        service = RegistrationService(self.bot_id)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+
+        # telegram_id tartibida - parallel batch lar bir xil qatorlarni teskari tartibda lock qilmasin
+        order = sorted(range(len(batch)), key=lambda i: batch[i][0].get("telegram_id") or 0)
+
+        with transaction.atomic():
+            for i in order:
+                user_data, referral_code, settings, _ = batch[i]
+                try:
+                    with transaction.atomic():
+                        results[i] = service.register_in_transaction(user_data, referral_code, settings)
+                except Exception as e:
+                    logger.error(f"Batched registration error: user={user_data.get('telegram_id')}, error: {e}")
+                    results[i] = {"success": False, "error": str(e)}
+
+        return results
+
+    def _record(self, size: int, duration: float):
+        """Batch to'lishi va commit vaqti metrikalari"""
+        stats = self.stats
+        fill = size / self.size
+        commit_ms = duration * 1000
+
+        stats['batches'] += 1
+        stats['registrations'] += size
+        stats['last_size'] = size
+        stats['avg_fill'] += (fill - stats['avg_fill']) / stats['batches']
+        stats['avg_commit_ms'] += (commit_ms - stats['avg_commit_ms']) / stats['batches']
+        stats['max_commit_ms'] = max(stats['max_commit_ms'], commit_ms)
+
+        MetricsCollector.record_registration_batch(self.bot_id, size, self.size, duration)
+
+        logger.info(f"Registration batch committed: bot={self.bot_id}, size={size}/{self.size}, {commit_ms:.1f}ms")
+
+
+_batchers: Dict[int, RegistrationBatcher] = {}
+
+
+def get_batcher(bot_id: int) -> RegistrationBatcher:
+    """Bot uchun (jarayon ichida yagona) batcher"""
+    batcher = _batchers.get(bot_id)
+    if batcher is None:
+        batcher = _batchers[bot_id] = RegistrationBatcher(bot_id)
+    return batcher
+
+
+def get_stats(bot_id: int) -> Optional[Dict[str, Any]]:
+    """Bot batcher metrikalari (batch ishlatilmagan bo'lsa None)"""
+    batcher = _batchers.get(bot_id)
+    return dict(batcher.stats) if batcher else None
+
+
+async def flush_all():
+    """Barcha bot buferlarini commit qilish (shutdown)"""
+    for batcher in list(_batchers.values()):
+        await batcher.flush()
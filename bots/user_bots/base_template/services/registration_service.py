@@ -4,9 +4,15 @@ Registration Service - Foydalanuvchini ro'yxatdan o'tkazish
 MUHIM: User faqat barcha kanallarga qo'shilgandan keyin DB ga yoziladi
 """
 import logging
+import secrets
+import string
 from typing import Dict, Any, Optional
-from asgiref.sync import sync_to_async
-from django.db import transaction
+from shared.db_executor import db_sync_to_async
+from django.db import connection, transaction
+
+from shared.leaderboard import on_participant_registered
+from shared.point_ledger import award
+from shared.point_rules import channel_join_points, referral_award
 
 logger = logging.getLogger(__name__)
 
@@ -41,12 +47,17 @@ class RegistrationService:
             }
         """
         try:
+            if (settings or {}).get("registration_batch", {}).get("enabled"):
+                # Group-commit: boshqa ro'yxatdan o'tishlar bilan bitta transaction da
+                from bots.user_bots.base_template.services.registration_batcher import get_batcher
+                return await get_batcher(self.bot_id).submit(user_data, referral_code, settings)
+
             return await self._register_atomic(user_data, referral_code, settings)
         except Exception as e:
             logger.error(f"Registration error: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
 
-    @sync_to_async
+    @db_sync_to_async
     @transaction.atomic
     def _register_atomic(
             self,
@@ -55,146 +66,122 @@ class RegistrationService:
             settings: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Atomic transaction ichida ro'yxatdan o'tkazish"""
-        from django_app.core.models import User, Participant, Competition, Referral, Point
-        from django_app.core.models.pointrule import PointAction
-        import secrets
-        import string
+        return self.register_in_transaction(user_data, referral_code, settings)
 
-        telegram_id = user_data.get("telegram_id")
-
-        # Competition olish
-        try:
-            competition = Competition.objects.get(bot_id=self.bot_id)
-        except Competition.DoesNotExist:
-            logger.error(f"Competition not found for bot {self.bot_id}")
-            return {"success": False, "error": "Competition not found"}
-
-        # User olish yoki yaratish
-        user, user_created = User.objects.get_or_create(
-            telegram_id=telegram_id,
-            defaults={
-                "username": user_data.get("username", "")[:255],
-                "first_name": user_data.get("first_name", "")[:64],
-                "last_name": user_data.get("last_name", "")[:64],
-                "is_premium": user_data.get("is_premium", False)
-            }
-        )
+    def register_in_transaction(
+            self,
+            user_data: Dict[str, Any],
+            referral_code: Optional[str],
+            settings: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Joriy transaction ichida ro'yxatdan o'tkazish (sync)
 
-        # User mavjud bo'lsa yangilash
-        if not user_created:
-            user.username = user_data.get("username", "") or user.username
-            user.first_name = user_data.get("first_name", "") or user.first_name
-            user.last_name = user_data.get("last_name", "") or user.last_name
-            user.is_premium = user_data.get("is_premium", False)
-            user.save()
-
-        # Participant mavjudmi tekshirish
-        existing = Participant.objects.filter(user=user, competition=competition).first()
-        if existing and existing.is_participant:
-            return {
-                "success": True,
-                "participant": existing,
-                "already_registered": True,
-                "channel_points": 0,
-                "referral_bonus": 0
-            }
+        Yangi ishtirokchi bitta SQL statement da yoziladi (REGISTER_SQL). Qo'shimcha
+        query faqat allaqachon ro'yxatdan o'tgan yoki referral kod to'qnashgan holda.
+        """
+        from django_app.core.models import Competition, Participant, User
+        from django_app.core.models.pointrule import PointAction
 
-        # Yangi referral kod yaratish
-        def generate_code(length=8):
-            alphabet = string.ascii_letters + string.digits
-            return ''.join(secrets.choice(alphabet) for _ in range(length))
+        telegram_id = user_data.get("telegram_id")
+        is_premium = bool(user_data.get("is_premium", False))
 
-        new_referral_code = generate_code()
-        while Participant.objects.filter(competition=competition, referral_code=new_referral_code).exists():
-            new_referral_code = generate_code()
+        competition_id = settings.get("id")
+        if not competition_id:
+            competition_id = Competition.objects.filter(bot_id=self.bot_id).values_list('id', flat=True).first()
+            if not competition_id:
+                logger.error(f"Competition not found for bot {self.bot_id}")
+                return {"success": False, "error": "Competition not found"}
 
-        # Participant yaratish
-        participant = Participant.objects.create(
-            user=user,
-            competition=competition,
-            referral_code=new_referral_code,
-            current_points=0,
-            is_participant=True
-        )
-
-        # Point rules
+        # Point rules (formula - shared/point_rules.py)
         point_rules = settings.get("point_rules", {})
-        channel_points_per = point_rules.get("channel_join", 1)
-        referral_points = point_rules.get("referral", 5)
-        premium_referral_points = point_rules.get("premium_referral", 10)
-
-        total_points = 0
-        channel_points_earned = 0
-        referral_bonus = 0
 
         # 1. KANAL BALLARI
         channels = settings.get("channels", [])
-        if channels:
-            channel_points_earned = len(channels) * channel_points_per
-            total_points += channel_points_earned
-
-            # Point yozuvi
-            Point.objects.create(
-                participant=participant,
-                earned_points=channel_points_earned,
-                reason=PointAction.CHANNEL_JOIN,
-                description=f"{len(channels)} kanal uchun"
-            )
-
-        # 2. REFERRAL BALL (taklif qilingan odamga bonus)
-        # Premium user bo'lsa ko'proq ball
-        if user.is_premium:
-            referral_bonus = premium_referral_points
-        else:
-            referral_bonus = referral_points
-
-        # Referral bonus - o'ziga
-        # (Ixtiyoriy - taklif qilingan odamga ham ball berish)
-        # total_points += referral_bonus
-        # Point.objects.create(
-        #     participant=participant,
-        #     earned_points=referral_bonus,
-        #     reason=PointAction.REFERRAL,
-        #     description="Taklif orqali kirdi"
-        # )
+        channel_points_earned = channel_join_points(point_rules, len(channels), is_premium)
 
+        # 2. REFERRAL BALL (taklif qilingan odamga bonus) - hozircha faqat ko'rsatiladi
         # 3. REFERRER GA BALL (taklif qilgan odamga)
-        if referral_code:
-            referrer = Participant.objects.filter(
-                competition=competition,
-                referral_code=referral_code,
-                is_participant=True
-            ).first()
-
-            if referrer and referrer.user.telegram_id != telegram_id:
-                # Referral yaratish
-                Referral.objects.get_or_create(
-                    referrer=referrer.user,
-                    referred=user,
-                    competition=competition
-                )
-
-                # Referrer ga ball
-                points_for_referrer = premium_referral_points if user.is_premium else referral_points
-
-                referrer.current_points += points_for_referrer
-                referrer.save()
+        points_for_referrer, referrer_reason = referral_award(point_rules, is_premium)
+        referral_bonus = points_for_referrer
+
+        params = {
+            "telegram_id": telegram_id,
+            "username": (user_data.get("username") or "")[:255],
+            "first_name": (user_data.get("first_name") or "")[:64],
+            "last_name": (user_data.get("last_name") or "")[:64],
+            "is_premium": is_premium,
+            "competition_id": competition_id,
+            "channel_points": channel_points_earned,
+            "channel_reason": PointAction.CHANNEL_JOIN,
+            "channel_description": f"{len(channels)} kanal uchun",
+            "referral_code": referral_code or None,
+        }
 
-                Point.objects.create(
-                    participant=referrer,
-                    earned_points=points_for_referrer,
-                    reason=PointAction.REFERRAL,
-                    description=f"@{user.username or telegram_id} ni taklif qildi"
-                )
+        row = None
+        for _ in range(3):
+            params["new_code"] = _generate_referral_code()
+            with connection.cursor() as cursor:
+                cursor.execute(REGISTER_SQL, params)
+                row = cursor.fetchone()
+            if row[1]:
+                break
+
+            # Participant yozilmadi - allaqachon ro'yxatdan o'tgan yoki kod to'qnashdi
+            existing = Participant.objects.select_related('user').filter(
+                user_id=row[0], competition_id=competition_id
+            ).first()
+            if existing and existing.is_participant:
+                return {
+                    "success": True,
+                    "participant": existing,
+                    "already_registered": True,
+                    "channel_points": 0,
+                    "referral_bonus": 0
+                }
+        else:
+            return {"success": False, "error": "Referral code generation failed"}
+
+        user_pk, participant_id, current_points, participant_code, channel_points_earned, referrer_id, \
+            referrer_telegram_id, referrals_created = row
+
+        if referrer_id:
+            # Write-behind: mashhur referrer qatori lock ga aylanmasligi uchun
+            award(
+                referrer_id,
+                competition_id,
+                referrer_telegram_id,
+                points_for_referrer,
+                referrer_reason,
+                description=f"@{params['username'] or telegram_id} ni taklif qildi",
+                source_ref=f"referred:{telegram_id}",
+                referrals=referrals_created
+            )
+            logger.info(
+                f"Referrer {referrer_telegram_id} got +{points_for_referrer} points for referring {telegram_id}")
 
-                logger.info(
-                    f"Referrer {referrer.user.telegram_id} got +{points_for_referrer} points for referring {telegram_id}")
+        on_participant_registered(competition_id, telegram_id, current_points)
 
-        # Participant ballarini yangilash
-        participant.current_points = total_points
-        participant.save()
+        logger.info(f"User {telegram_id} registered with {current_points} points")
 
-        logger.info(f"User {telegram_id} registered with {total_points} points")
+        # DB ga qayta bormaslik uchun xotirada yig'amiz
+        user = User(
+            id=user_pk,
+            telegram_id=telegram_id,
+            username=params["username"],
+            first_name=params["first_name"],
+            last_name=params["last_name"],
+            is_premium=is_premium
+        )
+        participant = Participant(
+            id=participant_id,
+            user=user,
+            competition_id=competition_id,
+            is_participant=True,
+            current_points=current_points,
+            channel_points=channel_points_earned,
+            referral_code=participant_code
+        )
 
         return {
             "success": True,
@@ -205,6 +192,114 @@ class RegistrationService:
         }
 
 
+def _generate_referral_code(length: int = 8) -> str:
+    """Tasodifiy referral kod - to'qnashuv unique constraint da aniqlanadi"""
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+# Ro'yxatdan o'tkazish - bitta statement:
+#   u      - user upsert (telegram_id bo'yicha)
+#   cand   - oldin yaratilgan, hali is_participant=False qator (lock). Referral kodi yo'q va
+#            new_code band bo'lsa olinmaydi - UPDATE unique constraint ga urilmasin, p bo'sh
+#            qaytadi va Python yangi kod bilan qayta urinadi
+#   pt_upd - cand uchun kanal ballari Point i (source_ref='registration')
+#   upd    - cand ni faollashtirish; ball faqat pt_upd qator qo'shgan bo'lsa (qayta qo'shilishda
+#            registration Point i allaqachon bor - ikkinchi marta berilmaydi)
+#   ins    - yangi participant (to'qnashuvda - user+competition yoki referral kod - hech narsa)
+#   pt     - yangi participant kanal ballari Point i
+#   r      - referrer (kod bo'yicha), ref - Referral yozuvi (yaratilgani referral_count uchun qaytadi)
+# p bo'sh qaytsa: allaqachon ro'yxatdan o'tgan yoki referral kod band.
+REGISTER_SQL = """
+WITH u AS (
+    INSERT INTO core_user (telegram_id, username, first_name, last_name, is_premium, role, joined_at)
+    VALUES (%(telegram_id)s, %(username)s, %(first_name)s, %(last_name)s, %(is_premium)s, 'participant', now())
+    ON CONFLICT (telegram_id) DO UPDATE SET
+        username = COALESCE(NULLIF(EXCLUDED.username, ''), core_user.username),
+        first_name = COALESCE(NULLIF(EXCLUDED.first_name, ''), core_user.first_name),
+        last_name = COALESCE(NULLIF(EXCLUDED.last_name, ''), core_user.last_name),
+        is_premium = EXCLUDED.is_premium
+    RETURNING id
+),
+cand AS (
+    SELECT cp.id
+    FROM core_participant cp
+    WHERE cp.user_id = (SELECT id FROM u)
+      AND cp.competition_id = %(competition_id)s
+      AND NOT cp.is_participant
+      AND (cp.referral_code IS NOT NULL OR NOT EXISTS (
+          SELECT 1 FROM core_participant taken
+          WHERE taken.competition_id = %(competition_id)s AND taken.referral_code = %(new_code)s
+      ))
+    FOR UPDATE
+),
+pt_upd AS (
+    INSERT INTO core_point (participant_id, earned_points, reason, description, source_ref, created_at, updated_at)
+    SELECT cand.id, %(channel_points)s, %(channel_reason)s, %(channel_description)s, 'registration', now(), now()
+    FROM cand
+    WHERE %(channel_points)s > 0
+    ON CONFLICT DO NOTHING
+    RETURNING participant_id
+),
+upd AS (
+    UPDATE core_participant SET
+        is_participant = true,
+        current_points = current_points + (SELECT COUNT(*) FROM pt_upd) * %(channel_points)s,
+        channel_points = channel_points + (SELECT COUNT(*) FROM pt_upd) * %(channel_points)s,
+        referral_code = COALESCE(referral_code, %(new_code)s),
+        updated_at = now()
+    WHERE id = (SELECT id FROM cand)
+    RETURNING id, current_points, referral_code, (SELECT COUNT(*) FROM pt_upd) * %(channel_points)s AS added
+),
+ins AS (
+    INSERT INTO core_participant (
+        user_id, competition_id, is_participant, current_points, referral_code, channels_joined, is_blocked,
+        channel_points, referral_points, premium_referral_points, premium_points, referral_count,
+        created_at, updated_at
+    )
+    SELECT u.id, %(competition_id)s, true, %(channel_points)s, %(new_code)s, '[]'::jsonb, false,
+           %(channel_points)s, 0, 0, 0, 0, now(), now()
+    FROM u
+    WHERE NOT EXISTS (SELECT 1 FROM upd)
+    ON CONFLICT DO NOTHING
+    RETURNING id, current_points, referral_code, channel_points AS added
+),
+p AS (
+    SELECT * FROM upd
+    UNION ALL
+    SELECT * FROM ins
+),
+pt AS (
+    INSERT INTO core_point (participant_id, earned_points, reason, description, source_ref, created_at, updated_at)
+    SELECT ins.id, %(channel_points)s, %(channel_reason)s, %(channel_description)s, 'registration', now(), now()
+    FROM ins
+    WHERE %(channel_points)s > 0
+),
+r AS (
+    SELECT rp.id, rp.user_id, ru.telegram_id
+    FROM core_participant rp
+    JOIN core_user ru ON ru.id = rp.user_id
+    WHERE rp.competition_id = %(competition_id)s
+      AND rp.referral_code = %(referral_code)s
+      AND rp.is_participant
+      AND ru.telegram_id <> %(telegram_id)s
+      AND EXISTS (SELECT 1 FROM p)
+),
+ref AS (
+    INSERT INTO core_referral (referrer_id, referred_id, competition_id, created_at, updated_at)
+    SELECT r.user_id, u.id, %(competition_id)s, now(), now()
+    FROM r, u
+    ON CONFLICT DO NOTHING
+    RETURNING id
+)
+SELECT (SELECT id FROM u), p.id, p.current_points, p.referral_code, p.added, r.id, r.telegram_id,
+       (SELECT COUNT(*) FROM ref)
+FROM (SELECT 1) AS one
+LEFT JOIN p ON true
+LEFT JOIN r ON true
+"""
+
+
 # # bots/user_bots/base_template/services/registration_service.py
 # """
 # Registration Service - Foydalanuvchini ro'yxatdan o'tkazish
@@ -7,7 +7,7 @@ import logging
 import secrets
 import string
 from typing import Dict, Any, Optional, List, Tuple
-from asgiref.sync import sync_to_async
+from shared.db_executor import db_sync_to_async
 from django.db import transaction
 from django.utils import timezone
 
@@ -36,7 +36,7 @@ class UserService:
             Participant yoki None
         """
 
-        @sync_to_async
+        @db_sync_to_async
         def _get_participant():
             try:
                 return Participant.objects.select_related('user', 'competition').get(
@@ -64,7 +64,7 @@ class UserService:
             Participant yoki None
         """
 
-        @sync_to_async
+        @db_sync_to_async
         def _get_participant():
             try:
                 return Participant.objects.select_related('user', 'competition').get(
@@ -93,7 +93,7 @@ class UserService:
             Tuple (Participant, created)
         """
 
-        @sync_to_async
+        @db_sync_to_async
         @transaction.atomic
         def _create_participant():
             try:
@@ -165,7 +165,7 @@ class UserService:
             Referral yoki None
         """
 
-        @sync_to_async
+        @db_sync_to_async
         @transaction.atomic
         def _create_referral():
             try:
@@ -197,7 +197,7 @@ class UserService:
     async def get_user_referrals(self, user_id: int, bot_id: int) -> List[Dict[str, Any]]:
         """Foydalanuvchi referrallarini olish"""
 
-        @sync_to_async
+        @db_sync_to_async
         def _get_referrals():
             try:
                 referrals = Referral.objects.filter(
@@ -224,7 +224,7 @@ class UserService:
     async def get_participant_stats(self, participant_id: int) -> Dict[str, Any]:
         """Participant statistikasini olish"""
 
-        @sync_to_async
+        @db_sync_to_async
         def _get_stats():
             try:
                 participant = Participant.objects.select_related('user').get(id=participant_id)
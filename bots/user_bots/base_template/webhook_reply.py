@@ -0,0 +1,178 @@
+# bots/user_bots/base_template/webhook_reply.py
+"""
+Webhook reply - oddiy update larga webhook javobining o'zida javob berish
+Vazifasi: Jarayon xotirasidagi cache lardan hal bo'ladigan update lar uchun alohida
+Bot API so'rovini (va uning roundtrip ini) tejash
+
+Telegram webhook javobi sifatida bitta Bot API metodini qabul qiladi:
+    {"method": "sendMessage", "chat_id": ..., "text": ...}
+Javobda natija qaytmaydi, shuning uchun faqat natijasi kerak bo'lmagan va tarmoq/DB siz
+tuziladigan javoblar:
+    - callback_query (check_subscription / rating dan tashqari) - answerCallbackQuery
+    - "Shartlar" / "Sovg'alar" - render cache dagi tayyor javob
+    - "Konkursda qatnashish" - ishtirokchining cache dagi taklif posti (rasm bo'lsa file_id bilan),
+      faqat ishtirokchi yaqinda tekshirilgan bo'lsa (shared/referral_posts.py)
+Qolgan hammasi odatdagidek BotProcessor ga (fonda) boradi.
+
+Sozlamalar xotiradan olinadi: BotProcessor har yuklaganda remember_settings() chaqiradi,
+yozuv WEBHOOK_REPLY_SETTINGS['settings_ttl'] sekund yashaydi. Har update da bitta Redis
+MGET: bot_settings_version (bot faol va sozlamalar o'zgarmagan - admin o'zgarishi /
+to'xtatish / is_active bu kalitni o'chiradi) va ishtirokchi belgisi. Versiya mos kelmasa
+yoki Redis yo'q bo'lsa - odatdagi yo'l. Javob rate governor dan (kutishsiz) token oladi -
+token bo'lmasa update navbatga ketadi.
+
+settings.WEBHOOK_REPLY_FAST_PATH = True bo'lganda yoqiladi.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.client.default import Default
+from aiogram.methods import AnswerCallbackQuery, SendMessage, SendPhoto, TelegramMethod
+from django.conf import settings as django_settings
+
+from bots.user_bots.base_template.cache.render_cache import get_view, peek_referral_view
+from shared import media_cache, referral_posts
+from shared.constants import CACHE_KEYS, WEBHOOK_REPLY_SETTINGS
+from shared.redis_client import redis_client
+from shared.telegram_governor import get_governor
+
+logger = logging.getLogger(__name__)
+
+# Alohida ishlanadigan callback lar (DB / Telegram so'rovi kerak)
+PROCESSED_CALLBACKS = ("check_subscription", "rating_around")  # + "rating_page:*"
+
+# bot_id -> (settings, telegram bot id, amal qilish muddati)
+_settings: Dict[int, Tuple[Dict[str, Any], int, float]] = {}
+_stats = {'inline': 0, 'queued': 0, 'throttled': 0, 'stale': 0}
+
+
+def is_enabled() -> bool:
+    return getattr(django_settings, 'WEBHOOK_REPLY_FAST_PATH', False)
+
+
+def remember_settings(bot_id: int, settings: Dict[str, Any], telegram_bot_id: int):
+    """BotProcessor yuklagan sozlamalar (keyingi update lar xotiradan javob oladi)"""
+    _settings[bot_id] = (settings, telegram_bot_id, time.monotonic() + WEBHOOK_REPLY_SETTINGS['settings_ttl'])
+
+
+def _cached_settings(bot_id: int) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+    entry = _settings.get(bot_id)
+    if entry is None or entry[2] < time.monotonic():
+        return None, None
+    return entry[0], entry[1]
+
+
+def _check(bot_id: int, settings: Dict[str, Any], user_id: Optional[int]) -> Tuple[bool, bool]:
+    """(sozlamalar joriy versiya, ishtirokchi tekshirilgan) - bitta MGET"""
+    if not redis_client.is_connected():
+        return False, False
+    keys = [CACHE_KEYS['bot_settings_version'].format(bot_id=bot_id)]
+    if user_id is not None:
+        keys.append(referral_posts.key(bot_id, user_id))
+    try:
+        values = redis_client.client.mget(keys)
+    except Exception as e:
+        logger.error(f"Webhook reply check error for bot {bot_id}: {e}")
+        return False, False
+    current = bool(values[0]) and values[0] == settings.get('version')
+    return current, len(values) > 1 and values[1] is not None
+
+
+def _message_reply(bot_id: int, settings: Dict[str, Any], message: Dict[str, Any],
+                   participant_verified: bool) -> Optional[TelegramMethod]:
+    """BotProcessor._process_message tartibi bilan - faqat xotiradan hal bo'ladiganlar"""
+    from bots.user_bots.base_template.bot_processor import render_prizes, render_rules
+
+    text = message.get("text", "").strip()
+    user_id = message["from"]["id"]
+    if text.startswith("/start"):
+        return None
+
+    text_lower = text.lower()
+    if "konkurs" in text_lower or "qatnash" in text_lower:
+        if not participant_verified:
+            return None
+        view = peek_referral_view(settings, "konkurs_post", user_id)
+        if view is None:
+            return None
+        image_name = settings.get("promo_image")
+        if not image_name:
+            return SendMessage(chat_id=user_id, **view.as_kwargs())
+        file_id = media_cache.get_file_id(bot_id, image_name)
+        if file_id is None or len(view.text) > media_cache.CAPTION_LIMIT:
+            return None
+        return SendPhoto(chat_id=user_id, photo=file_id, caption=view.text, reply_markup=view.reply_markup)
+    if "sovg'a" in text_lower or "sovrin" in text_lower:
+        return SendMessage(chat_id=user_id, **get_view(settings, "prizes", render_prizes).as_kwargs())
+    if "ball" in text_lower or "reyting" in text_lower or "top" in text_lower:
+        return None
+    if "shart" in text_lower or "qoida" in text_lower:
+        return SendMessage(chat_id=user_id, **get_view(settings, "rules", render_rules).as_kwargs())
+    return None
+
+
+def _as_payload(method: TelegramMethod) -> Dict[str, Any]:
+    """Webhook javobi - {"method": ..., parametrlar}; Default lar Telegram ga qoldiriladi"""
+    payload = {'method': method.__api_method__}
+    for key, value in method.model_dump(exclude_none=True).items():
+        if not isinstance(value, Default):
+            payload[key] = value
+    return payload
+
+
+def reply_method(bot_id: int, update: Dict[str, Any], verify: bool = True) -> Optional[TelegramMethod]:
+    """
+    Xotiradan tuziladigan javob metodi (rate limit siz) - yo'q bo'lsa None
+    verify=False - Redis tekshiruvisiz (faqat benchmark)
+    """
+    settings, _ = _cached_settings(bot_id)
+    if settings is None:
+        return None
+
+    participant_verified = True
+    if verify:
+        message = update.get("message")
+        current, participant_verified = _check(bot_id, settings, message["from"]["id"] if message else None)
+        if not current:
+            _stats['stale'] += 1
+            return None
+
+    if "callback_query" in update:
+        callback = update["callback_query"]
+        data = callback.get("data", "")
+        if data in PROCESSED_CALLBACKS or data.startswith("rating_page:"):
+            return None
+        return AnswerCallbackQuery(callback_query_id=callback["id"])
+    if "message" in update:
+        return _message_reply(bot_id, settings, update["message"], participant_verified)
+    return None
+
+
+def resolve(bot_id: int, update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Update ga webhook javobi
+
+    Returns:
+        Bot API metodi (webhook response body) yoki None - update odatdagidek ishlanadi
+    """
+    try:
+        method = reply_method(bot_id, update)
+        if method is None:
+            _stats['queued'] += 1
+            return None
+
+        if not get_governor(_settings[bot_id][1]).try_acquire(method):
+            _stats['throttled'] += 1
+            return None
+
+        _stats['inline'] += 1
+        return _as_payload(method)
+
+    except Exception as e:
+        logger.error(f"Webhook reply error for bot {bot_id}: {e}")
+        return None
+
+
+def get_stats() -> Dict[str, int]:
+    return dict(_stats, bots=len(_settings))
@@ -1,13 +1,42 @@
 # celery_worker.py
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_app.settings")
 
 app = Celery('konkurs')
 app.conf.broker_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 app.conf.result_backend = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-app.autodiscover_tasks(['fastapi_app.workers'])
+# Concurrency shu yerda (-c emas) - Bot API ulushi child process lar orasida bo'linadi
+app.conf.worker_concurrency = int(os.getenv("CELERY_CONCURRENCY", "4"))
+
+# Bot API limitlarining Celery ga tegishli ulushi (broadcast) - har child process ga teng bo'lib
+os.environ.setdefault(
+    "TELEGRAM_RATE_SHARE",
+    str(float(os.getenv("CELERY_TELEGRAM_RATE_SHARE", "0.3")) / app.conf.worker_concurrency)
+)
+app.autodiscover_tasks(['fastapi_app.workers', 'django_app.core'])
+
+# Periodik task lar: celery -A celery_worker beat -l info
+app.conf.beat_schedule = {
+    'resume-broadcasts': {
+        'task': 'django_app.core.tasks.resume_broadcasts',
+        'schedule': crontab(minute='*/5'),
+    },
+    'reconcile-leaderboards': {
+        'task': 'django_app.core.tasks.reconcile_all_leaderboards',
+        'schedule': crontab(minute=30, hour='*/6'),
+    },
+    'snapshot-leaderboards': {
+        'task': 'django_app.core.tasks.snapshot_all_leaderboards',
+        'schedule': crontab(minute=0),
+    },
+    'audit-points': {
+        'task': 'django_app.core.tasks.audit_points',
+        'schedule': crontab(minute=0, hour=4),
+    },
+}
 
 if __name__ == "__main__":
-    app.start()
\ No newline at end of file
+    app.start()
@@ -1,4 +1,5 @@
 from .bot_admin import BotSetUpAdmin
+from .broadcast_admin import BroadcastAdmin
 from .channel_admin import ChannelAdmin
 from .competition_admin import CompetitionAdmin
 from .pointrule_admin import PointRuleAdmin
@@ -7,6 +8,7 @@ from .user_admin import UserAdmin
 
 __all__ = [
     'BotSetUpAdmin',
+    'BroadcastAdmin',
     'ChannelAdmin',
     'CompetitionAdmin',
     'PointRuleAdmin',
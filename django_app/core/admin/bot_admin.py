@@ -8,7 +8,8 @@ class BotSetUpAdmin(admin.ModelAdmin):
     list_display = ("bot_username", "status", "owner_display", "created_at")
     list_filter = ("status",)
     search_fields = ("bot_username", "owner__full_name")
-    fields = ("bot_username", "status", "owner", "encrypted_token", "admin_contact_username")
+    fields = ("bot_username", "status", "owner", "encrypted_token", "admin_contact_username",
+              "registration_batching", "registration_batch_size", "registration_batch_latency_ms")
     readonly_fields = ("encrypted_token", "owner", "created_at")
     def owner_display(self, obj):
         return obj.owner.full_name if obj.owner else "-"
@@ -0,0 +1,105 @@
+# django_app/core/admin/broadcast_admin.py
+from django.contrib import admin, messages
+from django.db import transaction
+from django.http import HttpRequest
+from ..models.broadcast import Broadcast, BroadcastStatus
+from ..models.competition import Competition
+from ..models.user import User
+
+
+def _admin_user(request):
+    """Admin username (admin_<telegram_id>) bo'yicha User"""
+    try:
+        telegram_id = int(request.user.username.split('_')[-1])
+        return User.objects.get(telegram_id=telegram_id)
+    except:
+        return None
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ("competition", "short_text", "status", "progress_display", "delivered_count", "blocked_count",
+                    "failed_count", "created_at")
+    list_filter = ("status",)
+    fields = ("competition", "text", "parse_mode", "paid_broadcast", "status", "progress_display", "total_count",
+              "delivered_count", "blocked_count", "failed_count", "started_at", "finished_at")
+    readonly_fields = ("status", "progress_display", "total_count", "delivered_count", "blocked_count",
+                       "failed_count", "started_at", "finished_at")
+    actions = ("pause_broadcasts", "resume_broadcasts", "cancel_broadcasts")
+
+    def short_text(self, obj):
+        return obj.text[:50]
+    short_text.short_description = "Xabar"
+
+    def progress_display(self, obj):
+        return f"{obj.progress}% ({obj.processed_count}/{obj.total_count})"
+    progress_display.short_description = "Progress"
+
+    def get_readonly_fields(self, request, obj=None):
+        # Yuborish boshlangandan keyin xabarni o'zgartirib bo'lmaydi
+        if obj and obj.status != BroadcastStatus.PENDING:
+            return self.readonly_fields + ("competition", "text", "parse_mode", "paid_broadcast")
+        return self.readonly_fields
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "competition" and not request.user.is_superuser:
+            kwargs["queryset"] = Competition.objects.filter(creator=_admin_user(request))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            self._start(request, [obj.id])
+
+    def _start(self, request, broadcast_ids):
+        from django_app.core.tasks import send_broadcast
+        for broadcast_id in broadcast_ids:
+            transaction.on_commit(lambda broadcast_id=broadcast_id: send_broadcast.delay(broadcast_id))
+        messages.info(request, "📨 Broadcast fonda yuborilmoqda.")
+
+    def _set_status(self, request, queryset, action):
+        from shared.broadcast import set_status
+        return [broadcast.id for broadcast in queryset if set_status(broadcast.id, action)]
+
+    @admin.action(description="⏸ To'xtatib turish")
+    def pause_broadcasts(self, request, queryset):
+        changed = self._set_status(request, queryset, 'pause')
+        messages.info(request, f"{len(changed)} ta broadcast to'xtatildi.")
+
+    @admin.action(description="▶️ Davom ettirish")
+    def resume_broadcasts(self, request, queryset):
+        changed = self._set_status(request, queryset, 'resume')
+        if changed:
+            self._start(request, changed)
+
+    @admin.action(description="⛔ Bekor qilish")
+    def cancel_broadcasts(self, request, queryset):
+        changed = self._set_status(request, queryset, 'cancel')
+        messages.info(request, f"{len(changed)} ta broadcast bekor qilindi.")
+
+    def get_queryset(self, request: HttpRequest):
+        qs = super().get_queryset(request).select_related('competition')
+        if request.user.is_superuser:
+            return qs
+        admin_user = _admin_user(request)
+        return qs.filter(competition__creator=admin_user) if admin_user else qs.none()
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser or request.user.is_staff
+
+    def has_view_permission(self, request, obj=None):
+        if request.user.is_superuser:
+            return True
+        if obj is None:
+            return request.user.is_staff
+        admin_user = _admin_user(request)
+        return admin_user is not None and obj.competition.creator_id == admin_user.id
+
+    def has_add_permission(self, request):
+        return request.user.is_superuser or request.user.is_staff
+
+    def has_change_permission(self, request, obj=None):
+        return self.has_view_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
@@ -60,7 +60,7 @@ class CompetitionAdmin(admin.ModelAdmin):
     readonly_fields = ("creator",)
 
     def get_fields(self, request, obj=None):
-        fields = ['name', 'description', 'start_at', 'end_at', 'rules_text']
+        fields = ['name', 'description', 'start_at', 'end_at', 'rules_text', 'welcome_image', 'promo_image']
         if request.user.is_superuser:
             fields.append('status')
         return fields
@@ -113,6 +113,10 @@ class CompetitionAdmin(admin.ModelAdmin):
         notification_was_sent_before = obj.notification_sent if change else False
         super().save_model(request, obj, form, change)
 
+        # Rasm almashtirildi - eski file_id lar va sozlamalar cache i tozalanadi
+        if change and obj.bot_id and {'welcome_image', 'promo_image'} & set(form.changed_data):
+            self.invalidate_media(obj.bot_id)
+
         # To'liq bo'lsa notification
         is_complete_now = self.is_complete(obj)
         if is_complete_now and not notification_was_sent_before and obj.status == 'draft':
@@ -129,6 +133,39 @@ class CompetitionAdmin(admin.ModelAdmin):
                 messages.success(request, "✅ SuperAdmin ga notification yuborildi!")
                 async_to_sync(self.send_superadmin_complete_notification)(obj)
 
+    def save_formset(self, request, form, formset, change):
+        """PointRule qo'shilsa / o'zgarsa / o'chirilsa - mavjud ballarni fonda qayta hisoblash"""
+        changes = {}
+        if formset.model is PointRule:
+            for rule_form in formset.forms:
+                if not rule_form.has_changed() and rule_form not in formset.deleted_forms:
+                    continue
+                action_type = rule_form.cleaned_data.get('action_type') or rule_form.instance.action_type
+                old_points = rule_form.initial.get('points') if rule_form.instance.pk else None
+                new_points = None if rule_form in formset.deleted_forms else rule_form.cleaned_data.get('points')
+                if action_type and old_points != new_points:
+                    changes[action_type] = (old_points, new_points)
+
+        super().save_formset(request, form, formset, change)
+
+        if changes:
+            import uuid
+            from django.db import transaction
+            from shared.redis_client import redis_client
+            from django_app.core.tasks import rescore_competition
+
+            competition_id, bot_id = form.instance.id, form.instance.bot_id
+            job_id = uuid.uuid4().hex
+
+            def _start():
+                if bot_id:
+                    # Yangi award lar yangi qoidalar bilan berilsin
+                    async_to_sync(redis_client.clear_bot_cache)(bot_id)
+                rescore_competition.delay(competition_id, changes, job_id)
+
+            transaction.on_commit(_start)
+            messages.info(request, "🔄 Ball qoidalari o'zgardi - ishtirokchilar ballari fonda qayta hisoblanmoqda.")
+
     async def send_superadmin_complete_notification(self, competition):
         """SuperAdmin ga notification yuborish"""
         user = competition.creator
@@ -190,6 +227,15 @@ class CompetitionAdmin(admin.ModelAdmin):
         except Exception as e:
             return False
 
+    def invalidate_media(self, bot_id):
+        try:
+            from shared.media_cache import invalidate
+            from shared.redis_client import redis_client
+            invalidate(bot_id)
+            async_to_sync(redis_client.clear_bot_cache)(bot_id)
+        except Exception:
+            pass
+
     def delete_model(self, request, obj):
         """
         Competition o'chirilganda bog'liq narsalarni tozalash
@@ -6,4 +6,5 @@ class CoreConfig(AppConfig):
     name = 'django_app.core'
 
     def ready(self):
-        import django_app.core.signals.bot_signals
\ No newline at end of file
+        import django_app.core.signals.bot_signals
+        import django_app.core.signals.cache_signals
@@ -0,0 +1,44 @@
+# django_app/core/management/commands/audit_points.py
+"""
+Participant.current_points ni Point ledger bilan solishtirish
+Vazifasi: Drift ni hisobot qilish va (--repair bilan) tuzatish
+
+    python manage.py audit_points
+    python manage.py audit_points --competition 12 --repair
+"""
+from django.core.management.base import BaseCommand
+
+from shared.points_audit import audit_points
+
+
+class Command(BaseCommand):
+    help = "current_points == SUM(Point.earned_points) tekshiruvi (--repair bilan tuzatish)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--competition', type=int, help="Faqat shu konkurs")
+        parser.add_argument('--repair', action='store_true', help="Farqlarni ledger bo'yicha tuzatish")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        report = audit_points(
+            competition_id=options['competition'],
+            repair=options['repair'],
+            chunk_size=options['chunk_size']
+        )
+
+        for competition_id, stats in sorted(report['competitions'].items()):
+            if stats['mismatched']:
+                self.stdout.write(
+                    f"competition={competition_id}: {stats['mismatched']}/{stats['checked']} farq, "
+                    f"current={stats['current_total']:,}, ledger={stats['ledger_total']:,}"
+                )
+
+        for sample in report['samples']:
+            self.stdout.write(
+                f"  participant={sample['participant_id']}: "
+                f"current={sample['current_points']}, ledger={sample['ledger_points']}"
+            )
+
+        style = self.style.SUCCESS if not report['mismatched'] else self.style.WARNING
+        action = f", tuzatildi: {report['repaired']}" if options['repair'] else ""
+        self.stdout.write(style(f"Tekshirildi: {report['checked']}, farq: {report['mismatched']}{action}"))
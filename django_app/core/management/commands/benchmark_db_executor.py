@@ -0,0 +1,62 @@
+# django_app/core/management/commands/benchmark_db_executor.py
+"""
+DB executor benchmark - pool hajmi bo'yicha throughput
+Vazifasi: thread_sensitive=True (bitta thread) bilan DBExecutor(N) ni solishtirish
+
+    python manage.py benchmark_db_executor
+    python manage.py benchmark_db_executor --threads 1,4,8,16,32 --calls 5000 --query-ms 5
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from shared.db_executor import DBExecutor
+
+
+def _query(query_ms: float):
+    """Bitta DB chaqiruv - server tomonda query_ms davom etadi"""
+    with connection.cursor() as cursor:
+        if query_ms:
+            cursor.execute("SELECT pg_sleep(%s)", [query_ms / 1000])
+        else:
+            cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+class Command(BaseCommand):
+    help = "DB executor throughput ini pool hajmi bo'yicha o'lchash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', default='1,2,4,8,16', help="Vergul bilan ajratilgan pool hajmlari")
+        parser.add_argument('--calls', type=int, default=2000, help="Har bir o'lchovdagi chaqiruvlar")
+        parser.add_argument('--query-ms', type=float, default=2, help="Bitta query davomiyligi (pg_sleep)")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['threads'].split(',') if size.strip()]
+        calls, query_ms = options['calls'], options['query_ms']
+
+        self.stdout.write(f"{calls} chaqiruv, query={query_ms}ms")
+
+        baseline = asyncio.run(self._measure(sync_to_async(_query), calls, query_ms))
+        self._report('thread_sensitive', calls, baseline, baseline)
+
+        for size in sizes:
+            executor = DBExecutor(size)
+            try:
+                elapsed = asyncio.run(self._measure(lambda ms: executor.run(_query, ms), calls, query_ms))
+            finally:
+                executor.shutdown()
+            self._report(f"pool={size}", calls, elapsed, baseline)
+
+    async def _measure(self, call, calls: int, query_ms: float) -> float:
+        started = time.monotonic()
+        await asyncio.gather(*[call(query_ms) for _ in range(calls)])
+        return time.monotonic() - started
+
+    def _report(self, label: str, calls: int, elapsed: float, baseline: float):
+        self.stdout.write(
+            f"{label:>18}: {elapsed:7.2f}s  {calls / elapsed:9.1f} calls/s  x{baseline / elapsed:.1f}"
+        )
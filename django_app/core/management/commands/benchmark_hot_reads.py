@@ -0,0 +1,70 @@
+# django_app/core/management/commands/benchmark_hot_reads.py
+"""
+Issiq o'qishlar benchmark - N ta bir vaqtdagi so'rovda p50/p99
+Vazifasi: sync_to_async, Django async ORM (afirst), DB executor va async_db ni solishtirish
+
+    python manage.py benchmark_hot_reads --bot 3
+    python manage.py benchmark_hot_reads --bot 3 --requests 1000
+"""
+import asyncio
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from django_app.core.models import Participant
+from shared import async_db
+from shared.db_executor import run_db
+
+
+class Command(BaseCommand):
+    help = "Participant o'qishining p50/p99 latency si - N ta parallel so'rov"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bot', type=int, required=True, help="Bot ID (konkursida ishtirokchilar bo'lishi kerak)")
+        parser.add_argument('--requests', type=int, default=1000, help="Bir vaqtdagi so'rovlar")
+
+    def handle(self, *args, **options):
+        bot_id = options['bot']
+        telegram_ids = list(Participant.objects.filter(
+            competition__bot_id=bot_id, is_participant=True
+        ).values_list('user__telegram_id', flat=True)[:10000])
+        if not telegram_ids:
+            raise CommandError(f"Bot {bot_id} da ishtirokchi yo'q")
+
+        requests = [random.choice(telegram_ids) for _ in range(options['requests'])]
+
+        def queryset(telegram_id):
+            return Participant.objects.filter(
+                user__telegram_id=telegram_id, competition__bot_id=bot_id, is_participant=True
+            )
+
+        variants = [
+            ('sync_to_async', lambda telegram_id: sync_to_async(queryset(telegram_id).first)()),
+            ('async ORM afirst', lambda telegram_id: queryset(telegram_id).afirst()),
+            (f"executor({settings.DB_EXECUTOR_THREADS})", lambda telegram_id: run_db(queryset(telegram_id).first)),
+            (f"async_db({settings.DB_ASYNC_POOL_SIZE})",
+             lambda telegram_id: async_db.fetch_instance(queryset(telegram_id))),
+        ]
+
+        self.stdout.write(f"{len(requests)} ta parallel so'rov, bot={bot_id}")
+        for label, call in variants:
+            latencies = asyncio.run(self._measure(call, requests))
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(f"{label:>18}: p50={p50 * 1000:8.1f}ms  p99={p99 * 1000:8.1f}ms")
+
+    async def _measure(self, call, requests):
+        """Hammasi bir vaqtda keladi - latency = umumiy start dan javobgacha"""
+        started = time.monotonic()
+
+        async def one(telegram_id):
+            await call(telegram_id)
+            return time.monotonic() - started
+
+        try:
+            return sorted(await asyncio.gather(*[one(telegram_id) for telegram_id in requests]))
+        finally:
+            await async_db.shutdown()
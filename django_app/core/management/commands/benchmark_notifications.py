@@ -0,0 +1,60 @@
+# django_app/core/management/commands/benchmark_notifications.py
+"""
+Notification benchmark - har chaqiruvda yangi Bot va umumiy main bot client
+Vazifasi: Yangi session (TLS handshake) narxini o'lchash
+
+    python manage.py benchmark_notifications --count 100
+    python manage.py benchmark_notifications --count 50 --chat 123456789
+
+--chat berilmasa getMe chaqiriladi (hech kimga xabar ketmaydi). --chat bilan natijaga
+chat limiti (~1/s, rate governor) ham qo'shiladi.
+"""
+import asyncio
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bots.main_bot.services.notification_service import (close_shared_client, enable_shared_client,
+                                                         main_bot_client)
+
+
+class Command(BaseCommand):
+    help = "Main bot notification latency: yangi Bot har safar vs umumiy client"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100, help="Chaqiruvlar soni")
+        parser.add_argument('--chat', type=int, help="Xabar yuboriladigan chat (bo'lmasa getMe)")
+
+    def handle(self, *args, **options):
+        if not os.getenv('TELEGRAM_BOT_TOKEN'):
+            raise CommandError("TELEGRAM_BOT_TOKEN sozlanmagan")
+
+        self.stdout.write(f"{options['count']} ta chaqiruv ({'sendMessage' if options['chat'] else 'getMe'})")
+        for label, shared in (('yangi Bot', False), ('umumiy client', True)):
+            latencies = asyncio.run(self._measure(options['count'], options['chat'], shared))
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"{label:>14}: p50={p50 * 1000:7.1f}ms  p99={p99 * 1000:7.1f}ms  jami={sum(latencies):6.2f}s"
+            )
+
+    async def _measure(self, count: int, chat_id, shared: bool):
+        """Ketma-ket chaqiruvlar (notification lar odatda bittadan keladi)"""
+        if shared:
+            enable_shared_client()
+
+        latencies = []
+        try:
+            for i in range(count):
+                started = time.monotonic()
+                async with main_bot_client() as bot:
+                    if chat_id:
+                        await bot.send_message(chat_id, f"benchmark {i + 1}/{count}")
+                    else:
+                        await bot.get_me()
+                latencies.append(time.monotonic() - started)
+        finally:
+            if shared:
+                await close_shared_client()
+        return sorted(latencies)
@@ -0,0 +1,105 @@
+# django_app/core/management/commands/benchmark_point_ledger.py
+"""
+Point ledger benchmark - bitta "issiq" ishtirokchiga parallel award lar
+Vazifasi: To'g'ridan-to'g'ri F() UPDATE (har award - Point + qator lock) bilan
+write-behind ledger ni (XADD + batch flush) solishtirish
+
+    python manage.py benchmark_point_ledger --participant 42
+    python manage.py benchmark_point_ledger --participant 42 --awards 10000 --threads 32
+
+Award lar reason='benchmark' bilan yoziladi (breakdown counter larga tegmaydi) va
+oxirida o'chirilib, current_points / leaderboard qaytariladi. PostgreSQL va Redis kerak.
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, Sum
+
+from django_app.core.models import Participant, Point
+from shared import point_ledger
+from shared.leaderboard import Leaderboard
+from shared.redis_client import redis_client
+
+REASON = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = "Direct F() UPDATE va ledger (stream + flush) award throughput ini solishtirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participant', type=int, required=True, help="Award oladigan ishtirokchi ID")
+        parser.add_argument('--awards', type=int, default=5000, help="Har variantdagi award lar")
+        parser.add_argument('--threads', type=int, default=16, help="Parallel yozuvchilar (handler lar)")
+
+    def handle(self, *args, **options):
+        if not redis_client.is_connected():
+            raise CommandError("Redis kerak (ledger stream)")
+        try:
+            participant = Participant.objects.select_related('user').get(id=options['participant'])
+        except Participant.DoesNotExist:
+            raise CommandError(f"Participant {options['participant']} topilmadi")
+
+        entry = {
+            'participant_id': participant.id,
+            'competition_id': participant.competition_id,
+            'telegram_id': participant.user.telegram_id,
+            'points': 1,
+            'reason': REASON,
+            'description': '',
+            'source_ref': '',
+            'referrals': 0
+        }
+        awards, threads = options['awards'], options['threads']
+        self.stdout.write(f"{awards} award, {threads} thread, participant={participant.id}")
+
+        try:
+            direct = self._run(point_ledger._apply_direct, entry, awards, threads)
+            self.stdout.write(f"{'direct F()':>14}: {direct:7.2f}s  {awards / direct:9.1f} awards/s")
+
+            append = self._run(point_ledger._append, entry, awards, threads)
+            started = time.monotonic()
+            report = point_ledger.flush()
+            flush = time.monotonic() - started
+            self.stdout.write(
+                f"{'ledger XADD':>14}: {append:7.2f}s  {awards / append:9.1f} awards/s  (x{direct / append:.1f})"
+            )
+            self.stdout.write(
+                f"{'ledger flush':>14}: {flush:7.2f}s  {report['entries']} entries / {report['batches']} batches"
+            )
+            total = append + flush
+            self.stdout.write(
+                f"{'ledger jami':>14}: {total:7.2f}s  {awards / total:9.1f} awards/s  (x{direct / total:.1f})"
+            )
+        finally:
+            self._cleanup(participant)
+
+    def _run(self, apply, entry, awards: int, threads: int) -> float:
+        """awards ta award ni threads ta thread da - umumiy vaqt"""
+        per_thread = [awards // threads + (1 if index < awards % threads else 0) for index in range(threads)]
+
+        def worker(count):
+            try:
+                for _ in range(count):
+                    apply(dict(entry))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(count,)) for count in per_thread]
+        started = time.monotonic()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return time.monotonic() - started
+
+    def _cleanup(self, participant):
+        """Benchmark award larini qaytarish"""
+        point_ledger.flush()
+        points = Point.objects.filter(participant=participant, reason=REASON)
+        total = points.aggregate(total=Sum('earned_points'))['total'] or 0
+        points.delete()
+        Participant.objects.filter(id=participant.id).update(current_points=F('current_points') - total)
+        Leaderboard(participant.competition_id).incr(participant.user.telegram_id, -total)
+        self.stdout.write(f"Tozalandi: {total} ball qaytarildi")
@@ -0,0 +1,102 @@
+# django_app/core/management/commands/benchmark_webhook_reply.py
+"""
+Webhook reply benchmark - webhook javobida javob berish qancha Bot API so'rovini tejaydi
+Vazifasi: Menyu trafigi aralashmasida inline javob ulushini va resolve narxini o'lchash
+
+    python manage.py benchmark_webhook_reply --count 10000 --users 500
+    python manage.py benchmark_webhook_reply --bot 12
+
+--bot berilsa sozlamalar shu botdan (DB / Redis), aks holda namunaviy sozlamalar.
+Telegram ga hech narsa yuborilmaydi. Rate governor va Redis tekshiruvi (bitta MGET)
+hisobga olinmaydi (real trafikda limitdan oshgan qismi navbatga ketadi). Har update kamida bitta Bot API so'rovi
+qiladi, inline javob shulardan bittasini tejaydi.
+"""
+import random
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+
+from bots.user_bots.base_template import webhook_reply
+from bots.user_bots.base_template.bot_processor import render_konkurs_post
+from bots.user_bots.base_template.cache.render_cache import get_referral_view
+
+# (nom, ulush, update yasovchi) - foydalanuvchi menyu bosishlari
+TRAFFIC_MIX = (
+    ('start', 10, lambda user_id: {'message': {'from': {'id': user_id}, 'text': '/start'}}),
+    ('konkurs', 25, lambda user_id: {'message': {'from': {'id': user_id}, 'text': '🚀 Konkursda qatnashish'}}),
+    ('sovgalar', 15, lambda user_id: {'message': {'from': {'id': user_id}, 'text': "🎁 Sovg'alar"}}),
+    ('ballarim', 15, lambda user_id: {'message': {'from': {'id': user_id}, 'text': '📊 Ballarim'}}),
+    ('reyting', 10, lambda user_id: {'message': {'from': {'id': user_id}, 'text': '🏆 Reyting'}}),
+    ('shartlar', 10, lambda user_id: {'message': {'from': {'id': user_id}, 'text': '📜 Shartlar'}}),
+    ('copy_link', 5, lambda user_id: {'callback_query': {'id': str(user_id), 'from': {'id': user_id},
+                                                        'data': 'copy_link'}}),
+    ('check_subscription', 5, lambda user_id: {'callback_query': {'id': str(user_id), 'from': {'id': user_id},
+                                                                 'data': 'check_subscription'}}),
+    ('rating_page', 5, lambda user_id: {'callback_query': {'id': str(user_id), 'from': {'id': user_id},
+                                                          'data': 'rating_page:2'}}),
+)
+
+SAMPLE_SETTINGS = {
+    'id': 0, 'bot_id': 0, 'name': 'Benchmark', 'description': 'Konkurs tavsifi', 'rules_text': 'Qoidalar',
+    'bot_username': 'benchmark_bot', 'channels': [], 'point_rules': {}, 'promo_image': '',
+    'prizes': [{'place': 1, 'prize_name': 'iPhone', 'prize_amount': None, 'type': 'text', 'description': ''}],
+}
+
+
+class Command(BaseCommand):
+    help = "Webhook reply fast path: inline javoblar ulushi va tejalgan Bot API so'rovlari"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Update lar soni")
+        parser.add_argument('--users', type=int, default=500, help="Turli foydalanuvchilar soni")
+        parser.add_argument('--bot', type=int, help="Sozlamalari olinadigan bot id")
+
+    def handle(self, *args, **options):
+        settings = self._settings(options['bot'])
+        bot_id = settings['bot_id']
+        webhook_reply.remember_settings(bot_id, settings, telegram_bot_id=0)
+
+        rng = random.Random(42)
+        names = [name for name, _, _ in TRAFFIC_MIX]
+        weights = [weight for _, weight, _ in TRAFFIC_MIX]
+        builders = {name: build for name, _, build in TRAFFIC_MIX}
+
+        inline, total = Counter(), Counter()
+        elapsed = 0.0
+        for _ in range(options['count']):
+            name = rng.choices(names, weights)[0]
+            user_id = rng.randint(1, options['users'])
+            update = builders[name](user_id)
+
+            started = time.perf_counter()
+            method = webhook_reply.reply_method(bot_id, update, verify=False)
+            elapsed += time.perf_counter() - started
+
+            total[name] += 1
+            if method is not None:
+                inline[name] += 1
+            elif name == 'konkurs':
+                # BotProcessor post ni tuzadi - keyingi bosish cache dan
+                get_referral_view(settings, 'konkurs_post', user_id, f"ref{user_id}", render_konkurs_post)
+
+        for name in names:
+            self.stdout.write(f"{name:>20}: {total[name]:6d} update, {inline[name]:6d} inline")
+
+        count = options['count']
+        saved = sum(inline.values())
+        self.stdout.write(
+            f"Bot API so'rovlari: fast path siz >= {count}, fast path bilan >= {count - saved} "
+            f"(-{saved}, {saved * 100 / count:.1f}%); resolve o'rtacha {elapsed * 1e6 / count:.1f}µs"
+        )
+
+    def _settings(self, bot_id):
+        if bot_id is None:
+            return SAMPLE_SETTINGS
+
+        from bots.user_bots.base_template.services.competition_service import CompetitionService
+        settings = async_to_sync(CompetitionService().get_competition_settings)(bot_id)
+        if not settings:
+            raise CommandError(f"Bot {bot_id} sozlamalari topilmadi")
+        return settings
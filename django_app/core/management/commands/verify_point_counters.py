@@ -0,0 +1,75 @@
+# django_app/core/management/commands/verify_point_counters.py
+"""
+Participant dagi denormalized ball counter larini Point ledger dan qayta hisoblash
+Vazifasi: Drift ni topish va (--fix bilan) tuzatish
+
+    python manage.py verify_point_counters
+    python manage.py verify_point_counters --competition 12 --fix
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from django_app.core.models import Participant, Referral
+
+COUNTER_FIELDS = ['channel_points', 'referral_points', 'premium_referral_points', 'premium_points', 'referral_count']
+
+
+def _ledger_annotations():
+    """Point ledger dan counter lar (referral_count - Referral yozuvlaridan) - bitta GROUP BY query"""
+    annotations = {
+        f"ledger_{field}": Coalesce(
+            Sum('points__earned_points', filter=Q(points__reason=reason)), Value(0), output_field=IntegerField()
+        )
+        for reason, field in Participant.POINT_COUNTERS.items()
+    }
+    referrals = Referral.objects.filter(
+        referrer_id=OuterRef('user_id'), competition_id=OuterRef('competition_id')
+    ).order_by().values('referrer_id').annotate(total=Count('id')).values('total')
+    annotations['ledger_referral_count'] = Coalesce(Subquery(referrals), Value(0), output_field=IntegerField())
+    return annotations
+
+
+class Command(BaseCommand):
+    help = "Participant ball counter larini Point ledger bilan solishtirish (--fix bilan tuzatish)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--competition', type=int, help="Faqat shu konkurs")
+        parser.add_argument('--fix', action='store_true', help="Farq bo'lsa counter larni yangilash")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        participants = Participant.objects.all()
+        if options['competition']:
+            participants = participants.filter(competition_id=options['competition'])
+
+        rows = participants.order_by().annotate(**_ledger_annotations()).values(
+            'id', *COUNTER_FIELDS, *[f"ledger_{field}" for field in COUNTER_FIELDS]
+        ).iterator(chunk_size=options['batch_size'])
+
+        checked = drifted = 0
+        to_fix = []
+
+        for row in rows:
+            checked += 1
+            expected = {field: row[f"ledger_{field}"] for field in COUNTER_FIELDS}
+            if all(row[field] == value for field, value in expected.items()):
+                continue
+
+            drifted += 1
+            if drifted <= 20:
+                diff = {field: (row[field], value) for field, value in expected.items() if row[field] != value}
+                self.stdout.write(f"participant={row['id']}: {diff}")
+
+            if options['fix']:
+                to_fix.append(Participant(id=row['id'], **expected))
+                if len(to_fix) >= options['batch_size']:
+                    Participant.objects.bulk_update(to_fix, COUNTER_FIELDS)
+                    to_fix = []
+
+        if to_fix:
+            Participant.objects.bulk_update(to_fix, COUNTER_FIELDS)
+
+        style = self.style.SUCCESS if not drifted else self.style.WARNING
+        action = " (tuzatildi)" if options['fix'] and drifted else ""
+        self.stdout.write(style(f"Tekshirildi: {checked}, farq: {drifted}{action}"))
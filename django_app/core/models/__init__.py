@@ -7,11 +7,14 @@ from .point import Point
 from .pointrule import PointRule, PointAction
 from .prize import Prize
 from .referral import Referral
+from .snapshot import LeaderboardSnapshot
+from .ledger import PointLedgerCheckpoint
 from .system import SystemSettings
 from .winner import Winner
+from .broadcast import Broadcast, BroadcastStatus
 
 __all__ = [
     'User', 'BotSetUp', 'BotStatus', 'Channel', 'Competition', 'CompetitionStatus',
     'Participant', 'Point', 'PointRule', 'PointAction', 'Prize', 'Referral',
-    'SystemSettings', 'Winner'
+    'SystemSettings', 'Winner', 'LeaderboardSnapshot', 'PointLedgerCheckpoint', 'Broadcast', 'BroadcastStatus'
 ]
@@ -38,6 +38,11 @@ class BotSetUp(TimestampMixin):
     is_active = models.BooleanField(default=False)
     process_id = models.CharField(max_length=255, null=True, blank=True)
 
+    # Group-commit ro'yxatdan o'tish (launch paytidagi /start to'lqini uchun)
+    registration_batching = models.BooleanField(default=False)
+    registration_batch_size = models.PositiveSmallIntegerField(default=100)
+    registration_batch_latency_ms = models.PositiveIntegerField(default=200)
+
     def save(self, *args, **kwargs):
         # FIX: Token encrypt qilish
         if self.encrypted_token and not self.encrypted_token.startswith("gAAAA"):
@@ -0,0 +1,68 @@
+# django_app/core/models/broadcast.py
+"""
+Broadcast modeli - Konkurs ishtirokchilariga ommaviy xabar
+Vazifasi: Xabar matni, yuborish holati va davom ettirish uchun cursor ni saqlash
+"""
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from .competition import Competition
+from .base import TimestampMixin
+
+
+class BroadcastStatus(models.TextChoices):
+    """Broadcast statuslari"""
+    PENDING = "pending", "Pending"
+    RUNNING = "running", "Running"
+    PAUSED = "paused", "Paused"
+    COMPLETED = "completed", "Completed"
+    CANCELED = "canceled", "Canceled"
+
+
+class Broadcast(TimestampMixin):
+    """
+    Ommaviy xabar (shared/broadcast.py yuboradi).
+
+    Attributes:
+        competition: Qaysi konkurs ishtirokchilariga
+        text / parse_mode: Xabar
+        paid_broadcast: Telegram paid broadcast (Stars) - 30/s o'rniga 1000/s gacha
+        status: Holat (running dagi broadcast qulab qolsa qayta ishga tushiriladi)
+        cursor: Yuborib bo'lingan oxirgi Participant.id (keyset) - shu joydan davom etadi
+        total_count: Boshlanishdagi qabul qiluvchilar soni
+        delivered_count / blocked_count / failed_count: Natijalar
+        blocked_ids / failed_ids: Botni bloklagan / yuborib bo'lmagan telegram_id lar
+    """
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='broadcasts')
+    text = models.TextField()
+    parse_mode = models.CharField(max_length=20, blank=True, default='HTML')
+    paid_broadcast = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=BroadcastStatus.choices, default=BroadcastStatus.PENDING)
+    cursor = models.BigIntegerField(default=0)
+    total_count = models.IntegerField(default=0)
+    delivered_count = models.IntegerField(default=0)
+    blocked_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    blocked_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    failed_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'core_broadcast'
+        ordering = ['-created_at']
+        verbose_name = 'Broadcast'
+        verbose_name_plural = 'Broadcastlar'
+
+    def __str__(self):
+        return f"{self.competition.name}: {self.text[:30]}"
+
+    @property
+    def processed_count(self) -> int:
+        return self.delivered_count + self.blocked_count + self.failed_count
+
+    @property
+    def progress(self) -> float:
+        """Foizda"""
+        if not self.total_count:
+            return 100.0 if self.status == BroadcastStatus.COMPLETED else 0.0
+        return round(min(100.0, self.processed_count * 100 / self.total_count), 1)
@@ -26,6 +26,7 @@ class Competition(TimestampMixin):
     channels = models.ManyToManyField('Channel', related_name="competitions", blank=True)
     rules_text = models.TextField(blank=True, null=True)
     welcome_image = models.ImageField(upload_to='welcome_images/', null=True, blank=True)
+    promo_image = models.ImageField(upload_to='promo_images/', null=True, blank=True)  # "Konkurs" bo'limi rasmi
     is_published = models.BooleanField(default=False)
     notification_sent = models.BooleanField(default=False)
 
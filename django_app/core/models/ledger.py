@@ -0,0 +1,30 @@
+# django_app/core/models/ledger.py
+"""
+PointLedgerCheckpoint modeli - Write-behind ball ledger checkpoint i
+Vazifasi: Redis stream dan DB ga qaysi yozuvgacha ko'chirilganini saqlash
+"""
+from django.db import models
+from .base import TimestampMixin
+
+
+class PointLedgerCheckpoint(TimestampMixin):
+    """
+    Ledger checkpoint i.
+
+    last_id ballar bilan bitta transaction da yangilanadi - flusher qulab qolsa
+    ham yozuvlar ikki marta qo'llanmaydi.
+
+    Attributes:
+        stream: Redis stream key
+        last_id: DB ga yozilgan oxirgi stream entry ID si
+    """
+    stream = models.CharField(max_length=100, unique=True)
+    last_id = models.CharField(max_length=50, blank=True, default='')
+
+    class Meta:
+        db_table = 'core_point_ledger_checkpoint'
+        verbose_name = 'Ledger checkpoint'
+        verbose_name_plural = 'Ledger checkpointlar'
+
+    def __str__(self):
+        return f"{self.stream} @ {self.last_id or '-'}"
@@ -8,6 +8,7 @@ from django.utils import timezone
 from .user import User
 from .competition import Competition
 from .base import TimestampMixin
+from .pointrule import PointAction
 
 
 class Participant(TimestampMixin):
@@ -23,6 +24,10 @@ class Participant(TimestampMixin):
         referred_by: Kim taklif qilgani (self FK)
         channels_joined: Qo'shilgan kanallar ro'yxati (JSON)
         is_blocked: Bloklangan yoki yo'q
+        channel_points / referral_points / premium_referral_points / premium_points:
+            Point ledger dan sabab bo'yicha yig'indilar (denormalized, Point bilan bitta batch da yangilanadi)
+        referral_count: Taklif qilganlar soni - Referral yozuvi yaratilganda ledger orqali oshadi
+            (taklif uchun ball 0 bo'lsa ham)
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='participants')
     competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='participants')
@@ -33,9 +38,46 @@ class Participant(TimestampMixin):
     channels_joined = models.JSONField(default=list, blank=True)
     is_blocked = models.BooleanField(default=False)
 
+    # Ballarim statistikasi - har safar Point ustida SUM qilmaslik uchun
+    channel_points = models.IntegerField(default=0)
+    referral_points = models.IntegerField(default=0)
+    premium_referral_points = models.IntegerField(default=0)
+    premium_points = models.IntegerField(default=0)
+    referral_count = models.IntegerField(default=0)
+
+    # Point.reason -> counter field
+    POINT_COUNTERS = {
+        PointAction.CHANNEL_JOIN: 'channel_points',
+        PointAction.REFERRAL: 'referral_points',
+        PointAction.PREMIUM_REFERRAL: 'premium_referral_points',
+        PointAction.PREMIUM_USER: 'premium_points',
+    }
+
     class Meta:
         unique_together = ('user', 'competition')
         db_table = 'core_participant'
+        indexes = [
+            # Reyting (TOP 10) va rank: competition + is_participant, current_points DESC
+            models.Index(
+                fields=['competition', '-current_points'],
+                name='participant_rating_idx',
+                condition=models.Q(is_participant=True),
+            ),
+            # Broadcast qabul qiluvchilari: keyset (id > cursor ORDER BY id)
+            models.Index(
+                fields=['competition', 'id'],
+                name='participant_broadcast_idx',
+                condition=models.Q(is_participant=True),
+            ),
+        ]
+        constraints = [
+            # Referral kod bo'yicha qidirish + kod takrorlanmasligi
+            models.UniqueConstraint(
+                fields=['competition', 'referral_code'],
+                name='participant_referral_code_uniq',
+                condition=models.Q(referral_code__isnull=False),
+            ),
+        ]
         verbose_name = 'Ishtirokchi'
         verbose_name_plural = 'Ishtirokchilar'
 
@@ -75,10 +117,28 @@ class Participant(TimestampMixin):
         """User premium statusini qaytarish"""
         return self.user.is_premium if self.user else False
 
-    def add_points(self, points: int, reason: str):
-        """Ishtirokchiga ball qo'shish"""
-        self.current_points += points
-        self.save(update_fields=['current_points', 'updated_at'])
-        # Point yozuvini yaratish
-        from .point import Point
-        Point.objects.create(participant=self, earned_points=points, reason=reason)
\ No newline at end of file
+    @classmethod
+    def counter_deltas(cls, reason: str, points: int, referrals: int = 0) -> dict:
+        """
+        Bitta award uchun o'zgaradigan field lar: {'current_points': points, 'referral_points': points, ...}
+        referrals - award bilan birga yaratilgan Referral yozuvlari (referral_count)
+        """
+        deltas = {'current_points': points}
+        field = cls.POINT_COUNTERS.get(reason)
+        if field:
+            deltas[field] = points
+        if referrals:
+            deltas['referral_count'] = referrals
+        return deltas
+
+    def add_points(self, points: int, reason: str, source_ref: str = None):
+        """
+        Ishtirokchiga ball qo'shish
+
+        Write-behind: ball Redis ledger ga yoziladi, current_points va Point
+        flusher tomonidan batch da DB ga ko'chiriladi (shared/point_ledger.py).
+        source_ref berilsa bir xil source_ref li award faqat bir marta yoziladi.
+        Obyektdagi current_points o'zgartirilmaydi - flush dan keyin refresh_from_db().
+        """
+        from shared.point_ledger import award
+        award(self.id, self.competition_id, self.telegram_id, points, reason, source_ref=source_ref)
\ No newline at end of file
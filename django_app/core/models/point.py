@@ -10,9 +10,28 @@ class Point(TimestampMixin):
     earned_points = models.IntegerField()
     reason = models.CharField(max_length=50, choices=PointAction.choices)
     description = models.CharField(max_length=255, blank=True, null=True)
+    # Idempotency: award manbai (masalan referred:<telegram_id>) - takroriy award ikki marta yozilmaydi
+    source_ref = models.CharField(max_length=100, blank=True, null=True)
 
     def __str__(self):
         return f"{self.participant} +{self.earned_points} ({self.reason})"
 
     class Meta:
-        db_table = 'core_point'
\ No newline at end of file
+        db_table = 'core_point'
+        indexes = [
+            # Statistika: participant + reason bo'yicha SUM (index-only scan)
+            models.Index(
+                fields=['participant', 'reason'],
+                name='point_participant_reason_idx',
+                include=['earned_points'],
+            ),
+        ]
+        constraints = [
+            # Bitta manba uchun bitta award (retry / takroriy webhook) - reason ga qaramay:
+            # taklif qilingan foydalanuvchi uchun referral yoki premium_ref, ikkalasi emas
+            models.UniqueConstraint(
+                fields=['participant', 'source_ref'],
+                name='point_source_ref_uniq',
+                condition=models.Q(source_ref__isnull=False),
+            ),
+        ]
\ No newline at end of file
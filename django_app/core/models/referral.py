@@ -12,6 +12,10 @@ class Referral(TimestampMixin):
     class Meta:
         unique_together = ("referrer", "referred", "competition")
         db_table = 'core_referral'
+        indexes = [
+            # Referral soni: referrer + competition bo'yicha COUNT
+            models.Index(fields=['referrer', 'competition'], name='referral_referrer_comp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.referred} <- {self.referrer} ({self.competition.name})"
\ No newline at end of file
@@ -0,0 +1,60 @@
+# django_app/core/models/snapshot.py
+"""
+LeaderboardSnapshot modeli - Reyting tarixi
+Vazifasi: Har bir konkurs uchun ma'lum vaqtdagi TOP-K va ball taqsimotini saqlash
+"""
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models
+from django.utils import timezone
+from .competition import Competition
+from .base import TimestampMixin
+
+
+class LeaderboardSnapshot(TimestampMixin):
+    """
+    Reyting snapshot i (ixcham, massivlarda).
+
+    Attributes:
+        competition: Qaysi konkurs
+        taken_at: Snapshot olingan vaqt
+        participants_count: Reytingdagi ishtirokchilar soni
+        top_ids / top_points: TOP-K (telegram_id va ballar, o'rin tartibida)
+        score_values / score_counts: Ball taqsimoti (RLE): kamayish tartibidagi
+            har xil ballar va har biridagi ishtirokchilar soni
+        changed_ids / changed_points: Oldingi snapshot dan beri bali o'zgargan
+            ishtirokchilar (delta) - birinchi snapshot da hammasi
+    """
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='snapshots')
+    taken_at = models.DateTimeField(default=timezone.now)
+    participants_count = models.IntegerField(default=0)
+    top_ids = ArrayField(models.BigIntegerField(), default=list)
+    top_points = ArrayField(models.IntegerField(), default=list)
+    score_values = ArrayField(models.IntegerField(), default=list)
+    score_counts = ArrayField(models.IntegerField(), default=list)
+    changed_ids = ArrayField(models.BigIntegerField(), default=list)
+    changed_points = ArrayField(models.IntegerField(), default=list)
+
+    class Meta:
+        db_table = 'core_leaderboard_snapshot'
+        ordering = ['-taken_at']
+        indexes = [
+            # Vaqt bo'yicha TOP-K va series
+            models.Index(fields=['competition', 'taken_at'], name='snapshot_comp_taken_idx'),
+            # Ishtirokchi delta larini topish: changed_ids @> ARRAY[telegram_id]
+            GinIndex(fields=['changed_ids'], name='snapshot_changed_ids_gin'),
+        ]
+        verbose_name = 'Reyting snapshot'
+        verbose_name_plural = 'Reyting snapshotlari'
+
+    def __str__(self):
+        return f"{self.competition.name} @ {self.taken_at:%Y-%m-%d %H:%M}"
+
+    def rank_for(self, points: int) -> int:
+        """Berilgan ball uchun o'rin - COUNT(ball > points) + 1 (Leaderboard.rank bilan bir xil)"""
+        higher = 0
+        for value, count in zip(self.score_values, self.score_counts):
+            if value <= points:
+                break
+            higher += count
+        return higher + 1
@@ -0,0 +1,35 @@
+# django_app/core/signals/cache_signals.py
+"""
+Bot runtime cache larini DB o'zgarishlari bilan moslash
+    - BotSetUp (is_active va h.k.) - bot sozlamalari cache i (webhook_reply ham shu versiyani tekshiradi)
+    - Participant - cache dagi taklif posti (shared/referral_posts.py)
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..models import BotSetUp, Competition, Participant, User
+
+
+@receiver([post_save, post_delete], sender=BotSetUp)
+def clear_bot_settings(sender, instance, **kwargs):
+    from shared.redis_client import redis_client
+
+    if not redis_client.is_connected():
+        return
+    try:
+        redis_client.client.delete(f"bot_settings:{instance.id}", f"bot_settings_version:{instance.id}")
+    except Exception:
+        pass
+
+
+@receiver([post_save, post_delete], sender=Participant)
+def revoke_referral_post(sender, instance, **kwargs):
+    from shared import referral_posts
+    from shared.redis_client import redis_client
+
+    if not redis_client.is_connected():
+        return
+    bot_id = Competition.objects.filter(id=instance.competition_id).values_list('bot_id', flat=True).first()
+    telegram_id = User.objects.filter(id=instance.user_id).values_list('telegram_id', flat=True).first()
+    if bot_id and telegram_id:
+        referral_posts.revoke(bot_id, telegram_id)
@@ -1,45 +1,118 @@
 # django_app/core/tasks.py
 from celery import shared_task
-from django_app.core.models import Point, Referral, Participant
-import redis
-import json
 import logging
 
 logger = logging.getLogger(__name__)
-r = redis.Redis(host='localhost', port=6379, db=0)
 
 @shared_task
-def batch_save_data(bot_id: int):
-    """Redis dan DB ga ma'lumotlarni ko‘chiradi"""
+def flush_point_ledger():
+    """Write-behind ball ledger ni Redis dan DB ga ko'chirish (shared/point_ledger.py)"""
+    from shared.point_ledger import flush
     try:
-        # Referral larni olish
-        referrals = r.lrange(f"referrals:{bot_id}", 0, -1)
-        referral_objs = []
-        for ref in referrals:
-            data = json.loads(ref)
-            referral_objs.append(
-                Referral(
-                    referrer_id=data['referrer'],
-                    referred_id=data['referred'],
-                    competition_id=data['competition']
-                )
-            )
-        if referral_objs:
-            Referral.objects.bulk_create(referral_objs)
-            r.delete(f"referrals:{bot_id}")
-
-        # Ballarni olish
-        keys = r.keys(f"user_points:{bot_id}:*")
-        point_objs = []
-        for key in keys:
-            user_id = int(key.decode().split(":")[-1])
-            points = int(r.get(key) or 0)
-            participant = Participant.objects.get(user_id=user_id, competition_id=bot_id)
-            point_objs.append(Point(participant=participant, earned_points=points, reason='total'))
-        if point_objs:
-            Point.objects.bulk_create(point_objs)
-            r.delete(*keys)
-
-        logger.info(f"Bot {bot_id} uchun batch saqlash muvaffaqiyatli")
+        return flush()
     except Exception as e:
-        logger.error(f"Batch saqlash xatosi: {e}")
\ No newline at end of file
+        logger.error(f"Point ledger flush xatosi: {e}")
+        return None
+
+
+@shared_task
+def reconcile_leaderboard(competition_id: int):
+    """Redis ZSET reytingni Postgres dan qayta qurish va drift ni qaytarish"""
+    from shared.leaderboard import Leaderboard
+    try:
+        report = Leaderboard(competition_id).try_rebuild()
+        if report is None:
+            logger.info(f"Leaderboard {competition_id} rebuild skipped (locked yoki Redis yo'q)")
+        return report
+    except Exception as e:
+        logger.error(f"Reconcile leaderboard xatosi: {e}")
+        return None
+
+
+@shared_task
+def reconcile_all_leaderboards():
+    """Barcha aktiv konkurslar uchun reytingni reconcile qilish (periodik)"""
+    from django_app.core.models import Competition, CompetitionStatus
+    competition_ids = Competition.objects.filter(
+        status=CompetitionStatus.ACTIVE
+    ).values_list('id', flat=True)
+    return [reconcile_leaderboard(competition_id) for competition_id in competition_ids]
+
+
+@shared_task
+def snapshot_leaderboard(competition_id: int):
+    """Reyting snapshot ini olish (tarix uchun)"""
+    from shared.leaderboard_history import take_snapshot
+    try:
+        snapshot = take_snapshot(competition_id)
+        return snapshot.id if snapshot else None
+    except Exception as e:
+        logger.error(f"Snapshot leaderboard xatosi: {e}")
+        return None
+
+
+@shared_task
+def snapshot_all_leaderboards():
+    """Barcha aktiv konkurslar uchun reyting snapshot (periodik, masalan har soatda)"""
+    from django_app.core.models import Competition, CompetitionStatus
+    competition_ids = Competition.objects.filter(
+        status=CompetitionStatus.ACTIVE
+    ).values_list('id', flat=True)
+    return [snapshot_leaderboard(competition_id) for competition_id in competition_ids]
+
+
+@shared_task(bind=True)
+def rescore_competition(self, competition_id: int, changes: dict, job_id: str):
+    """
+    PointRule o'zgarganda konkurs ballarini qayta hisoblash (fon ishi)
+
+    Progress Celery state orqali: PROGRESS {processed, total}
+    """
+    from shared.rescoring import rescore_competition as _rescore
+
+    def _progress(processed: int, total: int):
+        self.update_state(state='PROGRESS', meta={'processed': processed, 'total': total})
+        logger.info(f"Rescore {competition_id}: {processed}/{total}")
+
+    try:
+        changes = {reason: tuple(values) for reason, values in changes.items()}
+        return _rescore(competition_id, changes, job_id, on_progress=_progress)
+    except Exception as e:
+        logger.error(f"Rescore competition xatosi: {e}")
+        raise
+
+
+@shared_task
+def audit_points(competition_id: int = None, repair: bool = False):
+    """current_points ni Point ledger bilan solishtirish (periodik, masalan kechasi)"""
+    from shared.points_audit import audit_points as _audit
+    try:
+        report = _audit(competition_id=competition_id, repair=repair)
+        # Celery result uchun ixcham
+        return {key: report[key] for key in ('checked', 'mismatched', 'repaired')}
+    except Exception as e:
+        logger.error(f"Points audit xatosi: {e}")
+        return None
+
+
+@shared_task
+def send_broadcast(broadcast_id: int):
+    """Broadcast ni yuborish (cursor dan davom etadi)"""
+    import asyncio
+    from shared.broadcast import run_broadcast
+    try:
+        return asyncio.run(run_broadcast(broadcast_id))
+    except Exception as e:
+        logger.error(f"Broadcast {broadcast_id} xatosi: {e}")
+        return None
+
+
+@shared_task
+def resume_broadcasts():
+    """running holatida qolib ketgan broadcast larni qayta ishga tushirish (periodik, masalan har 5 daqiqada)"""
+    from django_app.core.models import Broadcast, BroadcastStatus
+    broadcast_ids = list(Broadcast.objects.filter(status=BroadcastStatus.RUNNING).values_list('id', flat=True))
+    for broadcast_id in broadcast_ids:
+        # Lock band bo'lsa (runner tirik) task darhol qaytadi
+        send_broadcast.delay(broadcast_id)
+    return broadcast_ids
@@ -1,3 +1,1175 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from django_app.core.models import BotSetUp, Competition, Participant, Point, Referral, User
+from django_app.core.models.pointrule import PointAction
+from shared import point_ledger
+from shared.redis_client import redis_client
+
+# Hot query lar seq scan ga tushmasligi uchun seed hajmi
+SEED_PARTICIPANTS = 1_000_000
+
+HOT_TABLES = {'core_participant', 'core_point', 'core_referral'}
+
+
+def _seq_scans(plan: dict) -> list:
+    """EXPLAIN (FORMAT JSON) planidan hot jadvallardagi Seq Scan node larini yig'ish"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in HOT_TABLES:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN testlari faqat PostgreSQL uchun")
+class HotQueryPlanTests(TestCase):
+    """Reyting, rank, statistika va referral query lari index ishlatishini tekshirish"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(telegram_id=1)
+        bot = BotSetUp.objects.create(owner=owner, bot_username='plan_test_bot', encrypted_token='gAAAA-test')
+        cls.competition = Competition.objects.create(bot=bot, name='Plan test')
+
+        # ORM orqali 1M qator juda sekin - generate_series bilan seed qilamiz
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO core_user (telegram_id, username, is_premium, role, joined_at)
+                SELECT 1000 + g, 'user_' || g, false, 'participant', now()
+                FROM generate_series(1, %s) AS g
+                """,
+                [SEED_PARTICIPANTS],
+            )
+            cursor.execute(
+                """
+                INSERT INTO core_participant (user_id, competition_id, is_participant, current_points,
+                                              referral_code, channels_joined, is_blocked, created_at, updated_at)
+                SELECT u.id, %s, (u.telegram_id %% 10 <> 0), (random() * 10000)::int,
+                       md5(u.telegram_id::text), '[]'::jsonb, false, now(), now()
+                FROM core_user u
+                WHERE u.telegram_id > 1000
+                """,
+                [cls.competition.id],
+            )
+            cursor.execute(
+                """
+                INSERT INTO core_point (participant_id, earned_points, reason, created_at, updated_at)
+                SELECT p.id, 1, r.reason, now(), now()
+                FROM core_participant p
+                CROSS JOIN (VALUES (%s), (%s)) AS r(reason)
+                WHERE p.competition_id = %s
+                """,
+                [PointAction.CHANNEL_JOIN, PointAction.REFERRAL, cls.competition.id],
+            )
+            cursor.execute(
+                """
+                INSERT INTO core_referral (referrer_id, referred_id, competition_id, created_at, updated_at)
+                SELECT a.id, b.id, %s, now(), now()
+                FROM core_user a
+                JOIN core_user b ON b.telegram_id = a.telegram_id + 1
+                WHERE a.telegram_id > 1000 AND a.telegram_id %% 3 = 0
+                """,
+                [cls.competition.id],
+            )
+            cursor.execute("ANALYZE core_user, core_participant, core_point, core_referral")
+
+        cls.participant = Participant.objects.filter(competition=cls.competition, is_participant=True).first()
+
+    def assertNoSeqScan(self, queryset):
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        self.assertEqual(_seq_scans(plan), [], f"Seq scan topildi:\n{json.dumps(plan, indent=2)}")
+
+    def test_rating_top_10_uses_index(self):
+        qs = Participant.objects.filter(
+            competition__bot_id=self.competition.bot_id,
+            is_participant=True
+        ).select_related('user').order_by('-current_points')[:10]
+        self.assertNoSeqScan(qs)
+
+    def test_rank_count_uses_index(self):
+        qs = Participant.objects.filter(
+            competition__bot_id=self.competition.bot_id,
+            is_participant=True,
+            current_points__gt=9990
+        )
+        self.assertNoSeqScan(qs)
+
+    def test_points_breakdown_uses_index(self):
+        qs = Point.objects.filter(
+            participant=self.participant,
+            reason=PointAction.CHANNEL_JOIN
+        ).values('participant').annotate(total=Sum('earned_points'))
+        self.assertNoSeqScan(qs)
+
+    def test_referral_count_uses_index(self):
+        qs = Referral.objects.filter(referrer=self.participant.user, competition=self.competition)
+        self.assertNoSeqScan(qs)
+
+    def test_referral_code_lookup_uses_index(self):
+        qs = Participant.objects.filter(
+            competition=self.competition,
+            referral_code=self.participant.referral_code,
+            is_participant=True
+        )
+        self.assertNoSeqScan(qs)
+
+
+@skipUnless(connection.vendor == 'postgresql' and redis_client.is_connected(), "PostgreSQL va Redis kerak")
+class PointLedgerTests(TestCase):
+    """Write-behind ledger: batch flush va qulashdan keyin qayta ishga tushish"""
+
+    def setUp(self):
+        redis_client.client.delete(point_ledger.STREAM_KEY)
+        owner = User.objects.create(telegram_id=1)
+        bot = BotSetUp.objects.create(owner=owner, bot_username='ledger_test_bot', encrypted_token='gAAAA-test')
+        self.competition = Competition.objects.create(bot=bot, name='Ledger test')
+        self.referrer = Participant.objects.create(
+            user=User.objects.create(telegram_id=2), competition=self.competition, is_participant=True
+        )
+
+    def tearDown(self):
+        redis_client.client.delete(point_ledger.STREAM_KEY)
+
+    def _award(self, count, points=5):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                self.referrer.add_points(points, PointAction.REFERRAL)
+
+    def test_flush_applies_awards_in_batches(self):
+        self._award(25)
+        report = point_ledger.flush(batch_size=10)
+
+        self.referrer.refresh_from_db()
+        self.assertEqual(report, {'entries': 25, 'batches': 3})
+        self.assertEqual(self.referrer.current_points, 125)
+        self.assertEqual(Point.objects.filter(participant=self.referrer).count(), 25)
+        # Breakdown counter lar Point bilan bitta batch da
+        self.assertEqual(self.referrer.referral_points, 125)
+        # referral_count - Referral yozuvlaridan (award referrals=...), ball dan emas
+        self.assertEqual(self.referrer.referral_count, 0)
+
+    def test_replay_after_crash_does_not_double_apply(self):
+        self._award(3)
+        # Checkpoint commit bo'ldi, lekin XTRIM gacha qulab qoldi
+        with mock.patch.object(redis_client.client, 'xtrim', side_effect=ConnectionError):
+            point_ledger.flush()
+
+        self._award(1)
+        point_ledger.flush()
+
+        self.referrer.refresh_from_db()
+        self.assertEqual(self.referrer.current_points, 20)
+        self.assertEqual(Point.objects.filter(participant=self.referrer).count(), 4)
+
+    def test_duplicate_source_ref_is_credited_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(2):
+                point_ledger.award(self.referrer.id, self.competition.id, 2, 5, PointAction.REFERRAL,
+                                   source_ref='referred:100', referrals=1)
+        point_ledger.flush()
+
+        # Retry keyingi batch da keladi - DB dagi yozuv bilan solishtiriladi
+        with self.captureOnCommitCallbacks(execute=True):
+            self.referrer.add_points(5, PointAction.REFERRAL, source_ref='referred:100')
+        point_ledger.flush()
+
+        # Taklif qilingan foydalanuvchi premium bo'lib qolsa ham - reason boshqa, manba bitta
+        with self.captureOnCommitCallbacks(execute=True):
+            self.referrer.add_points(10, PointAction.PREMIUM_REFERRAL, source_ref='referred:100')
+        point_ledger.flush()
+
+        self.referrer.refresh_from_db()
+        self.assertEqual(self.referrer.current_points, 5)
+        self.assertEqual(self.referrer.referral_count, 1)
+        self.assertEqual(Point.objects.filter(participant=self.referrer, source_ref='referred:100').count(), 1)
+
+    def test_flush_releases_only_its_own_lock(self):
+        from shared.constants import CACHE_KEYS
+
+        lock_key = CACHE_KEYS['points_ledger_lock']
+        self._award(3)
+        try:
+            redis_client.client.set(lock_key, 'other')
+            self.assertEqual(point_ledger.flush(), {'entries': 0, 'batches': 0, 'skipped': 1})
+
+            # Lock muddati o'tib boshqa flusher olgan - uning lock i o'chirilmaydi
+            redis_client.client.delete(lock_key)
+            flush_batch = point_ledger._flush_batch
+
+            def expired(client, batch_size):
+                client.set(lock_key, 'other')
+                return flush_batch(client, batch_size)
+
+            with mock.patch.object(point_ledger, '_flush_batch', expired):
+                # Birinchi batch dan keyin lock boshqaniki - flush to'xtaydi
+                self.assertEqual(point_ledger.flush(batch_size=2), {'entries': 2, 'batches': 1})
+            self.assertEqual(redis_client.client.get(lock_key), 'other')
+        finally:
+            redis_client.client.delete(lock_key)
+
+
+@skipUnless(connection.vendor == 'postgresql' and redis_client.is_connected(), "PostgreSQL va Redis kerak")
+class LeaderboardRebuildTests(TestCase):
+    """Rebuild parallel ball o'zgarishlarini yo'qotmasligi kerak"""
+
+    def setUp(self):
+        from shared.leaderboard import Leaderboard
+
+        owner = User.objects.create(telegram_id=1)
+        bot = BotSetUp.objects.create(owner=owner, bot_username='leaderboard_test_bot', encrypted_token='gAAAA-test')
+        self.competition = Competition.objects.create(bot=bot, name='Leaderboard test')
+        for telegram_id, points in ((10, 5), (11, 7)):
+            Participant.objects.create(user=User.objects.create(telegram_id=telegram_id), competition=self.competition,
+                                       is_participant=True, current_points=points)
+        self.leaderboard = Leaderboard(self.competition.id)
+        redis_client.client.delete(self.leaderboard.key, self.leaderboard.ready_key)
+
+    def tearDown(self):
+        redis_client.client.delete(self.leaderboard.key, self.leaderboard.ready_key)
+
+    def test_concurrent_incr_survives_rebuild(self):
+        from shared.leaderboard import Leaderboard
+
+        self.leaderboard.set_score(10, 5)
+        self.leaderboard.set_score(99, 1)  # DB da yo'q
+        original = Leaderboard._fix_chunk
+
+        def fix_chunk(leaderboard, *args):
+            # DB snapshot olingandan keyin kelgan award
+            leaderboard.incr(10, 3)
+            return original(leaderboard, *args)
+
+        with mock.patch.object(Leaderboard, '_fix_chunk', fix_chunk):
+            report = self.leaderboard.rebuild()
+
+        self.assertEqual((report['missing'], report['mismatched'], report['skipped'], report['extra']), (1, 1, 1, 1))
+        self.assertEqual(self.leaderboard.range(0, -1), [(10, 8), (11, 7)])
+        self.assertGreater(redis_client.client.ttl(self.leaderboard.ready_key), 0)
+
+        # Reytingda yo'q (is_participant emas) - incr qo'shmaydi
+        self.leaderboard.incr(12, 4)
+        self.assertEqual(self.leaderboard.count(), 2)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Audit testlari faqat PostgreSQL uchun")
+class PointsAuditTests(TestCase):
+    """current_points va Point ledger solishtiruvi"""
+
+    def test_audit_reports_and_repairs_drift(self):
+        from shared.points_audit import audit_points
+
+        owner = User.objects.create(telegram_id=1)
+        bot = BotSetUp.objects.create(owner=owner, bot_username='audit_test_bot', encrypted_token='gAAAA-test')
+        competition = Competition.objects.create(bot=bot, name='Audit test')
+        ok, drifted = [
+            Participant.objects.create(
+                user=User.objects.create(telegram_id=telegram_id), competition=competition,
+                is_participant=True, current_points=current
+            )
+            for telegram_id, current in ((2, 5), (3, 12))
+        ]
+        Point.objects.create(participant=ok, earned_points=5, reason=PointAction.CHANNEL_JOIN)
+        Point.objects.create(participant=drifted, earned_points=7, reason=PointAction.CHANNEL_JOIN)
+
+        report = audit_points(competition_id=competition.id, repair=True, chunk_size=1)
+
+        drifted.refresh_from_db()
+        self.assertEqual((report['checked'], report['mismatched'], report['repaired']), (2, 1, 1))
+        self.assertEqual(drifted.current_points, 7)
+        self.assertEqual(audit_points(competition_id=competition.id)['mismatched'], 0)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Registration SQL faqat PostgreSQL uchun")
+@override_settings(DB_EXECUTOR_THREADS=0)  # TestCase transaction i faqat asosiy thread da
+class RegistrationQueryBudgetTests(TestCase):
+    """Ro'yxatdan o'tish - eng issiq yozish yo'li, query soni cheklangan"""
+
+    # Savepoint larsiz: yangi ishtirokchi uchun bitta statement
+    NEW_REGISTRATION_BUDGET = 1
+    ALREADY_REGISTERED_BUDGET = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(telegram_id=1)
+        bot = BotSetUp.objects.create(owner=owner, bot_username='reg_test_bot', encrypted_token='gAAAA-test')
+        cls.competition = Competition.objects.create(bot=bot, name='Registration test')
+        cls.referrer = Participant.objects.create(
+            user=User.objects.create(telegram_id=2), competition=cls.competition,
+            is_participant=True, referral_code='REFCODE1'
+        )
+        cls.settings = {
+            'id': cls.competition.id,
+            'channels': [{'id': 1}, {'id': 2}],
+            'point_rules': {'channel_join': 3, 'referral': 5, 'premium_referral': 10},
+        }
+
+    def _register(self, telegram_id, referral_code=None):
+        from bots.user_bots.base_template.services.registration_service import RegistrationService
+
+        user_data = {'telegram_id': telegram_id, 'username': f'user_{telegram_id}', 'first_name': 'Test',
+                     'last_name': '', 'is_premium': False}
+        with CaptureQueriesContext(connection) as ctx:
+            result = async_to_sync(RegistrationService(self.competition.bot_id).register_user)(
+                user_data, referral_code, self.settings
+            )
+        queries = [q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        return result, queries
+
+    def test_new_registration_within_budget(self):
+        result, queries = self._register(100, referral_code='REFCODE1')
+
+        self.assertTrue(result['success'])
+        self.assertFalse(result['already_registered'])
+        self.assertLessEqual(len(queries), self.NEW_REGISTRATION_BUDGET, [q['sql'] for q in queries])
+
+        participant = Participant.objects.get(user__telegram_id=100, competition=self.competition)
+        self.assertTrue(participant.is_participant)
+        self.assertEqual((participant.current_points, participant.channel_points), (6, 6))
+        self.assertEqual(participant.referral_code, result['participant'].referral_code)
+        self.assertTrue(Point.objects.filter(participant=participant, source_ref='registration').exists())
+        self.assertTrue(Referral.objects.filter(
+            referrer=self.referrer.user, referred=participant.user, competition=self.competition
+        ).exists())
+
+    def test_already_registered_within_budget(self):
+        self._register(101)
+        result, queries = self._register(101)
+
+        self.assertTrue(result['already_registered'])
+        self.assertLessEqual(len(queries), self.ALREADY_REGISTERED_BUDGET, [q['sql'] for q in queries])
+        self.assertEqual(Point.objects.filter(participant=result['participant']).count(), 1)
+
+    def test_referral_counted_when_rule_is_zero(self):
+        from bots.user_bots.base_template.services.registration_service import RegistrationService
+
+        user_data = {'telegram_id': 104, 'username': 'user_104', 'first_name': 'Test', 'last_name': '',
+                     'is_premium': False}
+        settings = dict(self.settings, point_rules={'channel_join': 3, 'referral': 0})
+        with self.captureOnCommitCallbacks(execute=True):
+            async_to_sync(RegistrationService(self.competition.bot_id).register_user)(user_data, 'REFCODE1', settings)
+        point_ledger.flush()
+
+        self.referrer.refresh_from_db()
+        self.assertEqual((self.referrer.referral_count, self.referrer.current_points), (1, 0))
+
+    def test_rejoin_does_not_credit_channel_points_twice(self):
+        self._register(102)
+        Participant.objects.filter(user__telegram_id=102).update(is_participant=False)
+        result, _ = self._register(102)
+
+        participant = Participant.objects.get(user__telegram_id=102, competition=self.competition)
+        self.assertTrue(participant.is_participant)
+        self.assertEqual((participant.current_points, participant.channel_points), (6, 6))
+        self.assertEqual(result['channel_points'], 0)
+        self.assertEqual(Point.objects.filter(participant=participant).count(), 1)
+
+    def test_taken_code_on_activation_is_retried(self):
+        from bots.user_bots.base_template.services import registration_service
+
+        Participant.objects.create(user=User.objects.create(telegram_id=103), competition=self.competition)
+        with mock.patch.object(registration_service, '_generate_referral_code', side_effect=['REFCODE1', 'FRESH001']):
+            result, _ = self._register(103)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['participant'].referral_code, 'FRESH001')
+
+
+@skipUnless(connection.vendor == 'postgresql', "Registration SQL faqat PostgreSQL uchun")
+class RegistrationBatchTests(TestCase):
+    """Group-commit: bir nechta ro'yxatdan o'tish bitta transaction da"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(telegram_id=1)
+        bot = BotSetUp.objects.create(owner=owner, bot_username='batch_test_bot', encrypted_token='gAAAA-test')
+        cls.competition = Competition.objects.create(bot=bot, name='Batch test')
+        cls.settings = {
+            'id': cls.competition.id,
+            'channels': [{'id': 1}],
+            'point_rules': {'channel_join': 2},
+            'registration_batch': {'enabled': True, 'size': 10, 'latency_ms': 50},
+        }
+
+    def test_commit_batch_keeps_order_and_isolates_duplicates(self):
+        from bots.user_bots.base_template.services.registration_batcher import RegistrationBatcher
+
+        batch = [
+            ({'telegram_id': telegram_id, 'username': f'u{telegram_id}'}, None, self.settings, None)
+            for telegram_id in (300, 200, 300)
+        ]
+        results = RegistrationBatcher(self.competition.bot_id)._commit_sync(batch)
+
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertEqual([r['already_registered'] for r in results], [False, False, True])
+        self.assertEqual(
+            Participant.objects.filter(competition=self.competition, is_participant=True).count(), 2
+        )
+        self.assertEqual(results[1]['participant'].user.telegram_id, 200)
+
+
+class DBExecutorTests(SimpleTestCase):
+    """DB executor - chaqiruvlar pool thread larida parallel bajariladi"""
+
+    def test_calls_run_in_parallel_on_pool_threads(self):
+        from shared.db_executor import DBExecutor
+
+        executor = DBExecutor(max_workers=4)
+        self.addCleanup(executor.shutdown)
+
+        def work():
+            time.sleep(0.1)
+            return threading.current_thread().name
+
+        async def run_all():
+            return await asyncio.gather(*[executor.run(work) for _ in range(8)])
+
+        started = time.monotonic()
+        names = async_to_sync(run_all)()
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(all(name.startswith('db') for name in names))
+        self.assertEqual(len(set(names)), 4)
+        # 8 x 100ms, 4 thread - ketma-ket bo'lganda 0.8s
+        self.assertLess(elapsed, 0.5)
+
+
+@skipUnless(redis_client.is_connected(), "Redis kerak")
+class ChannelMembershipCacheTests(SimpleTestCase):
+    """Kanal a'zoligi cache: takroriy tekshiruv Telegram API ga bormaydi"""
+
+    USER_ID = 900001
+
+    def setUp(self):
+        self.channels = [{'id': 1, 'channel_id': -1001}, {'id': 2, 'channel_id': -1002}]
+        self._clear()
+        self.addCleanup(self._clear)
+
+    def _clear(self):
+        from shared.constants import CACHE_KEYS
+        redis_client.client.delete(
+            CACHE_KEYS['channel_recheck'].format(bot_id=1, user_id=self.USER_ID),
+            *[CACHE_KEYS['channel_member'].format(chat_id=ch['channel_id'], user_id=self.USER_ID)
+              for ch in self.channels]
+        )
+
+    def _bot(self, statuses):
+        bot = mock.Mock()
+        bot.get_chat_member = mock.AsyncMock(
+            side_effect=lambda chat_id, user_id: mock.Mock(status=statuses[chat_id])
+        )
+        return bot
+
+    def _check(self, bot, recheck=False):
+        from bots.user_bots.base_template.services.channel_service import ChannelService
+        return async_to_sync(ChannelService({'bot_id': 1, 'channels': self.channels}).check_user_channels)(
+            self.USER_ID, bot, recheck=recheck
+        )
+
+    def test_repeated_checks_use_cache_and_recheck_refreshes_negatives(self):
+        bot = self._bot({-1001: 'member', -1002: 'left'})
+        self.assertFalse(self._check(bot)['all_joined'])
+        self.assertEqual(bot.get_chat_member.await_count, 2)
+
+        self._check(bot)
+        self.assertEqual(bot.get_chat_member.await_count, 2)
+
+        # Foydalanuvchi qo'shildi va "A'zo bo'ldim" bosdi - faqat salbiy natija qayta so'raladi
+        bot = self._bot({-1001: 'member', -1002: 'member'})
+        self.assertTrue(self._check(bot, recheck=True)['all_joined'])
+        self.assertEqual(bot.get_chat_member.await_count, 1)
+
+    def test_chat_member_updates_maintain_member_set(self):
+        from shared.channel_membership import apply_update
+        from shared.constants import CACHE_KEYS
+
+        chat = {'id': -1002, 'type': 'channel'}
+        members_key = CACHE_KEYS['channel_members'].format(chat_id=-1002)
+        self.addCleanup(redis_client.client.delete, members_key)
+
+        def update(status):
+            return {'chat_member': {'chat': chat, 'from': {'id': self.USER_ID},
+                                    'new_chat_member': {'status': status, 'user': {'id': self.USER_ID}}}}
+
+        apply_update(update('member'))
+        bot = self._bot({-1001: 'member', -1002: 'left'})
+        self.assertTrue(self._check(bot)['all_joined'])
+        self.assertEqual(bot.get_chat_member.await_count, 1)  # faqat -1001 - SET da yo'q
+
+        apply_update(update('left'))
+        self.assertIsNone(redis_client.client.zscore(members_key, self.USER_ID))
+        self.assertFalse(self._check(self._bot({-1001: 'member', -1002: 'left'}))['all_joined'])
+
+
+class RateGovernorTests(SimpleTestCase):
+    """Bot API governor: chat limiti, deadline va RetryAfter dan keyin qayta urinish"""
+
+    def setUp(self):
+        from shared.telegram_governor import RateGovernor
+        self.governor = RateGovernor(bot_id=1)
+
+    def test_chat_burst_then_deadline(self):
+        from aiogram.methods import SendMessage
+        from shared.telegram_governor import RateLimitDeadline
+
+        method = SendMessage(chat_id=42, text='x')
+        deadline = time.monotonic() + 0.1
+        for _ in range(3):  # chat_burst
+            async_to_sync(self.governor.acquire)(method, deadline)
+
+        with self.assertRaises(RateLimitDeadline):
+            async_to_sync(self.governor.acquire)(method, deadline)
+        # Rad etilgan rezervatsiya qaytarildi - navbat o'smaydi
+        self.assertGreater(self.governor.chats[42].tokens, -1)
+        self.assertEqual(self.governor.stats['deadline_exceeded'], 1)
+
+    def test_retry_after_is_retried(self):
+        from aiogram.exceptions import TelegramRetryAfter
+        from aiogram.methods import SendMessage
+        from shared import telegram_governor
+
+        method = SendMessage(chat_id=43, text='x')
+        bot = mock.Mock(id=1)
+        make_request = mock.AsyncMock(side_effect=[TelegramRetryAfter(method, 'Flood', retry_after=0), 'ok'])
+
+        with mock.patch.object(telegram_governor, '_governors', {1: self.governor}):
+            result = async_to_sync(telegram_governor.RateGovernorMiddleware())(make_request, bot, method)
+
+        self.assertEqual(result, 'ok')
+        self.assertEqual(make_request.await_count, 2)
+        self.assertEqual(self.governor.stats['retry_after'], 1)
+
+    def test_retry_after_scope(self):
+        from aiogram.methods import SendMessage
+
+        now = time.monotonic()
+        self.governor.retry_after(SendMessage(chat_id=-100, text='x'), 5)
+        self.assertGreater(self.governor.chats[-100].blocked_until, now)
+        self.assertLessEqual(self.governor.messages.blocked_until, now)
+
+        # Private chat - bot bo'yicha limit ham
+        self.governor.retry_after(SendMessage(chat_id=44, text='x'), 5)
+        self.assertGreater(self.governor.messages.blocked_until, now)
+
+    @override_settings(TELEGRAM_RATE_SHARE=0.5)
+    def test_rate_share(self):
+        from shared.constants import TELEGRAM_RATE_LIMITS
+        from shared.telegram_governor import RateGovernor
+
+        governor = RateGovernor(bot_id=2)
+        self.assertEqual(governor.messages.rate, TELEGRAM_RATE_LIMITS['messages_per_second'] * 0.5)
+
+
+class AsyncDbTests(SimpleTestCase):
+    """async_db: Django konvertorlari va uzilgan connection da qayta urinish"""
+
+    def test_converters_applied(self):
+        import psycopg2.extensions
+        from shared import async_db
+
+        conn = mock.Mock(closed=0)
+        with mock.patch('psycopg2.connect', return_value=conn), \
+                mock.patch.object(async_db, '_wait', mock.AsyncMock()), \
+                mock.patch('psycopg2.extras.register_default_jsonb') as register:
+            async_to_sync(async_db.AsyncPool(1)._connect)()
+
+        # Connection da ro'yxatdan o'tgan jsonb typecaster - psycopg2 qaytaradigan qiymat
+        self.assertIs(register.call_args.kwargs['conn_or_curs'], conn)
+        loads = register.call_args.kwargs['loads']
+        jsonb = psycopg2.extensions.new_type((3802,), 'JSONB', lambda value, cursor: loads(value))
+        raw = jsonb('[3, 4]', None)
+
+        compiled = async_db._compile(Participant.objects.filter(id=1).values_list('id', 'channels_joined'))
+        self.assertEqual(async_db._convert(compiled[0], [(1, raw)]), [(1, [3, 4])])
+
+    def test_lost_connection_is_retried_once(self):
+        import psycopg2
+        from shared import async_db
+
+        conns = [mock.Mock(closed=1), mock.Mock(closed=0)]
+        pool = mock.Mock(stats={'queries': 0, 'reconnects': 0}, acquire=mock.AsyncMock(side_effect=conns))
+        run = mock.AsyncMock(side_effect=[psycopg2.OperationalError('server closed the connection'), [(1,)]])
+
+        with mock.patch.object(async_db, '_run', run):
+            rows = async_to_sync(async_db._execute)(pool, 'SELECT 1', None)
+
+        self.assertEqual(rows, [(1,)])
+        self.assertEqual(pool.stats['reconnects'], 1)
+        pool.release.assert_has_calls([mock.call(conns[0], True), mock.call(conns[1], False)])
+
+
+@override_settings(OUTBOUND_QUEUE_SENDERS=2)
+class OutboundQueueTests(SimpleTestCase):
+    """Handler xabarlari navbati: chat ichida tartib, vaqtinchalik xatoda qayta urinish"""
+
+    def _run(self, side_effect=None):
+        from aiogram.methods import SendMessage
+        from shared import outbound_queue
+
+        sent = []
+
+        async def fake_call(method):
+            if side_effect:
+                side_effect(method)
+            sent.append((method.chat_id, method.text))
+
+        async def scenario():
+            bot = outbound_queue.create_queued_bot('123456:ABCdefGhIJKlmnoPQRstuVWXyz')
+            with mock.patch.object(outbound_queue.OutboundQueue, '_bot', return_value=fake_call):
+                for i in range(5):
+                    for chat_id in (10, 11, 12):
+                        self.assertIsNone(await bot(SendMessage(chat_id=chat_id, text=str(i))))
+                stats = outbound_queue.get_stats()
+                await outbound_queue.shutdown()
+            await bot.session.close()
+            return stats
+
+        stats = async_to_sync(scenario)()
+        return sent, stats
+
+    def test_per_chat_order(self):
+        sent, stats = self._run()
+        self.assertEqual(stats['enqueued'], 15)
+        for chat_id in (10, 11, 12):
+            self.assertEqual([text for cid, text in sent if cid == chat_id], ['0', '1', '2', '3', '4'])
+
+    def test_network_error_is_retried(self):
+        from aiogram.exceptions import TelegramNetworkError
+        from shared.constants import OUTBOUND_QUEUE_SETTINGS
+
+        failed = set()
+
+        def flaky(method):
+            if method.text == '2' and method.chat_id not in failed:
+                failed.add(method.chat_id)
+                raise TelegramNetworkError(method, 'timeout')
+
+        with mock.patch.dict(OUTBOUND_QUEUE_SETTINGS, retry_delay=0):
+            sent, _ = self._run(flaky)
+
+        self.assertEqual(len(sent), 15)
+        self.assertEqual([text for cid, text in sent if cid == 10], ['0', '1', '2', '3', '4'])
+
+    def test_slow_chat_does_not_block_others(self):
+        from aiogram.methods import SendMessage
+        from shared import outbound_queue
+
+        sent = []
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def fake_call(method):
+                if method.chat_id == 10:
+                    await release.wait()
+                sent.append(method.chat_id)
+
+            bot = outbound_queue.create_queued_bot('123456:ABCdefGhIJKlmnoPQRstuVWXyz')
+            with mock.patch.object(outbound_queue.OutboundQueue, '_bot', return_value=fake_call):
+                await bot(SendMessage(chat_id=10, text='slow'))
+                for _ in range(3):
+                    await bot(SendMessage(chat_id=11, text='x'))
+                await asyncio.sleep(0.05)
+                self.assertEqual(sent, [11, 11, 11])
+                release.set()
+                await outbound_queue.shutdown()
+            await bot.session.close()
+
+        async_to_sync(scenario)()
+        self.assertEqual(sent, [11, 11, 11, 10])
+
+    def test_full_queue_waits(self):
+        from shared.constants import OUTBOUND_QUEUE_SETTINGS
+
+        with mock.patch.dict(OUTBOUND_QUEUE_SETTINGS, max_size=1):
+            sent, stats = self._run()
+
+        self.assertGreater(stats['waited'], 0)
+        for chat_id in (10, 11, 12):
+            self.assertEqual([text for cid, text in sent if cid == chat_id], ['0', '1', '2', '3', '4'])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Broadcast ArrayField faqat PostgreSQL uchun")
+class BroadcastTests(TestCase):
+    """Broadcast: keyset sahifalar, cursor va natijalarni saqlash"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django_app.core.models import Broadcast
+
+        owner = User.objects.create(telegram_id=1)
+        bot = BotSetUp.objects.create(owner=owner, bot_username='broadcast_test_bot', encrypted_token='gAAAA-test')
+        cls.competition = Competition.objects.create(bot=bot, name='Broadcast test')
+        for telegram_id in range(500, 505):
+            Participant.objects.create(
+                user=User.objects.create(telegram_id=telegram_id), competition=cls.competition, is_participant=True
+            )
+        cls.broadcast = Broadcast.objects.create(competition=cls.competition, text='Natijalar!')
+
+    def test_pages_resume_from_cursor(self):
+        from django_app.core.models import BroadcastStatus
+        from shared import broadcast as engine
+
+        started = engine._start(self.broadcast.id)
+        self.assertEqual(started.total_count, 5)
+
+        with mock.patch.dict(engine.BROADCAST_SETTINGS, page_size=3):
+            page = engine._next_page(self.competition.id, 0)
+            self.assertEqual([telegram_id for _, telegram_id in page], [500, 501, 502])
+            status = engine._save_page(self.broadcast.id, page[-1][0], [
+                (500, engine.DELIVERED), (501, engine.BLOCKED), (502, engine.FAILED)
+            ])
+            self.assertEqual(status, BroadcastStatus.RUNNING)
+
+            # Qayta ishga tushsa - cursor dan keyingi sahifa
+            resumed = engine._start(self.broadcast.id)
+            page = engine._next_page(self.competition.id, resumed.cursor)
+            self.assertEqual([telegram_id for _, telegram_id in page], [503, 504])
+            engine._save_page(self.broadcast.id, page[-1][0], [(503, engine.BLOCKED), (504, engine.DELIVERED)])
+
+        self.broadcast.refresh_from_db()
+        self.assertEqual(
+            (self.broadcast.delivered_count, self.broadcast.blocked_count, self.broadcast.failed_count), (2, 2, 1)
+        )
+        self.assertEqual(self.broadcast.blocked_ids, [501, 503])
+        self.assertEqual(self.broadcast.failed_ids, [502])
+        self.assertEqual(self.broadcast.progress, 100.0)
+
+    def test_deliver_classifies_errors(self):
+        from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+        from aiogram.methods import SendMessage
+        from shared import broadcast as engine
+
+        method = SendMessage(chat_id=1, text='x')
+        bot = mock.Mock()
+        bot.send_message = mock.AsyncMock(side_effect=[
+            None,
+            TelegramForbiddenError(method, 'bot was blocked by the user'),
+            TelegramBadRequest(method, 'Bad Request: chat not found'),
+            TelegramBadRequest(method, "Bad Request: can't parse entities"),
+        ])
+
+        async def deliver_all():
+            slots = asyncio.Semaphore(1)
+            return [await engine._deliver(bot, self.broadcast, 1, slots) for _ in range(4)]
+
+        self.assertEqual(
+            async_to_sync(deliver_all)(), [engine.DELIVERED, engine.BLOCKED, engine.BLOCKED, engine.FAILED]
+        )
+
+
+@mock.patch.dict('os.environ', {'TELEGRAM_BOT_TOKEN': '123456:ABCdefGhIJKlmnoPQRstuVWXyz'})
+class MainBotClientTests(SimpleTestCase):
+    """Main bot notification lari: umumiy loop da bitta client, boshqa loop da vaqtinchalik"""
+
+    def test_shared_client_reused_only_in_enabled_loop(self):
+        from bots.main_bot.services import notification_service as ns
+
+        async def scenario():
+            async with ns.main_bot_client() as first:
+                pass
+
+            ns.enable_shared_client()
+            try:
+                async with ns.main_bot_client() as second:
+                    pass
+                async with ns.main_bot_client() as third:
+                    pass
+                return first, second, third
+            finally:
+                await ns.close_shared_client()
+
+        first, second, third = async_to_sync(scenario)()
+        self.assertIs(second, third)
+        self.assertIsNot(first, second)
+
+    def test_send_batch_reports_each_message(self):
+        from bots.main_bot.services.notification_service import NotificationService
+
+        async def fake_send(self, chat_id, text, **kwargs):
+            if chat_id == 2:
+                raise RuntimeError('chat not found')
+
+        with mock.patch('aiogram.Bot.send_message', fake_send):
+            results = async_to_sync(NotificationService().send_batch)([
+                {'chat_id': 1, 'text': 'a'}, {'chat_id': 2, 'text': 'b'}, {'chat_id': 3, 'text': 'c'}
+            ])
+
+        self.assertEqual(results, [True, False, True])
+
+    def test_bot_run_notifications_go_through_send_batch(self):
+        from bots.main_bot.services.notification_service import NotificationService
+
+        service = NotificationService()
+        service.super_admin_id = '99'
+        with mock.patch.object(NotificationService, 'send_batch', mock.AsyncMock(return_value=[True, True])) as batch:
+            async_to_sync(service.send_bot_run_notifications)(5, 'demo_bot', 7)
+
+        messages = batch.await_args.args[0]
+        self.assertEqual([message['chat_id'] for message in messages], [5, 99])
+
+
+class RenderCacheTests(SimpleTestCase):
+    """Statik javoblar (bot_id, settings_version, view) bo'yicha bir marta render qilinadi"""
+
+    def setUp(self):
+        from bots.user_bots.base_template.cache import render_cache
+        render_cache.clear()
+        self.settings = {
+            'bot_id': 7, 'name': 'Test', 'description': '', 'rules_text': 'Qoida',
+            'channels': [{'channel_username': 'https://t.me/@kanal', 'channel_name': 'Kanal'}],
+            'prizes': [{'place': 1, 'prize_name': 'iPhone', 'prize_amount': None, 'type': 'number', 'description': ''}],
+        }
+
+    def test_rendered_once_per_settings_version(self):
+        from bots.user_bots.base_template.bot_processor import render_channels, render_prizes
+        from bots.user_bots.base_template.cache.render_cache import get_view
+
+        render = mock.Mock(side_effect=render_prizes)
+        first = get_view(self.settings, 'prizes', render)
+        self.assertIs(get_view(self.settings, 'prizes', render), first)
+        self.assertEqual(render.call_count, 1)
+        self.assertIn("*1-o'rin:* iPhone", first.text)
+
+        # Sozlama o'zgardi - versiya o'zgaradi, qayta render
+        changed = dict(self.settings, prizes=[dict(self.settings['prizes'][0], prize_name='MacBook')])
+        self.assertIn('MacBook', get_view(changed, 'prizes', render).text)
+        self.assertEqual(render.call_count, 2)
+
+        keyboard = get_view(self.settings, 'channels', render_channels).reply_markup
+        self.assertEqual(keyboard.inline_keyboard[0][0].url, 'https://t.me/kanal')
+        self.assertEqual(keyboard.inline_keyboard[-1][0].callback_data, 'check_subscription')
+
+    def test_processor_sends_cached_view(self):
+        from bots.user_bots.base_template.bot_processor import BotProcessor
+
+        processor = BotProcessor(7)
+        processor.settings = self.settings
+        processor.bot = mock.Mock(send_message=mock.AsyncMock())
+
+        for _ in range(2):
+            async_to_sync(processor._handle_rules)({'from': {'id': 1}})
+
+        first, second = processor.bot.send_message.await_args_list
+        self.assertEqual(first.kwargs['text'], "📜 *KONKURS QOIDALARI*\n\nQoida")
+        self.assertIs(first.kwargs['text'], second.kwargs['text'])
+
+    def _verified_marks(self):
+        """referral_posts belgilari - Redis o'rniga xotirada"""
+        from shared import referral_posts
+
+        verified = set()
+        patcher = mock.patch.multiple(
+            referral_posts,
+            is_verified=lambda bot_id, user_id: (bot_id, user_id) in verified,
+            mark_verified=lambda bot_id, user_id: verified.add((bot_id, user_id))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return verified
+
+    def test_referral_post_cached_per_participant(self):
+        from urllib.parse import quote
+        from bots.user_bots.base_template.bot_processor import BotProcessor
+
+        self._verified_marks()
+        processor = BotProcessor(7)
+        processor.settings = dict(self.settings, bot_username='test_bot', description='Tavsif {x}')
+        processor.bot = mock.Mock(send_message=mock.AsyncMock())
+        processor._get_participant = mock.AsyncMock(return_value=mock.Mock(referral_code='ABC', is_blocked=False))
+
+        for _ in range(2):
+            async_to_sync(processor._handle_konkurs)({'from': {'id': 1}})
+
+        # Ikkinchi bosish - participant o'qilmaydi, tayyor post
+        processor._get_participant.assert_awaited_once()
+        first, second = processor.bot.send_message.await_args_list
+        self.assertIs(first.args[1], second.args[1])
+
+        link = 'https://t.me/test_bot?start=ref_ABC'
+        self.assertEqual(first.args[1], f"Tavsif {{x}}\n\n📎 Havola:\n{link}\n\n"
+                                        "👆 Havolani bosib nusxa oling va do'stlaringizga yuboring!")
+        share_text = f"Tavsif {{x}}\n\n📎 Havola:\n{link}"
+        self.assertEqual(first.kwargs['reply_markup'].inline_keyboard[0][0].url,
+                         f"https://t.me/share/url?url={quote(link, safe='')}&text={quote(share_text, safe='')}")
+
+        # Boshqa ishtirokchi - o'z havolasi
+        processor._get_participant.return_value = mock.Mock(referral_code='XYZ', is_blocked=False)
+        async_to_sync(processor._handle_konkurs)({'from': {'id': 2}})
+        self.assertIn('ref_XYZ', processor.bot.send_message.await_args.args[1])
+
+    def test_revoked_participant_post_is_dropped(self):
+        from bots.user_bots.base_template.bot_processor import BotProcessor
+        from bots.user_bots.base_template.cache.render_cache import peek_referral_view
+
+        verified = self._verified_marks()
+        settings = dict(self.settings, bot_username='test_bot', description='Tavsif')
+        processor = BotProcessor(7)
+        processor.settings = settings
+        processor.bot = mock.Mock(send_message=mock.AsyncMock())
+        processor._get_participant = mock.AsyncMock(return_value=mock.Mock(referral_code='ABC', is_blocked=False))
+        async_to_sync(processor._handle_konkurs)({'from': {'id': 1}})
+
+        # Participant o'zgardi (signal belgini o'chiradi) va endi bloklangan
+        verified.clear()
+        processor._get_participant.return_value = mock.Mock(referral_code='ABC', is_blocked=True)
+        async_to_sync(processor._handle_konkurs)({'from': {'id': 1}})
+
+        self.assertIn('/start', processor.bot.send_message.await_args.args[1])
+        self.assertIsNone(peek_referral_view(settings, 'konkurs_post', 1))
+
+
+class MediaCacheTests(SimpleTestCase):
+    """Konkurs rasmi bot bo'yicha bir marta yuklanadi, keyin file_id bilan yuboriladi"""
+
+    def setUp(self):
+        from shared import media_cache
+        media_cache._file_ids.clear()
+        patcher = mock.patch.object(redis_client, 'is_connected', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _bot(self):
+        from aiogram.types import InputFile
+
+        async def send_photo(chat_id, photo, **kwargs):
+            await asyncio.sleep(0.01)
+            if isinstance(photo, InputFile):
+                return mock.Mock(photo=[mock.Mock(file_id='small'), mock.Mock(file_id='FILE_ID')])
+            return None
+
+        return mock.Mock(send_photo=mock.AsyncMock(side_effect=send_photo), send_message=mock.AsyncMock())
+
+    def test_uploaded_once_then_file_id(self):
+        from shared.media_cache import send_photo
+
+        bot = self._bot()
+
+        async def scenario():
+            # Bir vaqtda kelgan yuborishlar bitta yuklashni kutadi
+            await asyncio.gather(*[send_photo(bot, 7, chat_id, 'welcome_images/a.jpg') for chat_id in range(5)])
+            await send_photo(bot, 7, 99, 'welcome_images/a.jpg', caption='Salom')
+
+        async_to_sync(scenario)()
+        photos = [call.args[1] for call in bot.send_photo.call_args_list]
+        self.assertEqual(len(photos), 6)
+        self.assertEqual(sum(not isinstance(photo, str) for photo in photos), 1)
+        self.assertEqual(photos[-1], 'FILE_ID')
+
+        # Boshqa bot yoki yangi rasm - qayta yuklanadi
+        async_to_sync(send_photo)(bot, 8, 1, 'welcome_images/a.jpg')
+        async_to_sync(send_photo)(bot, 7, 1, 'welcome_images/b.jpg')
+        self.assertFalse(isinstance(bot.send_photo.call_args_list[-1].args[1], str))
+        self.assertFalse(isinstance(bot.send_photo.call_args_list[-2].args[1], str))
+
+    def test_stale_file_id_is_reuploaded(self):
+        from aiogram.exceptions import TelegramBadRequest
+        from aiogram.methods import SendPhoto
+        from shared import media_cache, outbound_queue
+
+        bot = self._bot()
+        media_cache._file_ids[(7, 'promo_images/p.jpg')] = 'STALE'
+        default = bot.send_photo.side_effect
+
+        async def send_photo(chat_id, photo, **kwargs):
+            # file_id li yuborish navbatga qo'yilmaydi - xato shu yerda ko'rinadi
+            self.assertTrue(outbound_queue._sent_inline(SendPhoto(chat_id=chat_id, photo=photo)))
+            if photo == 'STALE':
+                raise TelegramBadRequest(method=mock.Mock(), message='Bad Request: wrong file identifier')
+            return await default(chat_id, photo, **kwargs)
+
+        bot.send_photo.side_effect = send_photo
+        self.assertTrue(async_to_sync(media_cache.send_photo)(bot, 7, 1, 'promo_images/p.jpg'))
+        self.assertEqual(media_cache.get_file_id(7, 'promo_images/p.jpg'), 'FILE_ID')
+        self.assertEqual(bot.send_photo.await_count, 2)
+
+    def test_long_text_sent_separately(self):
+        from shared.media_cache import CAPTION_LIMIT, send_with_image
+
+        bot = self._bot()
+        async_to_sync(send_with_image)(bot, 7, 1, 'promo_images/p.jpg', 'x' * (CAPTION_LIMIT + 1))
+        self.assertNotIn('caption', bot.send_photo.call_args.kwargs)
+        bot.send_message.assert_awaited_once()
+
+        async_to_sync(send_with_image)(bot, 7, 1, '', 'Salom')
+        self.assertEqual(bot.send_photo.await_count, 1)
+
+
+class WebhookReplyTests(SimpleTestCase):
+    """Xotiradan hal bo'ladigan update larga webhook javobida javob beriladi"""
+
+    def setUp(self):
+        from bots.user_bots.base_template import webhook_reply
+        from bots.user_bots.base_template.cache import render_cache
+        render_cache.clear()
+        webhook_reply._settings.clear()
+        self.settings = {'bot_id': 7, 'name': 'Test', 'rules_text': 'Qoida', 'prizes': [], 'promo_image': ''}
+        # Redis dagi tekshiruv: (sozlamalar versiyasi joriy, ishtirokchi tekshirilgan)
+        patcher = mock.patch.object(webhook_reply, '_check', return_value=(True, True))
+        self.check = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _dispatch(self, update):
+        from fastapi import BackgroundTasks
+        from fastapi_app.api.routes.webhooks.dispatch import dispatch_webhook
+
+        from fastapi_app.api.utils.auth import WEBHOOK_SECRET_HEADER, webhook_secret
+
+        background = BackgroundTasks()
+        headers = {WEBHOOK_SECRET_HEADER: webhook_secret(7)}
+        request = mock.Mock(json=mock.AsyncMock(return_value=update), headers=headers)
+        with override_settings(WEBHOOK_REPLY_FAST_PATH=True):
+            response = async_to_sync(dispatch_webhook)(7, request, background)
+        return response, len(background.tasks)
+
+    def test_inline_reply_from_memory(self):
+        from bots.user_bots.base_template.webhook_reply import remember_settings
+
+        rules = {'message': {'from': {'id': 1}, 'text': '📜 Shartlar'}}
+        # Sozlamalar hali xotirada yo'q - odatdagidek fonda
+        self.assertEqual(self._dispatch(rules), ({'ok': True}, 1))
+
+        remember_settings(7, self.settings, telegram_bot_id=700)
+        response, queued = self._dispatch(rules)
+        self.assertEqual(queued, 0)
+        self.assertEqual(response, {'method': 'sendMessage', 'chat_id': 1, 'parse_mode': 'Markdown',
+                                    'text': "📜 *KONKURS QOIDALARI*\n\nQoida"})
+
+        response, queued = self._dispatch({'callback_query': {'id': '9', 'from': {'id': 1}, 'data': 'copy_link'}})
+        self.assertEqual((response, queued), ({'method': 'answerCallbackQuery', 'callback_query_id': '9'}, 0))
+
+        for update in ({'message': {'from': {'id': 1}, 'text': '📊 Ballarim'}},
+                       {'message': {'from': {'id': 1}, 'text': '🚀 Konkursda qatnashish'}},
+                       {'callback_query': {'id': '9', 'from': {'id': 1}, 'data': 'check_subscription'}}):
+            self.assertEqual(self._dispatch(update), ({'ok': True}, 1))
+
+    def test_rate_limited_reply_is_queued(self):
+        from bots.user_bots.base_template.webhook_reply import remember_settings
+        from shared.telegram_governor import get_governor
+
+        remember_settings(7, self.settings, telegram_bot_id=701)
+        update = {'message': {'from': {'id': 2}, 'text': "🎁 Sovg'alar"}}
+        replies = [self._dispatch(update)[1] for _ in range(5)]
+        # Chat limiti (burst) tugagach - navbatga
+        self.assertEqual(replies[0], 0)
+        self.assertEqual(replies[-1], 1)
+        self.assertGreater(get_governor(701).stats['calls'], 0)
+
+    def test_stale_settings_and_unverified_participant_are_queued(self):
+        from bots.user_bots.base_template.bot_processor import render_konkurs_post
+        from bots.user_bots.base_template.cache.render_cache import get_referral_view
+        from bots.user_bots.base_template.webhook_reply import remember_settings
+
+        remember_settings(7, self.settings, telegram_bot_id=702)
+        get_referral_view(self.settings, 'konkurs_post', 3, 'ABC', render_konkurs_post)
+        konkurs = {'message': {'from': {'id': 3}, 'text': '🚀 Konkursda qatnashish'}}
+
+        self.check.return_value = (True, False)
+        self.assertEqual(self._dispatch(konkurs), ({'ok': True}, 1))
+        self.check.return_value = (True, True)
+        self.assertEqual(self._dispatch(konkurs)[1], 0)
+
+        # Admin sozlamani o'zgartirdi / bot to'xtatildi - versiya kaliti yo'q
+        self.check.return_value = (False, False)
+        self.assertEqual(self._dispatch({'message': {'from': {'id': 3}, 'text': '📜 Shartlar'}}), ({'ok': True}, 1))
+
+
+class RescoreTargetTests(SimpleTestCase):
+    """Rescore award formulasi bilan bir xil qiymatni hisoblashi kerak"""
+
+    def test_targets_follow_award_formula(self):
+        from shared.point_rules import channel_join_points, referral_award
+        from shared.rescoring import target_points
+
+        rules = {'channel_join': 5, 'premium_user': 2, 'referral': 0, 'premium_ref': 0}
+        targets = target_points(rules, channels_count=3)
+        self.assertEqual(targets[('channel_join', False)], 15)
+        self.assertEqual(targets[('channel_join', True)], 30)
+        self.assertEqual(targets[('channel_join', True)], channel_join_points(rules, 3, True))
+        # Eski qiymat 0 bo'lgan qoida ham qayta hisoblanadi
+        rules['referral'] = 4
+        targets = target_points(rules, channels_count=3)
+        self.assertEqual((targets[('referral', False)], targets[('premium_ref', True)]), (4, 8))
+        self.assertEqual(referral_award(rules, True), (8, 'premium_ref'))
+
+
+class InternalAuthTests(SimpleTestCase):
+    """Boshqaruv endpoint lari X-Internal-Token siz yopiq"""
+
+    def test_internal_token_required(self):
+        from fastapi import HTTPException
+        from fastapi_app.api.utils.auth import require_internal_token
+
+        with override_settings(INTERNAL_API_TOKEN=''):
+            with self.assertRaises(HTTPException) as ctx:
+                async_to_sync(require_internal_token)('anything')
+            self.assertEqual(ctx.exception.status_code, 503)
+
+        with override_settings(INTERNAL_API_TOKEN='s3cret'):
+            with self.assertRaises(HTTPException) as ctx:
+                async_to_sync(require_internal_token)('wrong')
+            self.assertEqual(ctx.exception.status_code, 403)
+            self.assertIsNone(async_to_sync(require_internal_token)('s3cret'))
+
+    def test_history_and_broadcast_routes_require_token(self):
+        from fastapi_app.api.routes.bot_api import router
+        from fastapi_app.api.utils.auth import require_internal_token
+
+        routes = [route for route in router.routes if '/history/' in route.path or '/broadcast/' in route.path]
+        self.assertEqual(len(routes), 5)
+        for route in routes:
+            self.assertIn(require_internal_token, [dep.call for dep in route.dependant.dependencies], route.path)
+
+    def test_webhook_secret_is_per_bot(self):
+        from fastapi import BackgroundTasks, HTTPException
+        from fastapi_app.api.routes.webhooks.dispatch import dispatch_webhook
+        from fastapi_app.api.utils.auth import WEBHOOK_SECRET_HEADER, webhook_secret
+
+        cases = ((False, {WEBHOOK_SECRET_HEADER: webhook_secret(8)}), (True, {}))
+        for required, headers in cases:
+            request = mock.Mock(json=mock.AsyncMock(return_value={}), headers=headers)
+            with override_settings(WEBHOOK_SECRET_REQUIRED=required), self.assertRaises(HTTPException) as ctx:
+                async_to_sync(dispatch_webhook)(7, request, BackgroundTasks())
+            self.assertEqual(ctx.exception.status_code, 403)
+
+    def test_missing_webhook_secret_accepted_until_required(self):
+        from fastapi_app.api.utils.auth import verify_webhook_secret, webhook_secret
+
+        self.assertTrue(verify_webhook_secret(7, None))
+        self.assertTrue(verify_webhook_secret(7, webhook_secret(7)))
+        with override_settings(WEBHOOK_SECRET_REQUIRED=True):
+            self.assertFalse(verify_webhook_secret(7, None))
+
+
+class RatingRankTests(SimpleTestCase):
+    """Sahifa qatorlari va "sizning o'rningiz" bitta qoida bilan (teng ball - bir xil o'rin)"""
+
+    def test_competition_ranks(self):
+        from shared.leaderboard import competition_ranks
+
+        self.assertEqual(competition_ranks([50, 40, 40, 30], 0, 1), [1, 2, 2, 4])
+        # 2-sahifa 40 lik guruh o'rtasidan boshlanadi: ZCOUNT(> 40) + 1 = 2
+        self.assertEqual(competition_ranks([40, 40, 30, 30, 20], 10, 2), [2, 2, 13, 13, 15])
+
+    def test_not_ready_callback_answered_once(self):
+        from bots.user_bots.base_template.bot_processor import BotProcessor
+
+        processor = BotProcessor(7)
+        processor.bot = mock.Mock(answer_callback_query=mock.AsyncMock())
+        callback = {'id': '5', 'from': {'id': 1}, 'data': 'rating_page:1'}
+        with mock.patch('bots.user_bots.base_template.services.rating_service.RatingService.get_page',
+                        mock.AsyncMock(return_value=None)):
+            async_to_sync(processor._process_callback)(callback)
+
+        processor.bot.answer_callback_query.assert_awaited_once()
+        self.assertTrue(processor.bot.answer_callback_query.call_args.kwargs['show_alert'])
@@ -75,9 +75,36 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        # Persistent connection lar: har bir DB executor thread i o'z connection ini
+        # qayta ishlatadi (pool hajmi = DB_EXECUTOR_THREADS), uzilgan connection
+        # ishlatishdan oldin tekshiriladi
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=300),
+        'CONN_HEALTH_CHECKS': True,
+        # pgbouncer (transaction pooling): server-side cursor lar transaction dan
+        # tashqarida yashay olmaydi, iterator() oddiy cursor bilan ishlaydi
+        'DISABLE_SERVER_SIDE_CURSORS': env.bool('DB_PGBOUNCER', default=False),
     }
 }
 
+# Bot runtime (FastAPI) dagi ORM chaqiruvlari uchun thread pool (shared/db_executor.py).
+# 0 - barcha DB ishi bitta thread da (asgiref thread_sensitive=True)
+DB_EXECUTOR_THREADS = env.int('DB_EXECUTOR_THREADS', default=16)
+
+# Issiq o'qishlar uchun psycopg2 async connection lar (shared/async_db.py), event loop boshiga.
+# 0 - o'qishlar ham DB executor da
+DB_ASYNC_POOL_SIZE = env.int('DB_ASYNC_POOL_SIZE', default=10)
+# async_db so'rovi shundan (sekund) oshsa serverda cancel qilinadi. 0 - cheklovsiz
+DB_ASYNC_STATEMENT_TIMEOUT = env.float('DB_ASYNC_STATEMENT_TIMEOUT', default=5.0)
+
+# Handler xabarlari navbati: bir vaqtda yuboradigan chat lar (shared/outbound_queue.py). 0 - handler ichida yuborish.
+OUTBOUND_QUEUE_SENDERS = env.int('OUTBOUND_QUEUE_SENDERS', default=8)
+
+# Bot API limitlarining shu jarayonga ulushi (shared/telegram_governor.py) - barcha jarayonlar yig'indisi <= 1
+TELEGRAM_RATE_SHARE = env.float('TELEGRAM_RATE_SHARE', default=1.0)
+
+# Oddiy update larga webhook javobining o'zida javob (bots/user_bots/base_template/webhook_reply.py)
+WEBHOOK_REPLY_FAST_PATH = env.bool('WEBHOOK_REPLY_FAST_PATH', default=False)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,6 +152,10 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 SUPER_ADMIN_TELEGRAM_ID = os.getenv("SUPER_ADMIN_TELEGRAM_ID", "")
 ADMIN_PANEL_URL = os.getenv("ADMIN_PANEL_URL")
 FASTAPI_URL = env('FASTAPI_URL')
+# FastAPI boshqaruv endpoint lari uchun X-Internal-Token (fastapi_app/api/utils/auth.py)
+INTERNAL_API_TOKEN = env('INTERNAL_API_TOKEN', default='')
+# Secret token siz webhook update larini rad etish - barcha botlar secret_token bilan qayta run qilingach yoqiladi
+WEBHOOK_SECRET_REQUIRED = env.bool('WEBHOOK_SECRET_REQUIRED', default=False)
 
 
 LOGGING = {
@@ -3,24 +3,33 @@
 Bot API - Bot management endpoints
 Vazifasi: Botlarni run/stop qilish
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from aiogram import Bot
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from shared.telegram_governor import create_bot, get_stats as get_governor_stats
 from asgiref.sync import sync_to_async
 import os
 import logging
 import asyncio
 from cryptography.fernet import Fernet
+from datetime import datetime
+from typing import Optional
+from django.utils import timezone
 
 from bots.main_bot.services.notification_service import NotificationService
-from django_app.core.models import BotSetUp, BotStatus, Competition, CompetitionStatus
+from fastapi_app.api.schemas.bot_schemas import BroadcastRequest
+from fastapi_app.api.utils.auth import require_internal_token, webhook_secret
+from django_app.core.models import BotSetUp, BotStatus, Channel, Competition, CompetitionStatus
+from shared.channel_membership import reset_tracking as reset_membership_tracking
 from shared.redis_client import redis_client
 from fastapi_app.workers.bot_worker import worker_pool
 from bots.user_bots.base_template.services.competition_service import CompetitionService
+from bots.user_bots.base_template.services.registration_batcher import get_stats as get_registration_batch_stats
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+ALLOWED_UPDATES = ["message", "callback_query", "inline_query", "chat_member", "my_chat_member"]
+
 
 async def decrypt_token_async(encrypted_token: str) -> str:
     """Token ni decrypt qilish"""
@@ -55,7 +64,7 @@ async def run_bot(bot_id: int, background_tasks: BackgroundTasks):
         token = await decrypt_token_async(bot_setup.encrypted_token)
 
         # Bot tekshirish
-        bot = Bot(token=token)
+        bot = create_bot(token)
         me = await bot.get_me()
         logger.info(f"✅ Bot verified: @{me.username}")
 
@@ -68,9 +77,17 @@ async def run_bot(bot_id: int, background_tasks: BackgroundTasks):
         base_url = os.getenv("WEBHOOK_URL", "http://localhost:8001")
         webhook_url = f"{base_url}/api/webhooks/dispatch/{bot_id}"
 
-        await bot.set_webhook(url=webhook_url, drop_pending_updates=True)
+        # chat_member ni Telegram faqat so'ralganda yuboradi (kanal a'zoligi - shared/channel_membership.py)
+        await bot.set_webhook(url=webhook_url, drop_pending_updates=True, allowed_updates=ALLOWED_UPDATES,
+                              secret_token=webhook_secret(bot_id))
         logger.info(f"✅ Webhook set: {webhook_url}")
 
+        # drop_pending_updates - yo'qolgan "left" update lari eski a'zolikni qoldirmasin
+        usernames = await sync_to_async(list)(
+            Channel.objects.filter(competitions__bot_id=bot_id).values_list('channel_username', flat=True)
+        )
+        await sync_to_async(reset_membership_tracking)(usernames)
+
         # Status yangilash
         bot_setup.status = BotStatus.RUNNING
         await sync_to_async(bot_setup.save)(update_fields=['status'])
@@ -133,9 +150,8 @@ async def preload_bot_settings_to_redis(bot_id: int):
 
 async def send_run_notifications(bot_setup: BotSetUp, bot_id: int, bot_username: str):
     """Run notifications yuborish"""
-    service = NotificationService()
-    await service.send_bot_run_to_owner(bot_setup.owner.telegram_id, bot_username, bot_id)
-    await service.send_bot_run_to_superadmin(bot_username, bot_id)
+    # Owner va superadmin - bitta client orqali parallel (send_batch)
+    await NotificationService().send_bot_run_notifications(bot_setup.owner.telegram_id, bot_username, bot_id)
 
 
 @router.get("/status/{bot_id}")
@@ -149,9 +165,11 @@ async def get_bot_status(bot_id: int):
             queue_length = await redis_client.get_queue_length(bot_id)
 
         webhook_info = ""
+        governor_stats = None
         try:
             token = await decrypt_token_async(bot.encrypted_token)
-            test_bot = Bot(token=token)
+            test_bot = create_bot(token)
+            governor_stats = get_governor_stats(test_bot.id)  # governor Telegram bot ID bo'yicha
             webhook = await test_bot.get_webhook_info()
             webhook_info = webhook.url if webhook.url else "No webhook"
             await test_bot.session.close()
@@ -165,7 +183,9 @@ async def get_bot_status(bot_id: int):
             "is_active": bot.is_active,
             "queue_length": queue_length,
             "webhook": webhook_info,
-            "owner_id": bot.owner.telegram_id
+            "owner_id": bot.owner.telegram_id,
+            "registration_batch": get_registration_batch_stats(bot_id),
+            "rate_governor": governor_stats
         }
 
     except BotSetUp.DoesNotExist:
@@ -196,7 +216,7 @@ async def stop_bot(bot_id: int):
         # Webhook o'chirish
         try:
             token = await decrypt_token_async(bot_setup.encrypted_token)
-            bot = Bot(token=token)
+            bot = create_bot(token)
             await bot.delete_webhook(drop_pending_updates=True)
             await bot.session.close()
         except:
@@ -220,4 +240,83 @@ async def stop_bot(bot_id: int):
 
     except Exception as e:
         logger.error(f"Stop bot error: {e}")
-        raise HTTPException(status_code=500, detail=f"Xatolik: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Xatolik: {str(e)}")
+
+@router.get("/history/{bot_id}/top", dependencies=[Depends(require_internal_token)])
+async def get_history_top(bot_id: int, at: Optional[datetime] = None):
+    """Berilgan vaqtdagi TOP-K (snapshot dan)"""
+    from shared.leaderboard_history import get_top_at
+
+    try:
+        competition = await sync_to_async(Competition.objects.get)(bot_id=bot_id)
+        result = await sync_to_async(get_top_at)(competition.id, at or timezone.now())
+    except Competition.DoesNotExist:
+        raise HTTPException(status_code=404, detail="Konkurs topilmadi")
+
+    if not result:
+        raise HTTPException(status_code=404, detail="Snapshot topilmadi")
+
+    return {"bot_id": bot_id, "competition_id": competition.id, **result}
+
+
+@router.get("/history/{bot_id}/rank/{telegram_id}", dependencies=[Depends(require_internal_token)])
+async def get_history_rank(bot_id: int, telegram_id: int):
+    """Ishtirokchining o'rni tarixi (snapshot lar bo'yicha)"""
+    from shared.leaderboard_history import get_rank_series
+
+    try:
+        competition = await sync_to_async(Competition.objects.get)(bot_id=bot_id)
+        series = await sync_to_async(get_rank_series)(competition.id, telegram_id)
+    except Competition.DoesNotExist:
+        raise HTTPException(status_code=404, detail="Konkurs topilmadi")
+
+    return {"bot_id": bot_id, "competition_id": competition.id, "telegram_id": telegram_id, "series": series}
+
+
+@router.post("/broadcast/{bot_id}", dependencies=[Depends(require_internal_token)])
+async def create_broadcast(bot_id: int, payload: BroadcastRequest):
+    """Konkurs ishtirokchilariga ommaviy xabar - fonda (Celery) yuboriladi"""
+    from django_app.core.models import Broadcast
+    from django_app.core.tasks import send_broadcast
+
+    try:
+        competition = await sync_to_async(Competition.objects.get)(bot_id=bot_id)
+    except Competition.DoesNotExist:
+        raise HTTPException(status_code=404, detail="Konkurs topilmadi")
+
+    broadcast = await sync_to_async(Broadcast.objects.create)(
+        competition=competition,
+        text=payload.text,
+        parse_mode=payload.parse_mode,
+        paid_broadcast=payload.paid_broadcast
+    )
+    send_broadcast.delay(broadcast.id)
+    return {"broadcast_id": broadcast.id, "status": broadcast.status}
+
+
+@router.get("/broadcast/progress/{broadcast_id}", dependencies=[Depends(require_internal_token)])
+async def get_broadcast_progress(broadcast_id: int):
+    """Broadcast holati: yuborilgan / bloklagan / xato, tezlik"""
+    from shared.broadcast import get_progress
+
+    progress = await sync_to_async(get_progress)(broadcast_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Broadcast topilmadi")
+    return progress
+
+
+@router.post("/broadcast/{action}/{broadcast_id}", dependencies=[Depends(require_internal_token)])
+async def change_broadcast(action: str, broadcast_id: int):
+    """Broadcast ni pause / resume / cancel qilish"""
+    from shared.broadcast import get_progress, set_status
+    from django_app.core.tasks import send_broadcast
+
+    if action not in ("pause", "resume", "cancel"):
+        raise HTTPException(status_code=400, detail="Amal: pause, resume yoki cancel")
+
+    changed = await sync_to_async(set_status)(broadcast_id, action)
+    if not changed:
+        raise HTTPException(status_code=409, detail="Broadcast holati bu amalga mos emas")
+    if action == "resume":
+        send_broadcast.delay(broadcast_id)
+    return await sync_to_async(get_progress)(broadcast_id)
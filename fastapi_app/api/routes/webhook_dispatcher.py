@@ -9,6 +9,7 @@ from typing import Dict, Any, Optional
 from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 
+from shared import channel_membership
 from shared.redis_client import redis_client
 from shared.anti_cheat import get_anti_cheat_engine
 from asgiref.sync import sync_to_async
@@ -57,7 +58,11 @@ async def dispatch_webhook(
             logger.warning(f"Bot {bot_id} is not active")
             return WebhookResponse(ok=True, processed=False, bot_id=bot_id, error="Bot not active")
 
-        # 3. Extract user info
+        # 3. Kanal a'zoligi o'zgarishi - navbat va anti-cheat siz darhol qo'llanadi
+        if channel_membership.apply_update(update):
+            return WebhookResponse(ok=True, processed=True, bot_id=bot_id)
+
+        # Extract user info
         user_id = _extract_user_id(update)
         if not user_id:
             return WebhookResponse(ok=True, processed=False, bot_id=bot_id)
@@ -116,8 +121,8 @@ def _extract_user_id(update: Dict[str, Any]) -> Optional[int]:
         return update["message"]["from"]["id"]
     elif "callback_query" in update:
         return update["callback_query"]["from"]["id"]
-    elif "my_chat_member" in update:
-        return update["my_chat_member"]["from"]["id"]
+    elif "chat_member" in update or "my_chat_member" in update:
+        return channel_membership.extract_user_id(update)
     elif "inline_query" in update:
         return update["inline_query"]["from"]["id"]
     elif "chosen_inline_result" in update:
@@ -1,9 +1,11 @@
 # fastapi_app/api/routes/webhooks/dispatch.py
 
-from fastapi import APIRouter, Request, BackgroundTasks
+from fastapi import APIRouter, Request, BackgroundTasks, HTTPException
 import logging
 import asyncio
 
+from fastapi_app.api.utils.auth import WEBHOOK_SECRET_HEADER, verify_webhook_secret
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -13,11 +15,25 @@ router = APIRouter()
 async def dispatch_webhook(bot_id: int, request: Request, background_tasks: BackgroundTasks):
     """
     B Bot webhook
+
+    WEBHOOK_REPLY_FAST_PATH yoqilgan bo'lsa xotiradagi cache lardan hal bo'ladigan
+    update larga javob shu response da qaytariladi (webhook_reply.py)
     """
+    # set_webhook dagi secret_token - noto'g'risi rad etiladi (yo'q header - WEBHOOK_SECRET_REQUIRED ga qarab)
+    if not verify_webhook_secret(bot_id, request.headers.get(WEBHOOK_SECRET_HEADER)):
+        logger.warning(f"Webhook for bot {bot_id} rejected: bad secret token")
+        raise HTTPException(status_code=403, detail="Forbidden")
+
     try:
         update = await request.json()
         logger.info(f"📥 Webhook received for bot {bot_id}: update_id={update.get('update_id')}")
 
+        from bots.user_bots.base_template import webhook_reply
+        if webhook_reply.is_enabled():
+            reply = webhook_reply.resolve(bot_id, update)
+            if reply is not None:
+                return reply
+
         background_tasks.add_task(process_update_directly, bot_id, update)
 
         return {"ok": True}
@@ -32,6 +48,11 @@ async def process_update_directly(bot_id: int, update: dict):
     Update ni TO'G'RIDAN-TO'G'RI process qilish
     """
     try:
+        # Kanal a'zoligi o'zgarishi - bot/settings kerak emas, faqat Redis to'plami
+        from shared.channel_membership import apply_update
+        if apply_update(update):
+            return
+
         from bots.user_bots.base_template.bot_processor import BotProcessor
 
         processor = BotProcessor(bot_id)
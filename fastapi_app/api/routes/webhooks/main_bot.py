@@ -4,7 +4,7 @@ Main bot webhook endpoints - TO'G'RILANGAN
 """
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from aiogram import Bot
+from bots.main_bot.services.notification_service import main_bot_client
 import os
 import logging
 from shared.redis_client import redis_client
@@ -66,13 +66,12 @@ async def contact_admin(request: AdminContactRequest):
         """.strip()
 
         # Send to superadmin
-        bot = Bot(token=main_token)
-        await bot.send_message(
-            chat_id=int(super_admin_id),
-            text=text,
-            parse_mode="Markdown"
-        )
-        await bot.session.close()
+        async with main_bot_client(main_token) as bot:
+            await bot.send_message(
+                chat_id=int(super_admin_id),
+                text=text,
+                parse_mode="Markdown"
+            )
 
         # Send confirmation to user
         await send_confirmation_to_user(request.user_tg_id, main_token)
@@ -87,7 +86,6 @@ async def contact_admin(request: AdminContactRequest):
 async def send_confirmation_to_user(user_id: int, bot_token: str):
     """Send confirmation to user"""
     try:
-        bot = Bot(token=bot_token)
         text = """
     ✅ *Xabaringiz muvaffaqiyatli yuborildi!*
 
@@ -96,12 +94,12 @@ async def send_confirmation_to_user(user_id: int, bot_token: str):
     ⏳ Iltimos, kutib turing yoki keyinroq qayta urinib ko'ring.
         """.strip()
 
-        await bot.send_message(
-            chat_id=user_id,
-            text=text,
-            parse_mode="Markdown"
-        )
-        await bot.session.close()
+        async with main_bot_client(bot_token) as bot:
+            await bot.send_message(
+                chat_id=user_id,
+                text=text,
+                parse_mode="Markdown"
+            )
 
     except Exception as e:
         logger.error(f"Send confirmation error: {e}")
@@ -1,13 +1,13 @@
 # fastapi_app/api/routes/webhooks/notify.py
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from aiogram import Bot
 import os
 import logging
 from asgiref.sync import sync_to_async
 
 from django_app.core.models.bot import BotSetUp
 from bots.main_bot.buttons.inline import get_contact_admin_keyboard
+from bots.main_bot.services.notification_service import main_bot_client
 from shared.constants import MESSAGES
 
 logger = logging.getLogger(__name__)
@@ -40,9 +40,8 @@ async def handle_user_completed(payload: NotificationPayload):
 
         keyboard = await get_contact_admin_keyboard()
 
-        bot = Bot(token=os.getenv("TELEGRAM_BOT_TOKEN"))
-        await bot.send_message(chat_id=payload.user_tg_id, text=text, reply_markup=keyboard, parse_mode="HTML")
-        await bot.session.close()
+        async with main_bot_client() as bot:
+            await bot.send_message(chat_id=payload.user_tg_id, text=text, reply_markup=keyboard, parse_mode="HTML")
 
         logger.info(f"Notification sent to {payload.user_tg_id}")
         return {"status": "success"}
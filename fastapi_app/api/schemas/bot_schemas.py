@@ -19,4 +19,9 @@ class BotResponse(BaseModel):
     id: int
     username: str
     status: str
-    owner_id: int
\ No newline at end of file
+    owner_id: int
+
+class BroadcastRequest(BaseModel):
+    text: str
+    parse_mode: str = "HTML"
+    paid_broadcast: bool = False
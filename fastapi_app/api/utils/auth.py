@@ -0,0 +1,43 @@
+# fastapi_app/api/utils/auth.py
+"""
+Ichki API autentifikatsiyasi
+Vazifasi: Boshqaruv endpoint lari (broadcast va h.k.) faqat admin panel / ichki servislardan
+
+So'rov X-Internal-Token header ida settings.INTERNAL_API_TOKEN ni yuborishi kerak.
+Token sozlanmagan bo'lsa endpoint lar yopiq (503).
+
+Bot webhook lari: set_webhook(secret_token=webhook_secret(bot_id)) - Telegram uni har
+update da X-Telegram-Bot-Api-Secret-Token header ida yuboradi, dispatch tekshiradi.
+Noto'g'ri header doim rad etiladi; header yo'q update (secret siz ro'yxatdan o'tgan eski
+botlar) - settings.WEBHOOK_SECRET_REQUIRED yoqilmaguncha qabul qilinadi.
+"""
+import hashlib
+import hmac
+from typing import Optional
+
+from django.conf import settings
+from fastapi import Header, HTTPException
+
+
+async def require_internal_token(x_internal_token: str = Header(default="")):
+    """FastAPI dependency - Depends(require_internal_token)"""
+    expected = getattr(settings, 'INTERNAL_API_TOKEN', '')
+    if not expected:
+        raise HTTPException(status_code=503, detail="INTERNAL_API_TOKEN sozlanmagan")
+    if not hmac.compare_digest(x_internal_token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Ruxsat yo'q")
+
+
+WEBHOOK_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def webhook_secret(bot_id: int) -> str:
+    """Bot webhook secret_token i - SECRET_KEY dan (saqlash shart emas)"""
+    return hmac.new(settings.SECRET_KEY.encode(), f"webhook:{bot_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_webhook_secret(bot_id: int, token: Optional[str]) -> bool:
+    if token is None:
+        # O'tish davri: secret_token siz set_webhook qilingan botlar
+        return not getattr(settings, 'WEBHOOK_SECRET_REQUIRED', False)
+    return hmac.compare_digest(token.encode(), webhook_secret(bot_id).encode())
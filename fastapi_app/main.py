@@ -11,6 +11,8 @@ from pathlib import Path
 # Django settings
 sys.path.append(str(Path(__file__).parent.parent))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_app.settings')
+# Bot API limitlari: API jarayoni 0.7, Celery 0.3 (celery_worker.py) - bitta uvicorn worker uchun
+os.environ.setdefault('TELEGRAM_RATE_SHARE', '0.7')
 
 import django
 django.setup()
@@ -72,9 +74,9 @@ async def startup_event():
         else:
             logger.warning("⚠️ Redis not connected - running in fallback mode")
 
-        # Batch processor
-        batch_processor = BatchProcessor()
-        await batch_processor.start()
+        # Batch processor (point ledger flusher)
+        app.state.batch_processor = BatchProcessor()
+        await app.state.batch_processor.start()
         logger.info("✅ Batch processor started")
 
     except Exception as e:
@@ -92,6 +94,10 @@ async def shutdown_event():
         for bot_id in list(worker_pool.workers.keys()):
             await worker_pool.stop_worker(bot_id)
         logger.info("✅ All workers stopped")
+
+        # Ledger dagi qolgan ballarni DB ga yozish
+        if getattr(app.state, 'batch_processor', None):
+            await app.state.batch_processor.stop()
     except Exception as e:
         logger.error(f"Shutdown error: {e}")
 
@@ -188,9 +194,12 @@ app.include_router(dispatch_router, prefix="/api/webhooks/dispatch", tags=["B Bo
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Starting FastAPI application...")
+    # Main bot notification lari shu loop da bitta client (connection pool) bilan
+    from bots.main_bot.services.notification_service import enable_shared_client
+    enable_shared_client()
     try:
-        batch_processor = BatchProcessor()
-        await batch_processor.start()
+        app.state.batch_processor = BatchProcessor()
+        await app.state.batch_processor.start()
         logger.info("✅ Batch processor started")
     except Exception as e:
         logger.error(f"❌ Failed to start batch processor: {e}")
@@ -200,6 +209,24 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("👋 Shutting down FastAPI application...")
+    # Buferdagi ro'yxatdan o'tishlar ledger flush dan oldin commit bo'lsin
+    from bots.user_bots.base_template.services.registration_batcher import flush_all
+    await flush_all()
+    if getattr(app.state, 'batch_processor', None):
+        await app.state.batch_processor.stop()
+
+    # Navbatdagi xabarlar yuborilib bo'lsin
+    from shared.outbound_queue import shutdown as shutdown_outbound_queue
+    await shutdown_outbound_queue()
+
+    from bots.main_bot.services.notification_service import close_shared_client
+    await close_shared_client()
+
+    from shared.async_db import shutdown as shutdown_async_db
+    await shutdown_async_db()
+
+    from shared.db_executor import shutdown as shutdown_db_executor
+    shutdown_db_executor()
 
 
 # Health check
@@ -210,7 +237,21 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    from shared.db_executor import get_stats as get_db_pool_stats
+    from shared.outbound_queue import get_stats as get_outbound_stats
+    from bots.user_bots.base_template.webhook_reply import get_stats as get_webhook_reply_stats
+    return {"status": "healthy", "db_pool": get_db_pool_stats(), "outbound_queue": get_outbound_stats(),
+            "webhook_reply": get_webhook_reply_stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrikalari (registration batch, DB pool)"""
+    from fastapi import Response
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    import fastapi_app.monitoring  # noqa: F401 - metrikalarni ro'yxatdan o'tkazish
+
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 
@@ -4,7 +4,32 @@ import time
 from typing import Dict, Any
 from dataclasses import dataclass
 from datetime import datetime
-from prometheus_client import Counter, Histogram, Gauge
+
+
+class _NullMetric:
+    """prometheus_client o'rnatilmagan muhit (skriptlar, testlar) - metrikalar jim"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    def set(self, *args, **kwargs):
+        pass
+
+    def observe(self, *args, **kwargs):
+        pass
+
+
+# Bir marta, import paytida hal qilinadi - shared modullar MetricsCollector ni to'g'ridan-to'g'ri chaqiradi
+try:
+    from prometheus_client import Counter, Histogram, Gauge
+except ImportError:
+    Counter = Histogram = Gauge = _NullMetric
 
 # Prometheus metrics
 UPDATE_COUNTER = Counter('telegram_updates_total', 'Total Telegram updates', ['bot_id', 'type'])
@@ -12,6 +37,21 @@ PROCESSING_TIME = Histogram('update_processing_seconds', 'Update processing time
 QUEUE_SIZE = Gauge('redis_queue_size', 'Redis queue size', ['bot_id'])
 ACTIVE_WORKERS = Gauge('active_workers_total', 'Active workers count', ['bot_id'])
 ERROR_COUNTER = Counter('processing_errors_total', 'Processing errors', ['bot_id', 'error_type'])
+REGISTRATION_BATCH_FILL = Histogram('registration_batch_fill_ratio', 'Registration batch size / max size', ['bot_id'],
+                                    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0))
+REGISTRATION_BATCH_COMMIT_TIME = Histogram('registration_batch_commit_seconds', 'Registration batch commit time',
+                                           ['bot_id'])
+DB_POOL_CHECKOUT_WAIT = Histogram('db_pool_checkout_wait_seconds', 'Wait for a DB executor thread',
+                                  buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+DB_POOL_IN_USE = Gauge('db_pool_in_use', 'DB executor threads running a call')
+DB_CONNECTIONS_CREATED = Counter('db_connections_created_total', 'New Postgres connections opened')
+TELEGRAM_THROTTLE_EVENTS = Counter('telegram_throttle_events_total', 'Bot API governor events', ['bot_id', 'event'])
+TELEGRAM_THROTTLE_WAIT = Histogram('telegram_throttle_wait_seconds', 'Bot API governor queue / retry_after wait',
+                                   ['event'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+OUTBOUND_QUEUE_DEPTH = Gauge('outbound_queue_depth', 'Messages waiting in the outbound queue')
+OUTBOUND_MESSAGES = Counter('outbound_messages_total', 'Outbound queue deliveries', ['result'])
+OUTBOUND_DELIVERY_TIME = Histogram('outbound_delivery_seconds', 'Enqueue to delivered',
+                                   buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
 
 
 @dataclass
@@ -38,6 +78,35 @@ class MetricsCollector:
     def record_error(bot_id: int, error_type: str):
         ERROR_COUNTER.labels(bot_id=bot_id, error_type=error_type).inc()
 
+    @staticmethod
+    def record_registration_batch(bot_id: int, size: int, max_size: int, duration: float):
+        REGISTRATION_BATCH_FILL.labels(bot_id=bot_id).observe(size / max_size if max_size else 1.0)
+        REGISTRATION_BATCH_COMMIT_TIME.labels(bot_id=bot_id).observe(duration)
+
+    @staticmethod
+    def record_db_pool(wait: float = None, in_use: int = None, created: bool = False):
+        if wait is not None:
+            DB_POOL_CHECKOUT_WAIT.observe(wait)
+        if in_use is not None:
+            DB_POOL_IN_USE.set(in_use)
+        if created:
+            DB_CONNECTIONS_CREATED.inc()
+
+    @staticmethod
+    def record_telegram_throttle(bot_id: int, event: str, seconds: float = 0.0):
+        TELEGRAM_THROTTLE_EVENTS.labels(bot_id=bot_id, event=event).inc()
+        if seconds:
+            TELEGRAM_THROTTLE_WAIT.labels(event=event).observe(seconds)
+
+    @staticmethod
+    def record_outbound(depth: int = None, result: str = None, latency: float = None):
+        if depth is not None:
+            OUTBOUND_QUEUE_DEPTH.set(depth)
+        if result:
+            OUTBOUND_MESSAGES.labels(result=result).inc()
+        if latency is not None:
+            OUTBOUND_DELIVERY_TIME.observe(latency)
+
 
 class PerformanceMonitor:
     """Monitor system performance"""
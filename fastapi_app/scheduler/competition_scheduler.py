@@ -147,7 +147,7 @@ class CompetitionScheduler:
     async def _notify_owner(self, bot_id: int, competition):
         """Bot egasiga xabar yuborish"""
         try:
-            from aiogram import Bot
+            from bots.main_bot.services.notification_service import main_bot_client
             from cryptography.fernet import Fernet
             from asgiref.sync import sync_to_async
 
@@ -166,16 +166,14 @@ class CompetitionScheduler:
             if not main_bot_token:
                 return
 
-            bot = Bot(token=main_bot_token)
-
             text = f"🏁 *Konkurs tugadi!*\n\n"
             text += f"📌 Konkurs: {competition.name}\n"
             text += f"⏰ Tugash vaqti: {competition.end_date.strftime('%Y-%m-%d %H:%M')}\n\n"
             text += "Bot avtomatik to'xtatildi.\n"
             text += "G'oliblarni e'lon qilishni unutmang!"
 
-            await bot.send_message(owner_id, text, parse_mode="Markdown")
-            await bot.session.close()
+            async with main_bot_client(main_bot_token) as bot:
+                await bot.send_message(owner_id, text, parse_mode="Markdown")
 
             logger.info(f"Owner {owner_id} notified about competition end")
 
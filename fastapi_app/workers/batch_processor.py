@@ -1,31 +1,55 @@
 # fastapi_app/workers/batch_processor.py
 """
-Batch Processor - SIMPLIFIED
-Redis metodlari muammosi tufayli soddalashtirildi
-Hozircha batch processing kerak emas - to'g'ridan-to'g'ri process qilinadi
+Batch Processor - write-behind ball ledger flusher
+Vazifasi: Redis stream dagi ballarni davriy ravishda Postgres ga ko'chirish (shared/point_ledger.py)
 """
 import logging
 import asyncio
+from typing import Optional
+
+from shared.constants import POINT_LEDGER_SETTINGS
+from shared.db_executor import run_db
 
 logger = logging.getLogger(__name__)
 
 
 class BatchProcessor:
-    """Simplified batch processor - currently disabled"""
+    """Point ledger flusher"""
 
     def __init__(self):
         self.running = False
+        self._task: Optional[asyncio.Task] = None
 
     async def start(self):
-        """Start - hozircha hech narsa qilmaydi"""
+        """Flush tsiklini ishga tushirish"""
+        if self.running:
+            return
         self.running = True
-        logger.info("✅ Batch processor initialized (simplified mode)")
+        self._task = asyncio.create_task(self._process_loop())
+        logger.info("✅ Batch processor started (point ledger flusher)")
 
     async def stop(self):
-        """Stop"""
+        """Stop - oxirgi marta flush qilib to'xtatish"""
         self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._flush()
         logger.info("Batch processor stopped")
 
     async def _process_loop(self):
-        """Process loop - disabled"""
-        pass
+        """Har flush_interval sekundda ledger ni flush qilish"""
+        while self.running:
+            await self._flush()
+            await asyncio.sleep(POINT_LEDGER_SETTINGS['flush_interval'])
+
+    async def _flush(self):
+        """Bitta flush - DB executor thread ida"""
+        from shared.point_ledger import flush
+        try:
+            await run_db(flush)
+        except Exception as e:
+            logger.error(f"Point ledger flush error: {e}")
@@ -16,6 +16,8 @@ from bots.user_bots.base_template.handlers.start_handler import StartHandler
 from bots.user_bots.base_template.handlers.channel_handler import ChannelHandler
 from bots.user_bots.base_template.services.competition_service import CompetitionService
 from shared.redis_client import redis_client
+from shared.channel_membership import apply_update as apply_membership_update
+from shared.telegram_governor import create_bot
 from shared.constants import BUTTON_TEXTS
 from asgiref.sync import sync_to_async
 from django_app.core.models import BotSetUp
@@ -46,7 +48,7 @@ class BotWorker:
                 return
 
             # Bot init
-            self.bot = Bot(token=self.token)
+            self.bot = create_bot(self.token)
 
             # Test connection
             me = await self.bot.get_me()
@@ -117,6 +119,9 @@ class BotWorker:
             # Callback query
             elif "callback_query" in update:
                 await self._process_callback(update["callback_query"])
+            # Kanal a'zoligi (chat_member / my_chat_member)
+            else:
+                apply_membership_update(update)
         except Exception as e:
             logger.error(f"Process update error: {e}", exc_info=True)
 
@@ -190,6 +195,11 @@ class BotWorker:
                 if 'menu' in self.handlers:
                     await self.handlers['menu'].handle_refresh_rating(callback, self.bot)
 
+            # Reyting sahifalari
+            elif data == "rating_around" or data.startswith("rating_page:"):
+                if 'menu' in self.handlers:
+                    await self.handlers['menu'].handle_rating_page(callback, self.bot)
+
             # Copy link
             elif data == "copy_link":
                 await self.bot.answer_callback_query(callback["id"], "Havolani nusxalash uchun unga uzoq bosing", show_alert=True)
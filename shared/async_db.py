@@ -0,0 +1,299 @@
+# shared/async_db.py
+"""
+Async DB - eng issiq o'qishlar uchun thread siz query qatlami
+Vazifasi: Reyting, participant va konkurs sozlamalarini o'qish DB executor thread
+larini band qilmasin
+
+Django 4.2 ning aget()/afirst()/async for i ichida sync_to_async(thread_sensitive=True)
+- ya'ni hamma o'qish yana bitta thread ga navbatga turadi. Bu yerda QuerySet Django
+da SQL ga compile qilinadi va psycopg2 ning async connection ida (event loop
+add_reader/add_writer orqali) bajariladi - thread ishlatilmaydi.
+
+Connection lar Django bilan bir xil parametrlar bilan ochiladi (OPTIONS - sslmode va h.k.),
+CONN_MAX_AGE dan eski connection yopiladi, CONN_HEALTH_CHECKS da uzoq turgan connection
+ishlatishdan oldin ping qilinadi. Uzilgan connection dagi so'rov yangi connection da bir
+marta qayta bajariladi (faqat o'qish - xavfsiz). Har so'rovga DB_ASYNC_STATEMENT_TIMEOUT -
+oshsa so'rov serverda cancel qilinadi. Natijalarga Django konvertorlari (from_db_value,
+backend konvertorlari) qo'llanadi.
+
+Cheklov: faqat o'qish (autocommit). DB_ASYNC_POOL_SIZE=0 bo'lsa (va testlarda)
+QuerySet oddiy yo'l bilan - DB executor da bajariladi.
+"""
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from shared.db_executor import run_db
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPool:
+    """psycopg2 async connection lar pool i (bitta event loop uchun)"""
+
+    # Shuncha sekund ishlatilmagan connection CONN_HEALTH_CHECKS da ping qilinadi
+    PING_AFTER = 30
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: List[Any] = []
+        self._slots = asyncio.Semaphore(size)
+        self._closed = False
+        self.stats = {'size': size, 'in_use': 0, 'queries': 0, 'created': 0, 'reconnects': 0}
+
+    async def acquire(self):
+        await self._slots.acquire()
+        try:
+            conn = None
+            while self._idle and conn is None:
+                conn = await self._reuse(self._idle.pop())
+            if conn is None:
+                conn = await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+        self.stats['in_use'] += 1
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        self.stats['in_use'] -= 1
+        if broken or conn.closed or self._closed:
+            _close(conn)
+        else:
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+        self._slots.release()
+
+    async def _reuse(self, conn):
+        """Idle connection - eskirgan yoki uzilgan bo'lsa None (yopiladi)"""
+        db = settings.DATABASES['default']
+        max_age = db.get('CONN_MAX_AGE', 0)
+        now = time.monotonic()
+        # CONN_MAX_AGE 0/None - yoshi cheklanmaydi (0 pool da har so'rovga yangi connection bo'lardi)
+        if conn.closed or (max_age and now - conn.created_at > max_age):
+            _close(conn)
+            return None
+        if db.get('CONN_HEALTH_CHECKS') and now - conn.last_used > self.PING_AFTER:
+            try:
+                await _run(conn, 'SELECT 1', None)
+            except (psycopg2.Error, asyncio.TimeoutError):
+                _close(conn)
+                return None
+        return conn
+
+    async def _connect(self):
+        params = connections['default'].get_connection_params()
+        params.pop('cursor_factory', None)
+        conn = psycopg2.connect(async_=True, connection_factory=_Connection, **params)
+        try:
+            await _wait(conn)
+        except BaseException:
+            _close(conn)
+            raise
+        # Django backend kabi: jsonb matn holida qaytsin - JSONField.from_db_value o'zi json.loads qiladi
+        psycopg2.extras.register_default_jsonb(conn_or_curs=conn, loads=lambda x: x)
+        conn.created_at = conn.last_used = time.monotonic()
+        self.stats['created'] += 1
+        return conn
+
+    def close(self):
+        """Idle connection larni yopish; band lari release da yopiladi"""
+        self._closed = True
+        for conn in self._idle:
+            _close(conn)
+        self._idle = []
+
+
+class _Connection(psycopg2.extensions.connection):
+    """Pool uchun vaqt belgilari qo'shilgan connection"""
+    created_at = 0.0
+    last_used = 0.0
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+async def _wait(conn):
+    """conn.poll() tayyor bo'lguncha event loop da kutish"""
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+
+        future = loop.create_future()
+        fd = conn.fileno()
+        if state == psycopg2.extensions.POLL_READ:
+            loop.add_reader(fd, lambda: future.done() or future.set_result(None))
+            remove = loop.remove_reader
+        elif state == psycopg2.extensions.POLL_WRITE:
+            loop.add_writer(fd, lambda: future.done() or future.set_result(None))
+            remove = loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f"poll() returned {state}")
+
+        try:
+            await future
+        finally:
+            remove(fd)
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPool]" = weakref.WeakKeyDictionary()
+
+
+def _get_pool() -> Optional[AsyncPool]:
+    """Joriy event loop pool i (DB_ASYNC_POOL_SIZE=0 bo'lsa None)"""
+    size = getattr(settings, 'DB_ASYNC_POOL_SIZE', 0)
+    if size <= 0:
+        return None
+
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = AsyncPool(size)
+    return pool
+
+
+async def _run(conn, sql: str, params) -> List[Tuple]:
+    """Bitta so'rov; DB_ASYNC_STATEMENT_TIMEOUT oshsa serverda cancel qilinadi"""
+    timeout = getattr(settings, 'DB_ASYNC_STATEMENT_TIMEOUT', 0) or None
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    try:
+        await asyncio.wait_for(_wait(conn), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        try:
+            conn.cancel()
+        except psycopg2.Error:
+            pass
+        raise
+    return cursor.fetchall() if cursor.description else []
+
+
+async def _execute(pool: AsyncPool, sql: str, params) -> List[Tuple]:
+    """So'rov - connection uzilgan bo'lsa yangi connection da bir marta qayta"""
+    for attempt in (1, 2):
+        conn = await pool.acquire()
+        broken = False
+        try:
+            rows = await _run(conn, sql, params)
+            pool.stats['queries'] += 1
+            return rows
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            broken = True
+            if attempt == 1 and conn.closed:
+                pool.stats['reconnects'] += 1
+                logger.warning(f"Async DB connection lost, retrying: {e}")
+                continue
+            raise
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            broken = True
+            raise
+        finally:
+            pool.release(conn, broken)
+
+
+def _compile(queryset) -> Optional[Tuple[Any, str, tuple]]:
+    """QuerySet -> (compiler, sql, params); bo'sh natija aniq bo'lsa None"""
+    compiler = queryset.query.get_compiler(using=queryset.db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return None
+    return compiler, sql, params
+
+
+def _convert(compiler, rows: List[Tuple]) -> List[Tuple]:
+    """Django konvertorlari (from_db_value, backend) - QuerySet natijasi bilan bir xil qiymatlar"""
+    fields = [select[0] for select in compiler.select[:compiler.col_count]]
+    converters = compiler.get_converters(fields)
+    if not converters:
+        return rows
+    return [tuple(row) for row in compiler.apply_converters(rows, converters)]
+
+
+async def fetch_all(queryset) -> List[Tuple]:
+    """values_list() QuerySet qatorlari"""
+    pool = _get_pool()
+    if pool is None:
+        return await run_db(lambda: [tuple(row) for row in queryset])
+
+    compiled = _compile(queryset)
+    if compiled is None:
+        return []
+    compiler, sql, params = compiled
+    return _convert(compiler, await _execute(pool, sql, params))
+
+
+async def fetch_one(queryset) -> Optional[Tuple]:
+    """values_list() QuerySet ning birinchi qatori"""
+    rows = await fetch_all(queryset[:1])
+    return rows[0] if rows else None
+
+
+async def fetch_count(queryset) -> int:
+    """QuerySet.count() ning async varianti"""
+    pool = _get_pool()
+    if pool is None:
+        return await run_db(queryset.count)
+
+    compiled = _compile(queryset.order_by().values('pk'))
+    if compiled is None:
+        return 0
+    _, sql, params = compiled
+    rows = await _execute(pool, f"SELECT COUNT(*) FROM ({sql}) AS subquery", params)
+    return rows[0][0]
+
+
+async def fetch_instances(queryset) -> List[Any]:
+    """Model obyektlari (select_related/only siz QuerySet) - DB ga qayta murojaat qilmasdan"""
+    model = queryset.model
+    pool = _get_pool()
+    if pool is None:
+        return await run_db(list, queryset)
+
+    compiled = _compile(queryset)
+    if compiled is None:
+        return []
+    compiler, sql, params = compiled
+    field_names = [field.attname for field in model._meta.concrete_fields]
+    rows = _convert(compiler, await _execute(pool, sql, params))
+    return [model.from_db(queryset.db, field_names, row) for row in rows]
+
+
+async def fetch_instance(queryset) -> Optional[Any]:
+    """Birinchi model obyekti yoki None"""
+    instances = await fetch_instances(queryset[:1])
+    return instances[0] if instances else None
+
+
+def get_stats() -> dict:
+    """Joriy loop pool metrikalari"""
+    try:
+        pool = _pools.get(asyncio.get_running_loop())
+    except RuntimeError:
+        pool = None
+    return dict(pool.stats) if pool else {'size': getattr(settings, 'DB_ASYNC_POOL_SIZE', 0)}
+
+
+async def shutdown():
+    """Joriy loop pool connection larini yopish (shutdown)"""
+    try:
+        pool = _pools.pop(asyncio.get_running_loop(), None)
+    except RuntimeError:
+        pool = None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,236 @@
+# shared/broadcast.py
+"""
+Broadcast - konkurs ishtirokchilariga ommaviy xabar yuborish
+Vazifasi: 100k+ ishtirokchiga xabarni Telegram ruxsat bergan eng yuqori tezlikda,
+qulab qolsa davom ettira oladigan qilib yuborish
+
+    - Qabul qiluvchilar Participant dan keyset pagination bilan (id > cursor ORDER BY id,
+      participant_broadcast_idx) - OFFSET siz, katta konkursda ham har sahifa bir xil tez
+    - Bitta governor o'rnatilgan Bot (session qayta ishlatiladi), sahifa ichida
+      BROADCAST_SETTINGS['concurrency'] ta parallel yuborish - tezlikni rate governor
+      ushlab turadi (~30/s, paid_broadcast da ~1000/s)
+    - Har sahifadan keyin cursor va natijalar bitta UPDATE da saqlanadi - qayta ishga
+      tushsa ko'pi bilan bitta sahifa qayta yuboriladi
+    - Natijalar ixcham: counter lar + blocked_ids / failed_ids massivlari
+    - Redis lock: bitta broadcast ni bir vaqtda faqat bitta runner yuboradi
+
+Holatlar: pending -> running -> completed; pause / cancel - runner sahifa oxirida to'xtaydi.
+running holatida qolib ketgan (qulagan) broadcast lar resume_broadcasts (Celery) bilan
+qayta ishga tushiriladi.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import (TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+                                TelegramRetryAfter, TelegramServerError)
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import BigIntegerField, F, Func, Value
+from django.utils import timezone
+
+from shared.constants import BROADCAST_SETTINGS, CACHE_KEYS, CACHE_TTL
+from shared.db_executor import run_db
+from shared.redis_client import redis_client
+from shared.telegram_governor import RateLimitDeadline, create_bot
+
+logger = logging.getLogger(__name__)
+
+DELIVERED, BLOCKED, FAILED = 'delivered', 'blocked', 'failed'
+RETRYABLE_ERRORS = (TelegramRetryAfter, TelegramNetworkError, TelegramServerError, RateLimitDeadline)
+
+
+def recipients(competition_id: int):
+    """Broadcast qabul qiluvchilari - id tartibida (keyset)"""
+    from django_app.core.models import Participant
+    return Participant.objects.filter(competition_id=competition_id, is_participant=True).order_by('id')
+
+
+def _start(broadcast_id: int):
+    """pending/running -> running; boshqa holatda None"""
+    from django_app.core.models import Broadcast, BroadcastStatus
+
+    started = Broadcast.objects.filter(
+        id=broadcast_id, status__in=(BroadcastStatus.PENDING, BroadcastStatus.RUNNING)
+    ).update(status=BroadcastStatus.RUNNING, finished_at=None)
+    if not started:
+        return None
+
+    broadcast = Broadcast.objects.select_related('competition__bot').get(id=broadcast_id)
+    if broadcast.started_at is None:
+        broadcast.started_at = timezone.now()
+        broadcast.total_count = recipients(broadcast.competition_id).count()
+        broadcast.save(update_fields=['started_at', 'total_count', 'updated_at'])
+    return broadcast
+
+
+def _next_page(competition_id: int, cursor: int) -> List[Tuple[int, int]]:
+    """(participant_id, telegram_id) - cursor dan keyingi sahifa"""
+    return list(recipients(competition_id).filter(id__gt=cursor).values_list(
+        'id', 'user__telegram_id'
+    )[:BROADCAST_SETTINGS['page_size']])
+
+
+def _array_append(field: str, values: List[int]):
+    return Func(F(field), Value(values, output_field=ArrayField(BigIntegerField())), function='array_cat')
+
+
+def _save_page(broadcast_id: int, cursor: int, results: List[Tuple[int, str]]) -> Optional[str]:
+    """Cursor va natijalarni saqlash; joriy status ni qaytaradi (pause/cancel uchun)"""
+    from django_app.core.models import Broadcast
+
+    blocked = [telegram_id for telegram_id, result in results if result == BLOCKED]
+    failed = [telegram_id for telegram_id, result in results if result == FAILED]
+    Broadcast.objects.filter(id=broadcast_id).update(
+        cursor=cursor,
+        delivered_count=F('delivered_count') + len(results) - len(blocked) - len(failed),
+        blocked_count=F('blocked_count') + len(blocked),
+        failed_count=F('failed_count') + len(failed),
+        blocked_ids=_array_append('blocked_ids', blocked) if blocked else F('blocked_ids'),
+        failed_ids=_array_append('failed_ids', failed) if failed else F('failed_ids'),
+        updated_at=timezone.now()
+    )
+    return Broadcast.objects.filter(id=broadcast_id).values_list('status', flat=True).first()
+
+
+def _finish(broadcast_id: int):
+    from django_app.core.models import Broadcast, BroadcastStatus
+    Broadcast.objects.filter(id=broadcast_id, status=BroadcastStatus.RUNNING).update(
+        status=BroadcastStatus.COMPLETED, finished_at=timezone.now()
+    )
+
+
+async def _deliver(bot: Bot, broadcast, telegram_id: int, slots: asyncio.Semaphore) -> str:
+    """Bitta xabar - DELIVERED / BLOCKED / FAILED"""
+    async with slots:
+        for attempt in range(BROADCAST_SETTINGS['max_attempts']):
+            try:
+                await bot.send_message(
+                    telegram_id,
+                    broadcast.text,
+                    parse_mode=broadcast.parse_mode or None,
+                    allow_paid_broadcast=broadcast.paid_broadcast or None
+                )
+                return DELIVERED
+            except TelegramForbiddenError:
+                return BLOCKED  # Botni bloklagan / akkaunt o'chirilgan
+            except TelegramBadRequest as e:
+                if 'chat not found' in str(e).lower():
+                    return BLOCKED
+                logger.warning(f"Broadcast {broadcast.id} to {telegram_id} failed: {e}")
+                return FAILED
+            except RETRYABLE_ERRORS as e:
+                if attempt + 1 < BROADCAST_SETTINGS['max_attempts']:
+                    await asyncio.sleep(BROADCAST_SETTINGS['retry_delay'] * 2 ** attempt)
+                else:
+                    logger.warning(f"Broadcast {broadcast.id} to {telegram_id} failed: {e}")
+            except Exception as e:
+                logger.error(f"Broadcast {broadcast.id} to {telegram_id} error: {e}")
+                return FAILED
+        return FAILED
+
+
+async def run_broadcast(broadcast_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Broadcast ni cursor dan oxirigacha (yoki pause/cancel gacha) yuborish
+
+    Returns:
+        get_progress() natijasi yoki None (lock band / Redis yo'q / holat mos emas)
+    """
+    from django_app.core.models import BroadcastStatus
+
+    if not redis_client.is_connected():
+        logger.error(f"Broadcast {broadcast_id}: Redis yo'q - lock siz yuborilmaydi")
+        return None
+
+    client = redis_client.client
+    lock_key = CACHE_KEYS['broadcast_lock'].format(broadcast_id=broadcast_id)
+    if not client.set(lock_key, '1', nx=True, ex=CACHE_TTL['broadcast_lock']):
+        logger.info(f"Broadcast {broadcast_id} boshqa runner da")
+        return None
+
+    bot = None
+    try:
+        broadcast = await run_db(_start, broadcast_id)
+        if broadcast is None:
+            return None
+
+        competition = broadcast.competition
+        if not competition.bot:
+            raise ValueError(f"Competition {competition.id} botsiz")
+        bot = create_bot(await run_db(competition.bot.get_token))
+        slots = asyncio.Semaphore(BROADCAST_SETTINGS['concurrency'])
+        cursor = broadcast.cursor
+        logger.info(f"Broadcast {broadcast_id} started: competition={competition.id}, cursor={cursor}")
+
+        while True:
+            page = await run_db(_next_page, competition.id, cursor)
+            if not page:
+                await run_db(_finish, broadcast_id)
+                break
+
+            telegram_ids = [telegram_id for _, telegram_id in page]
+            results = await asyncio.gather(*[
+                _deliver(bot, broadcast, telegram_id, slots) for telegram_id in telegram_ids
+            ])
+            cursor = page[-1][0]
+            status = await run_db(_save_page, broadcast_id, cursor, list(zip(telegram_ids, results)))
+            client.expire(lock_key, CACHE_TTL['broadcast_lock'])
+            if status != BroadcastStatus.RUNNING:
+                logger.info(f"Broadcast {broadcast_id} stopped: {status}")
+                break
+
+        return await run_db(get_progress, broadcast_id)
+    finally:
+        if bot:
+            await bot.session.close()
+        client.delete(lock_key)
+
+
+def get_progress(broadcast_id: int) -> Optional[Dict[str, Any]]:
+    """API / admin uchun holat"""
+    from django_app.core.models import Broadcast
+
+    broadcast = Broadcast.objects.filter(id=broadcast_id).first()
+    if broadcast is None:
+        return None
+
+    elapsed = ((broadcast.finished_at or timezone.now()) - broadcast.started_at).total_seconds() \
+        if broadcast.started_at else 0
+    return {
+        'id': broadcast.id,
+        'competition_id': broadcast.competition_id,
+        'status': broadcast.status,
+        'total': broadcast.total_count,
+        'delivered': broadcast.delivered_count,
+        'blocked': broadcast.blocked_count,
+        'failed': broadcast.failed_count,
+        'progress': broadcast.progress,
+        'rate_per_second': round(broadcast.processed_count / elapsed, 1) if elapsed else 0.0,
+        'started_at': broadcast.started_at.isoformat() if broadcast.started_at else None,
+        'finished_at': broadcast.finished_at.isoformat() if broadcast.finished_at else None
+    }
+
+
+def set_status(broadcast_id: int, action: str) -> bool:
+    """
+    Admin / API amallari: pause, resume, cancel
+
+    resume - pending ga qaytaradi (keyin send_broadcast task i yuboriladi).
+    """
+    from django_app.core.models import Broadcast, BroadcastStatus
+
+    transitions = {
+        'pause': ((BroadcastStatus.PENDING, BroadcastStatus.RUNNING), BroadcastStatus.PAUSED),
+        'resume': ((BroadcastStatus.PAUSED,), BroadcastStatus.PENDING),
+        'cancel': (
+            (BroadcastStatus.PENDING, BroadcastStatus.RUNNING, BroadcastStatus.PAUSED), BroadcastStatus.CANCELED
+        ),
+    }
+    if action not in transitions:
+        raise ValueError(f"Noma'lum amal: {action}")
+
+    allowed, new_status = transitions[action]
+    return bool(Broadcast.objects.filter(id=broadcast_id, status__in=allowed).update(
+        status=new_status, updated_at=timezone.now()
+    ))
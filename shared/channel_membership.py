@@ -0,0 +1,134 @@
+# shared/channel_membership.py
+"""
+Channel membership - chat_member update lari asosida kanal a'zolari to'plami
+Vazifasi: Bot admin bo'lgan kanallarda obuna tekshiruvini getChatMember siz,
+Redis dagi ZSET dan O(log N) bajarish
+
+chat_member update -> ZADD/ZREM channel_member_since:{chat_id} (score - update vaqti) va
+(kanal, user) cache (ChannelService) ni yangilash - chiqib ketgan foydalanuvchi eski
+"a'zo" cache i bilan o'tib ketmasligi uchun.
+my_chat_member -> bot kanalda admin bo'lmay qolsa to'plam o'chiriladi (endi yangilanmaydi).
+Webhook qayta o'rnatilganda (drop_pending_updates - chiqish update lari yo'qolgan bo'lishi
+mumkin) bot kanallari to'plamlari reset_tracking() bilan tozalanadi.
+
+To'plam faqat ijobiy javob uchun va CACHE_TTL['channel_members'] yoshgacha ishonchli:
+eski yozuv (yo'qolgan "left" update) yoki to'plamda yo'q foydalanuvchi - API fallback.
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from shared.constants import CACHE_KEYS, CACHE_TTL
+from shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+MEMBER_STATUSES = ('member', 'administrator', 'creator')
+TRACKED_CHAT_TYPES = ('channel', 'supergroup', 'group')
+
+
+def is_member_status(member: Dict[str, Any]) -> bool:
+    """ChatMember (JSON) - a'zomi"""
+    status = member.get('status')
+    if status == 'restricted':
+        return bool(member.get('is_member', True))
+    return status in MEMBER_STATUSES
+
+
+def apply_update(update: Dict[str, Any]) -> bool:
+    """
+    chat_member / my_chat_member update ni qo'llash
+
+    Returns:
+        Update membership update bo'lsa True (boshqa qayta ishlash kerak emas)
+    """
+    if 'chat_member' in update:
+        _apply_chat_member(update['chat_member'])
+        return True
+    if 'my_chat_member' in update:
+        _apply_my_chat_member(update['my_chat_member'])
+        return True
+    return False
+
+
+def _apply_chat_member(event: Dict[str, Any]):
+    """Foydalanuvchi kanalga qo'shildi / chiqdi"""
+    chat = event.get('chat', {})
+    user = event.get('new_chat_member', {}).get('user', {})
+    if chat.get('type') not in TRACKED_CHAT_TYPES or not user.get('id') or not redis_client.is_connected():
+        return
+
+    chat_id, user_id = chat['id'], user['id']
+    joined = is_member_status(event['new_chat_member'])
+
+    try:
+        pipe = redis_client.client.pipeline(transaction=False)
+        members_key = CACHE_KEYS['channel_members'].format(chat_id=chat_id)
+        now = time.time()
+        if joined:
+            pipe.zadd(members_key, {user_id: now})
+        else:
+            pipe.zrem(members_key, user_id)
+        # Eskirgan yozuvlar va faol bo'lmagan kanal to'plami o'z-o'zidan ketadi
+        pipe.zremrangebyscore(members_key, '-inf', now - CACHE_TTL['channel_members'])
+        pipe.expire(members_key, CACHE_TTL['channel_members'])
+
+        status = 'joined' if joined else 'not_joined'
+        ttl_key = 'channel_member_joined' if joined else 'channel_member_not_joined'
+        pipe.setex(CACHE_KEYS['channel_member'].format(chat_id=chat_id, user_id=user_id), CACHE_TTL[ttl_key], status)
+
+        if chat.get('username'):
+            pipe.setex(CACHE_KEYS['channel_chat_id'].format(username=chat['username'].lower()),
+                       CACHE_TTL['channel_chat_id'], chat_id)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Apply chat_member error: {e}")
+
+
+def _apply_my_chat_member(event: Dict[str, Any]):
+    """Botning o'z holati - admin bo'lmasa kanal a'zolari endi kuzatilmaydi"""
+    chat = event.get('chat', {})
+    if chat.get('type') not in TRACKED_CHAT_TYPES or not redis_client.is_connected():
+        return
+
+    new_status = event.get('new_chat_member', {}).get('status')
+    if new_status in ('administrator', 'creator'):
+        logger.info(f"Membership tracking started for chat {chat.get('id')}")
+        return
+
+    try:
+        redis_client.client.delete(CACHE_KEYS['channel_members'].format(chat_id=chat['id']))
+        logger.info(f"Membership tracking stopped for chat {chat.get('id')} (bot status: {new_status})")
+    except Exception as e:
+        logger.error(f"Apply my_chat_member error: {e}")
+
+
+def is_recent_member(score: Optional[float]) -> bool:
+    """channel_members ZSET dagi score (ZSCORE) - a'zo va yozuv eskirmagan"""
+    return score is not None and score >= time.time() - CACHE_TTL['channel_members']
+
+
+def reset_tracking(channel_usernames: Iterable[str]):
+    """Kanallar a'zolar to'plamlarini tozalash (webhook qayta o'rnatilganda)"""
+    usernames = [username.lstrip('@').lower() for username in channel_usernames if username]
+    if not usernames or not redis_client.is_connected():
+        return
+    try:
+        client = redis_client.client
+        chat_ids = client.mget([CACHE_KEYS['channel_chat_id'].format(username=username) for username in usernames])
+        # '@username' - aniqlanmagan kanal (channel_service), a'zolar to'plami yo'q
+        keys = [CACHE_KEYS['channel_members'].format(chat_id=chat_id)
+                for chat_id in chat_ids if chat_id and not chat_id.startswith('@')]
+        if keys:
+            client.delete(*keys)
+            logger.info(f"Membership tracking reset for {len(keys)} chats")
+    except Exception as e:
+        logger.error(f"Reset membership tracking error: {e}")
+
+
+def extract_user_id(update: Dict[str, Any]) -> Optional[int]:
+    """Membership update dagi foydalanuvchi (a'zoligi o'zgargan)"""
+    for key in ('chat_member', 'my_chat_member'):
+        if key in update:
+            return update[key].get('new_chat_member', {}).get('user', {}).get('id') or update[key]['from']['id']
+    return None
@@ -31,12 +31,29 @@ COMPETITION_STATUSES = {
 # =====================================
 CACHE_KEYS = {
     'bot_settings': 'bot_settings:{bot_id}',
+    'bot_settings_version': 'bot_settings_version:{bot_id}',  # bot_settings dagi 'version' (webhook_reply tekshiradi)
+    'referral_post': 'referral_post:{bot_id}:{user_id}',  # Ishtirokchi tekshirilgan - post cache ishlatsa bo'ladi
     'user_state': 'user_state:{bot_id}:{user_id}',
     'rate_limit': 'rate_limit:{bot_id}:{user_id}:{action}',
     'referral_pending': 'referral_pending:{bot_id}:{user_id}',
     'rating_cache': 'rating_cache:{bot_id}:{user_id}',
     'bot_queue': 'bot_queue:{bot_id}',
-    'channel_check': 'channel_check:{bot_id}:{user_id}'
+    'channel_check': 'channel_check:{bot_id}:{user_id}',
+    'channel_member': 'channel_member:{chat_id}:{user_id}',
+    'channel_members': 'channel_member_since:{chat_id}',  # ZSET: user_id -> chat_member update vaqti
+    'channel_chat_id': 'channel_chat_id:{username}',
+    'channel_recheck': 'channel_recheck:{bot_id}:{user_id}',
+    'leaderboard': 'leaderboard:{competition_id}',
+    'leaderboard_ready': 'leaderboard_ready:{competition_id}',
+    'leaderboard_lock': 'leaderboard_lock:{competition_id}',
+    'leaderboard_rebuilding': 'leaderboard_rebuilding:{competition_id}',
+    'leaderboard_dirty': 'leaderboard_dirty:{competition_id}',
+    'rating_top': 'rating_top:{competition_id}:{version}',
+    'leaderboard_snapshot_prev': 'leaderboard_snapshot_prev:{competition_id}',
+    'points_ledger': 'points_ledger',
+    'points_ledger_lock': 'points_ledger_lock',
+    'broadcast_lock': 'broadcast_lock:{broadcast_id}',
+    'media_file_id': 'media_file_id:{bot_id}'  # HASH: rasm nomi -> Telegram file_id (shared/media_cache.py)
 }
 
 # =====================================
@@ -172,6 +189,92 @@ PRIZE_EMOJIS = {
     10: "🔟"
 }
 
+# =====================================
+# LEADERBOARD - Reyting sahifalari
+# =====================================
+LEADERBOARD_SETTINGS = {
+    'page_size': 10,  # Bitta sahifadagi ishtirokchilar
+    'around_radius': 5,  # "Atrofimdagilar": foydalanuvchidan yuqori va pastdagi N ta
+    'snapshot_top_k': 100  # Tarix snapshot ida saqlanadigan TOP-K
+}
+
+# =====================================
+# POINT LEDGER - Write-behind ballar
+# =====================================
+POINT_LEDGER_SETTINGS = {
+    'batch_size': 1000,  # Bitta flush transaction dagi yozuvlar
+    'flush_interval': 1  # Sekund - flusher tsikli
+}
+
+# =====================================
+# REGISTRATION BATCH - Group-commit ro'yxatdan o'tish
+# =====================================
+REGISTRATION_BATCH_SETTINGS = {
+    'max_size': 500,  # Bitta transaction dagi ro'yxatdan o'tishlar (bot sozlamasi shu bilan cheklanadi)
+    'max_latency_ms': 2000  # Birinchi so'rov kutadigan eng uzoq vaqt
+}
+
+# =====================================
+# TELEGRAM RATE LIMITS - Bot API governor (shared/telegram_governor.py)
+# =====================================
+TELEGRAM_RATE_LIMITS = {
+    'messages_per_second': 30,  # Bot bo'yicha xabarlar
+    'api_per_second': 50,  # Xabar bo'lmagan metodlar (getChatMember, answerCallbackQuery, ...)
+    'paid_messages_per_second': 1000,  # allow_paid_broadcast=True xabarlar
+    'private_per_second': 1,  # Bitta private chat ga
+    'group_per_minute': 20,  # Bitta guruh/kanal ga
+    'chat_burst': 3,  # Chat bucket sig'imi
+    'max_retries': 3,  # RetryAfter dan keyin qayta urinishlar
+    'max_tracked_chats': 50000,  # Shundan oshsa bo'sh chat bucket lari tozalanadi
+    'deadlines': {  # Navbatda kutishning eng uzoq vaqti (sekund)
+        'answerCallbackQuery': 10,  # Telegram callback javobini uzoq kutmaydi
+        'default': 30
+    }
+}
+
+# =====================================
+# OUTBOUND QUEUE - handler xabarlari navbati (shared/outbound_queue.py)
+# =====================================
+OUTBOUND_QUEUE_SETTINGS = {
+    'max_size': 50000,  # Navbatdagi xabarlar - to'lsa handler joy bo'shaguncha kutadi
+    'max_attempts': 4,  # Vaqtinchalik xatolarda urinishlar
+    'retry_delay': 1.0,  # Birinchi qayta urinish kutishi (sekund), keyin 2x
+    'max_bots': 1000  # Umumiy Bot (session) lar - eng eskisi yopiladi
+}
+
+# =====================================
+# MAIN BOT CLIENT - notification lar uchun umumiy client (notification_service.py)
+# =====================================
+MAIN_BOT_CLIENT = {
+    'connection_limit': 100,  # aiohttp connection pool hajmi
+    'batch_concurrency': 20  # send_batch da bir vaqtdagi xabarlar
+}
+
+# =====================================
+# RENDER CACHE - statik javoblar (cache/render_cache.py)
+# =====================================
+RENDER_CACHE_SETTINGS = {
+    'max_entries': 5000,  # (bot_id, settings_version, view) yozuvlari, LRU
+    'max_posts': 20000  # Ishtirokchilar taklif postlari (~1-2 KB dan), LRU
+}
+
+# =====================================
+# WEBHOOK REPLY - webhook javobida javob berish (webhook_reply.py)
+# =====================================
+WEBHOOK_REPLY_SETTINGS = {
+    'settings_ttl': 60  # Xotiradagi bot sozlamalari yashash muddati (sekund)
+}
+
+# =====================================
+# BROADCAST - ishtirokchilarga ommaviy xabar (shared/broadcast.py)
+# =====================================
+BROADCAST_SETTINGS = {
+    'page_size': 500,  # Bitta keyset sahifa (cursor shu sahifadan keyin saqlanadi)
+    'concurrency': 50,  # Bir vaqtda yuborilayotgan xabarlar - tezlikni governor cheklaydi
+    'max_attempts': 3,  # Tarmoq / 5xx xatolarida urinishlar
+    'retry_delay': 1.0  # Birinchi qayta urinish kutishi (sekund), keyin 2x
+}
+
 # =====================================
 # CACHE TTL VALUES (sekundlarda)
 # =====================================
@@ -180,5 +283,17 @@ CACHE_TTL = {
     'user_state': 600,  # 10 minutes
     'rating': 30,  # 30 seconds
     'channel_check': 15,  # 15 seconds
-    'referral_pending': 3600  # 1 hour
+    'channel_member_joined': 600,  # 10 minutes - a'zo
+    'channel_member_not_joined': 15,  # 15 seconds - a'zo emas (tez o'zgaradi)
+    'channel_members': 86400,  # 1 day - a'zolar ZSET idagi yozuvning eng katta yoshi
+    'channel_recheck': 5,  # "A'zo bo'ldim" qayta tekshiruv cooldown i
+    'channel_chat_id': 86400,  # 1 day - @username -> chat ID
+    'channel_chat_id_unresolved': 300,  # 5 minutes - get_chat xato: bot kanalga qo'shilsa tez qayta urinsin
+    'referral_pending': 3600,  # 1 hour
+    'referral_post': 600,  # 10 minutes - keyin ishtirokchi DB dan qayta tekshiriladi
+    'leaderboard_lock': 300,  # 5 minutes - rebuild lock
+    'leaderboard_ready': 86400,  # 1 day - reconcile (har 6 soatda) yangilab turadi
+    'rating_top': 300,  # 5 minutes - render qilingan TOP blok (versiya bilan)
+    'points_ledger_lock': 60,  # 1 minute - ledger flush lock
+    'broadcast_lock': 120  # 2 minutes - runner lock, har sahifada yangilanadi
 }
\ No newline at end of file
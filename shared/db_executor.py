@@ -0,0 +1,167 @@
+# shared/db_executor.py
+"""
+DB executor - ORM chaqiruvlari uchun alohida thread pool
+Vazifasi: sync_to_async (thread_sensitive=True) barcha botlarning DB ishini bitta
+thread ga navbatga qo'yadi. Bu yerda DB_EXECUTOR_THREADS ta thread li pool ishlatiladi.
+
+Har bir thread Django ning o'z (thread-local) connection iga ega. Har chaqiruvdan
+oldin va keyin close_old_connections() - eskirgan / uzilgan connection yopiladi
+(Django request boshida/oxirida qiladigan ish bilan bir xil).
+
+CONN_MAX_AGE bilan thread connection lari persistent - executor amalda connection
+pool: hajmi DB_EXECUTOR_THREADS, checkout = pool thread ini kutish. Metrikalar
+(checkout wait, in-use, yaratilgan connection lar) get_stats() va Prometheus da.
+
+DB_EXECUTOR_THREADS=0 - eski xatti-harakat (thread_sensitive=True). Testlar shu
+rejimda ishlaydi: TestCase transaction i faqat asosiy thread connection ida ko'rinadi.
+"""
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+from fastapi_app.monitoring import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+
+class DBExecutor:
+    """Django ORM uchun thread pool"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+        self._lock = threading.Lock()
+        self.stats = {
+            'threads': max_workers,
+            'in_use': 0,
+            'checkouts': 0,
+            'avg_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """func ni pool thread ida bajarish"""
+        return await sync_to_async(
+            self._call_with_connection, thread_sensitive=False, executor=self._pool
+        )(time.monotonic(), func, *args, **kwargs)
+
+    def _call_with_connection(self, submitted: float, func: Callable, *args, **kwargs) -> Any:
+        """Thread connection ini tekshirib, func ni chaqirish"""
+        self._checkout(time.monotonic() - submitted)
+        try:
+            close_old_connections()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                close_old_connections()
+        finally:
+            with self._lock:
+                self.stats['in_use'] -= 1
+            _observe(in_use=self.stats['in_use'])
+
+    def _checkout(self, wait: float):
+        """Checkout metrikalari - pool thread ini kutish vaqti"""
+        wait_ms = wait * 1000
+        with self._lock:
+            stats = self.stats
+            stats['in_use'] += 1
+            stats['checkouts'] += 1
+            stats['avg_wait_ms'] += (wait_ms - stats['avg_wait_ms']) / stats['checkouts']
+            stats['max_wait_ms'] = max(stats['max_wait_ms'], wait_ms)
+        _observe(wait=wait, in_use=self.stats['in_use'])
+
+    def shutdown(self, wait: bool = True):
+        """Har bir thread connection ini yopib, pool ni to'xtatish"""
+        if wait:
+            # Har thread bittadan vazifa oladi - barrier barchasi band bo'lguncha kutadi
+            barrier = threading.Barrier(self.max_workers)
+
+            def _close():
+                try:
+                    barrier.wait(timeout=5)
+                except threading.BrokenBarrierError:
+                    pass
+                connections.close_all()
+
+            for _ in range(self.max_workers):
+                self._pool.submit(_close)
+        self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[DBExecutor] = None
+_executor_lock = threading.Lock()
+_connections_created = 0
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    """Yangi Postgres connection - persistent rejimda kam bo'lishi kerak"""
+    global _connections_created
+    _connections_created += 1
+    _observe(created=True)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='db_executor_connection_created')
+
+
+def _observe(wait: Optional[float] = None, in_use: Optional[int] = None, created: bool = False):
+    """Prometheus metrikalari"""
+    MetricsCollector.record_db_pool(wait=wait, in_use=in_use, created=created)
+
+
+def get_executor() -> Optional[DBExecutor]:
+    """Jarayon uchun yagona executor (DB_EXECUTOR_THREADS=0 bo'lsa None)"""
+    global _executor
+
+    max_workers = getattr(settings, 'DB_EXECUTOR_THREADS', 0)
+    if max_workers <= 0:
+        return None
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = DBExecutor(max_workers)
+                logger.info(f"DB executor started: {max_workers} threads")
+    return _executor
+
+
+async def run_db(func: Callable, *args, **kwargs) -> Any:
+    """Sync DB funksiyasini executor da bajarish"""
+    executor = get_executor()
+    if executor is None:
+        return await sync_to_async(func)(*args, **kwargs)
+    return await executor.run(func, *args, **kwargs)
+
+
+def db_sync_to_async(func: Callable) -> Callable:
+    """sync_to_async o'rniga dekorator - funksiya DB executor da ishlaydi"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+
+    return wrapper
+
+
+def get_stats() -> Dict[str, Any]:
+    """Pool metrikalari"""
+    stats = dict(_executor.stats) if _executor else {'threads': 0}
+    stats['connections_created'] = _connections_created
+    stats['conn_max_age'] = settings.DATABASES['default'].get('CONN_MAX_AGE', 0)
+    return stats
+
+
+def shutdown():
+    """Executor ni to'xtatish (shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,336 @@
+# shared/leaderboard.py
+"""
+Leaderboard - Redis ZSET asosidagi reyting (har bir konkurs uchun alohida)
+Vazifasi: TOP-N va foydalanuvchi o'rnini O(log N) da olish
+
+Key lar:
+    leaderboard:{competition_id}             ZSET: member=telegram_id, score=current_points
+    leaderboard_ready:{competition_id}       ZSET Postgres dan qurilganini bildiradi (TTL bilan -
+                                             reconcile yangilab turmasa DB ga qaytiladi)
+    leaderboard_rebuilding:{competition_id}  rebuild ishlayapti
+    leaderboard_dirty:{competition_id}       SET: rebuild paytida yozilgan a'zolar
+
+ZSET faqat ready bo'lsa o'qiladi. Ready bo'lmasa RatingService DB ga qaytadi,
+rebuild() esa to'plamni Postgres dan solishtirib tuzatadi va drift ni hisobot qiladi.
+
+Ball o'zgarishi faqat reytingda bor a'zoga qo'llanadi (ZADD XX INCR) - is_participant
+bo'lmaganlar set_score (ro'yxatdan o'tish) siz reytingga tushmaydi. Rebuild paytida
+yozuvlar a'zoni dirty qiladi (Lua - atomik) va rebuild uning live qiymatiga tegmaydi:
+DB snapshot idan keyingi ZINCRBY lar yo'qolmaydi.
+"""
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from shared.redis_client import redis_client
+from shared.constants import CACHE_KEYS, CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# KEYS: leaderboard, rebuilding, dirty; ARGV: mode (set / incr / rem), score, member
+WRITE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('SADD', KEYS[3], ARGV[3])
+end
+if ARGV[1] == 'incr' then
+    return redis.call('ZADD', KEYS[1], 'XX', 'INCR', ARGV[2], ARGV[3])
+elseif ARGV[1] == 'rem' then
+    return redis.call('ZREM', KEYS[1], ARGV[3])
+end
+return redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+"""
+
+# Rebuild tuzatishi - dirty bo'lmagan a'zolarga. KEYS: leaderboard, dirty; ARGV: score1, member1, ...
+# score '-' - a'zoni o'chirish (DB da yo'q)
+FIX_SCRIPT = """
+local applied = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('SISMEMBER', KEYS[2], ARGV[i + 1]) == 0 then
+        if ARGV[i] == '-' then
+            redis.call('ZREM', KEYS[1], ARGV[i + 1])
+        else
+            redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+        end
+        applied = applied + 1
+    end
+end
+return applied
+"""
+
+_scripts = {}
+
+
+def _script(source: str):
+    """Lua script (EVALSHA, kerak bo'lsa SCRIPT LOAD)"""
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = redis_client.client.register_script(source)
+    return script
+
+
+class Leaderboard:
+    """Bitta konkurs uchun Redis ZSET reyting"""
+
+    def __init__(self, competition_id: int):
+        self.competition_id = competition_id
+        self.key = CACHE_KEYS['leaderboard'].format(competition_id=competition_id)
+        self.ready_key = CACHE_KEYS['leaderboard_ready'].format(competition_id=competition_id)
+        self.lock_key = CACHE_KEYS['leaderboard_lock'].format(competition_id=competition_id)
+        self.rebuilding_key = CACHE_KEYS['leaderboard_rebuilding'].format(competition_id=competition_id)
+        self.dirty_key = CACHE_KEYS['leaderboard_dirty'].format(competition_id=competition_id)
+
+    def is_ready(self) -> bool:
+        """ZSET to'liq qurilganmi"""
+        if not redis_client.is_connected():
+            return False
+        try:
+            return bool(redis_client.client.exists(self.ready_key))
+        except Exception as e:
+            logger.error(f"Leaderboard ready check error: {e}")
+            return False
+
+    # =============== WRITE METHODS ===============
+
+    def set_score(self, telegram_id: int, points: int) -> bool:
+        """Ishtirokchi ballini to'g'ridan-to'g'ri o'rnatish (ro'yxatdan o'tganda)"""
+        return self._write('set', telegram_id, points)
+
+    def incr(self, telegram_id: int, delta: int) -> bool:
+        """Ishtirokchi ballini oshirish (DB dagi current_points += delta bilan bir xil) - faqat reytingda bo'lsa"""
+        return self._write('incr', telegram_id, delta)
+
+    def remove(self, telegram_id: int) -> bool:
+        """Ishtirokchini reytingdan olib tashlash"""
+        return self._write('rem', telegram_id, 0)
+
+    def _write(self, mode: str, telegram_id: int, score: int) -> bool:
+        if not redis_client.is_connected():
+            return False
+        try:
+            _script(WRITE_SCRIPT)(
+                keys=[self.key, self.rebuilding_key, self.dirty_key],
+                args=[mode, score, str(telegram_id)],
+                client=redis_client.client
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Leaderboard {mode} error: {e}")
+            return False
+
+    # =============== READ METHODS ===============
+
+    def top(self, limit: int = 10) -> List[Tuple[int, int]]:
+        """TOP-N: [(telegram_id, points), ...] ballar kamayish tartibida"""
+        return self.range(0, limit - 1)
+
+    def top_with_version(self, limit: int = 10) -> Tuple[List[Tuple[int, int]], str]:
+        """
+        TOP-N va uning versiyasi
+
+        Versiya faqat TOP-N a'zolari yoki ballari o'zgarganda o'zgaradi -
+        render qilingan TOP blok cache key sifatida ishlatiladi.
+        """
+        rows = self.top(limit)
+        payload = ','.join(f"{telegram_id}:{points}" for telegram_id, points in rows)
+        return rows, hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def range(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """
+        Pozitsiyalar oralig'i (0 dan, stop ham kiradi) - O(log N + M)
+
+        Returns:
+            [(telegram_id, points), ...] ballar kamayish tartibida
+        """
+        if not redis_client.is_connected():
+            return []
+        try:
+            rows = redis_client.client.zrevrange(self.key, max(0, start), stop, withscores=True)
+            return [(int(member), int(score)) for member, score in rows]
+        except Exception as e:
+            logger.error(f"Leaderboard range error: {e}")
+            return []
+
+    def ranked_range(self, start: int, stop: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """
+        range() va har qatorning o'rni - rank() bilan bir xil qoida (teng ball - bir xil o'rin)
+
+        Returns:
+            ([(telegram_id, points), ...], [rank, ...])
+        """
+        rows = self.range(start, stop)
+        if not rows:
+            return rows, []
+        first_rank = 1
+        if start > 0:
+            try:
+                first_rank = redis_client.client.zcount(self.key, f"({rows[0][1]}", "+inf") + 1
+            except Exception as e:
+                logger.error(f"Leaderboard ranked range error: {e}")
+                first_rank = start + 1
+        return rows, competition_ranks([points for _, points in rows], max(0, start), first_rank)
+
+    def position(self, telegram_id: int) -> Optional[int]:
+        """Foydalanuvchining tartibdagi pozitsiyasi (0 dan) - ZREVRANK, O(log N)"""
+        if not redis_client.is_connected():
+            return None
+        try:
+            return redis_client.client.zrevrank(self.key, str(telegram_id))
+        except Exception as e:
+            logger.error(f"Leaderboard position error: {e}")
+            return None
+
+    def rank(self, telegram_id: int) -> Optional[Dict[str, int]]:
+        """
+        Foydalanuvchi o'rni - DB dagi COUNT(current_points > x) + 1 bilan bir xil
+
+        Returns:
+            {'rank': int, 'points': int} yoki None (reytingda yo'q)
+        """
+        if not redis_client.is_connected():
+            return None
+        try:
+            score = redis_client.client.zscore(self.key, str(telegram_id))
+            if score is None:
+                return None
+            higher_count = redis_client.client.zcount(self.key, f"({score}", "+inf")
+            return {'rank': higher_count + 1, 'points': int(score)}
+        except Exception as e:
+            logger.error(f"Leaderboard rank error: {e}")
+            return None
+
+    def count(self) -> int:
+        """Reytingdagi ishtirokchilar soni"""
+        if not redis_client.is_connected():
+            return 0
+        try:
+            return redis_client.client.zcard(self.key)
+        except Exception:
+            return 0
+
+    # =============== RECONCILE ===============
+
+    def try_rebuild(self) -> Optional[Dict[str, int]]:
+        """Lock bilan rebuild - bir vaqtda faqat bitta rebuild ishlaydi"""
+        if not redis_client.is_connected():
+            return None
+        try:
+            locked = redis_client.client.set(self.lock_key, '1', nx=True, ex=CACHE_TTL['leaderboard_lock'])
+            if not locked:
+                return None
+            try:
+                return self.rebuild()
+            finally:
+                redis_client.client.delete(self.lock_key)
+        except Exception as e:
+            logger.error(f"Leaderboard try rebuild error: {e}")
+            return None
+
+    def rebuild(self, chunk_size: int = 5000) -> Dict[str, int]:
+        """
+        ZSET ni Postgres bilan solishtirib tuzatish va drift ni hisoblash
+
+        Avval rebuilding belgisi qo'yiladi, keyin Participant lar chunk larda stream
+        qilinadi: live ZSET dan farq qilgan a'zolar joyida tuzatiladi, rebuild paytida
+        yozilgan (dirty) a'zolarga tegilmaydi. DB da yo'q a'zolar oxirida o'chiriladi.
+        Live key almashtirilmaydi - parallel ZINCRBY lar yo'qolmaydi.
+
+        Returns:
+            {participants, missing, mismatched, extra, skipped} - drift hisoboti
+        """
+        from django_app.core.models import Participant
+
+        client = redis_client.client
+        members_key = f"{self.key}:rebuild"
+        ttl = CACHE_TTL['leaderboard_lock']
+        client.delete(members_key, self.dirty_key)
+        client.set(self.rebuilding_key, '1', ex=ttl)
+
+        report = {'competition_id': self.competition_id, 'participants': 0, 'missing': 0, 'mismatched': 0,
+                  'extra': 0, 'skipped': 0}
+        try:
+            rows = Participant.objects.filter(
+                competition_id=self.competition_id,
+                is_participant=True
+            ).values_list('user__telegram_id', 'current_points').iterator(chunk_size=chunk_size)
+
+            batch: List[Tuple[int, int]] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    self._fix_chunk(client, members_key, batch, report)
+                    batch = []
+                    client.expire(self.rebuilding_key, ttl)
+                    client.expire(self.lock_key, ttl)
+            if batch:
+                self._fix_chunk(client, members_key, batch, report)
+
+            self._remove_extra(client, members_key, chunk_size, report)
+            client.set(self.ready_key, '1', ex=CACHE_TTL['leaderboard_ready'])
+        finally:
+            client.delete(self.rebuilding_key, self.dirty_key, members_key)
+
+        if report['missing'] or report['mismatched'] or report['extra']:
+            logger.warning(f"Leaderboard drift: {report}")
+        else:
+            logger.info(f"Leaderboard rebuilt without drift: {report}")
+
+        return report
+
+    def _fix_chunk(self, client, members_key: str, batch: List[Tuple[int, int]], report: Dict[str, int]):
+        """Chunk ni live ZSET bilan solishtirish va farqlarni tuzatish"""
+        members = [str(telegram_id) for telegram_id, _ in batch]
+        live_scores = client.zmscore(self.key, members)
+
+        fixes = []
+        for (telegram_id, points), live in zip(batch, live_scores):
+            if live is None:
+                report['missing'] += 1
+            elif int(live) == points:
+                continue
+            else:
+                report['mismatched'] += 1
+            fixes.extend((points, str(telegram_id)))
+
+        if fixes:
+            applied = _script(FIX_SCRIPT)(keys=[self.key, self.dirty_key], args=fixes, client=client)
+            report['skipped'] += len(fixes) // 2 - applied
+        client.sadd(members_key, *members)
+        report['participants'] += len(batch)
+
+    def _remove_extra(self, client, members_key: str, chunk_size: int, report: Dict[str, int]):
+        """Live ZSET da bo'lib, DB da ishtirokchi bo'lmagan a'zolarni o'chirish"""
+        live = [member for member, _ in client.zscan_iter(self.key, count=chunk_size)]
+        for start in range(0, len(live), chunk_size):
+            chunk = live[start:start + chunk_size]
+            extra = [member for member, known in zip(chunk, client.smismember(members_key, chunk)) if not known]
+            if extra:
+                args = [value for member in extra for value in ('-', member)]
+                report['extra'] += _script(FIX_SCRIPT)(keys=[self.key, self.dirty_key], args=args, client=client)
+
+
+def competition_ranks(points: List[int], start: int, first_rank: int) -> List[int]:
+    """
+    Kamayish tartibidagi ballar uchun o'rinlar: COUNT(ball > x) + 1 ("1, 2, 2, 4")
+
+    Teng ball - oldingi qator o'rni; aks holda oldingi hamma qatorlar balandroq,
+    ya'ni o'rin = pozitsiya + 1. Faqat birinchi qator o'rni tashqaridan (first_rank).
+    """
+    ranks: List[int] = []
+    for offset, value in enumerate(points):
+        if offset and value == points[offset - 1]:
+            ranks.append(ranks[-1])
+        else:
+            ranks.append(start + offset + 1 if offset else first_rank)
+    return ranks
+
+
+def on_participant_registered(competition_id: int, telegram_id: int, points: int):
+    """Yangi ishtirokchini DB commit bo'lgandan keyin reytingga qo'shish"""
+    from django.db import transaction
+    transaction.on_commit(lambda: Leaderboard(competition_id).set_score(telegram_id, points))
+
+
+def on_points_changed(competition_id: int, telegram_id: int, delta: int):
+    """Ball o'zgarishini DB commit bo'lgandan keyin reytingga qo'llash"""
+    from django.db import transaction
+    transaction.on_commit(lambda: Leaderboard(competition_id).incr(telegram_id, delta))
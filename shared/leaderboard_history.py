@@ -0,0 +1,173 @@
+# shared/leaderboard_history.py
+"""
+Leaderboard history - reyting tarixi (LeaderboardSnapshot)
+Vazifasi: Periodik snapshot olish, ishtirokchi o'rni tarixini va istalgan vaqtdagi TOP-K ni berish
+
+Snapshot Redis ZSET dan olinadi (Point jadvali o'qilmaydi):
+    - TOP-K - massivlarda
+    - ball taqsimoti - RLE (har xil ball -> ishtirokchilar soni)
+    - delta - faqat oldingi snapshot dan beri bali o'zgarganlar
+
+Oldingi snapshot dagi ballar leaderboard_snapshot_prev:{competition_id} ZSET da
+saqlanadi va delta shu bilan solishtirib topiladi.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from shared.constants import CACHE_KEYS, LEADERBOARD_SETTINGS
+from shared.leaderboard import Leaderboard
+from shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def take_snapshot(competition_id: int, top_k: Optional[int] = None, chunk_size: int = 5000):
+    """
+    Konkurs reytingining snapshot ini olish
+
+    Returns:
+        LeaderboardSnapshot yoki None (Redis yo'q / leaderboard tayyor emas)
+    """
+    from django_app.core.models import LeaderboardSnapshot
+
+    if not redis_client.is_connected():
+        return None
+
+    leaderboard = Leaderboard(competition_id)
+    if not leaderboard.is_ready():
+        leaderboard.try_rebuild()
+        if not leaderboard.is_ready():
+            return None
+
+    top_k = top_k or LEADERBOARD_SETTINGS['snapshot_top_k']
+    client = redis_client.client
+    prev_key = CACHE_KEYS['leaderboard_snapshot_prev'].format(competition_id=competition_id)
+    frozen_key = f"{leaderboard.key}:snapshot"
+
+    # Snapshot davomida ballar o'zgarsa ham izchil bo'lishi uchun nusxa
+    taken_at = timezone.now()
+    total = client.zunionstore(frozen_key, [leaderboard.key])
+
+    top_ids, top_points = [], []
+    score_values, score_counts = [], []
+    changed_ids, changed_points = [], []
+
+    for start in range(0, total, chunk_size):
+        rows = client.zrevrange(frozen_key, start, start + chunk_size - 1, withscores=True)
+        prev_scores = client.zmscore(prev_key, [member for member, _ in rows])
+
+        for (member, score), prev in zip(rows, prev_scores):
+            telegram_id, points = int(member), int(score)
+
+            if len(top_ids) < top_k:
+                top_ids.append(telegram_id)
+                top_points.append(points)
+
+            if score_values and score_values[-1] == points:
+                score_counts[-1] += 1
+            else:
+                score_values.append(points)
+                score_counts.append(1)
+
+            if prev is None or int(prev) != points:
+                changed_ids.append(telegram_id)
+                changed_points.append(points)
+
+    snapshot = LeaderboardSnapshot.objects.create(
+        competition_id=competition_id,
+        taken_at=taken_at,
+        participants_count=total,
+        top_ids=top_ids,
+        top_points=top_points,
+        score_values=score_values,
+        score_counts=score_counts,
+        changed_ids=changed_ids,
+        changed_points=changed_points
+    )
+
+    # Keyingi delta uchun baza - faqat DB ga yozilgandan keyin
+    if total:
+        client.rename(frozen_key, prev_key)
+    else:
+        client.delete(prev_key)
+
+    logger.info(
+        f"Leaderboard snapshot: competition={competition_id}, participants={total}, changed={len(changed_ids)}"
+    )
+    return snapshot
+
+
+def get_top_at(competition_id: int, at: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Berilgan vaqtdagi TOP-K (o'sha vaqtgacha olingan oxirgi snapshot)
+
+    Returns:
+        {'taken_at', 'participants_count', 'top': [{'rank', 'telegram_id', 'points'}]} yoki None
+    """
+    from django_app.core.models import LeaderboardSnapshot
+
+    snapshot = LeaderboardSnapshot.objects.filter(
+        competition_id=competition_id,
+        taken_at__lte=at
+    ).order_by('-taken_at').only('taken_at', 'participants_count', 'top_ids', 'top_points').first()
+
+    if not snapshot:
+        return None
+
+    return {
+        'taken_at': snapshot.taken_at,
+        'participants_count': snapshot.participants_count,
+        'top': [
+            {'rank': i, 'telegram_id': telegram_id, 'points': points}
+            for i, (telegram_id, points) in enumerate(zip(snapshot.top_ids, snapshot.top_points), 1)
+        ]
+    }
+
+
+def get_rank_series(competition_id: int, telegram_id: int) -> List[Dict[str, Any]]:
+    """
+    Ishtirokchining o'rni tarixi
+
+    Ishtirokchi ballari faqat u o'zgargan snapshot larda saqlangan (GIN index bilan
+    topiladi), o'rin esa har bir snapshot ning ball taqsimotidan hisoblanadi.
+
+    Returns:
+        [{'taken_at', 'rank', 'points', 'participants_count'}, ...] vaqt bo'yicha
+    """
+    from django_app.core.models import LeaderboardSnapshot
+
+    changes = dict(
+        LeaderboardSnapshot.objects.filter(
+            competition_id=competition_id,
+            changed_ids__contains=[telegram_id]
+        ).annotate(
+            points=RawSQL("changed_points[array_position(changed_ids, %s)]", (telegram_id,))
+        ).values_list('id', 'points')
+    )
+
+    if not changes:
+        return []
+
+    snapshots = LeaderboardSnapshot.objects.filter(
+        competition_id=competition_id
+    ).order_by('taken_at').only('id', 'taken_at', 'participants_count', 'score_values', 'score_counts')
+
+    series = []
+    points = None
+    for snapshot in snapshots.iterator():
+        points = changes.get(snapshot.id, points)
+        if points is None:
+            # Hali reytingda bo'lmagan
+            continue
+        series.append({
+            'taken_at': snapshot.taken_at,
+            'rank': snapshot.rank_for(points),
+            'points': points,
+            'participants_count': snapshot.participants_count
+        })
+
+    return series
@@ -0,0 +1,163 @@
+# shared/media_cache.py
+"""
+Media cache - konkurs rasmlari uchun Telegram file_id
+Vazifasi: Welcome / promo rasm har bir ishtirokchiga qayta yuklanmasin
+
+Rasm bot bo'yicha bir marta yuklanadi, javobdagi file_id saqlanadi va keyingi
+yuborishlar file_id bilan (yuklash yo'q). file_id faqat uni olgan bot uchun
+ishlaydi - shuning uchun kalit bot bo'yicha:
+    media_file_id:{bot_id} (HASH) - rasm nomi (storage path) -> file_id
+Admin rasmni almashtirsa nom o'zgaradi (eski yozuv ishlatilmaydi) va invalidate()
+hash ni o'chiradi. Telegram file_id ni rad etsa - yozuv o'chiriladi, qayta yuklanadi
+(shuning uchun file_id li yuborish ham outbound navbatiga qo'yilmaydi).
+
+Jarayon ichida bir vaqtda kelgan yuborishlar bitta yuklashni kutadi (single-flight) -
+launch paytidagi /start to'lqini rasmni yuzlab marta yuklamaydi.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, URLInputFile
+from django.core.files.storage import default_storage
+
+from shared import outbound_queue
+from shared.constants import CACHE_KEYS
+from shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+CAPTION_LIMIT = 1024  # Telegram caption limiti
+
+_file_ids: Dict[Tuple[int, str], str] = {}
+_uploads: Dict[Tuple[int, str], asyncio.Future] = {}
+_stats = {'hits': 0, 'uploads': 0}
+
+
+def _input_file(image_name: str):
+    """Storage dagi rasm - lokal fayl yoki URL"""
+    try:
+        return FSInputFile(default_storage.path(image_name))
+    except NotImplementedError:
+        return URLInputFile(default_storage.url(image_name))
+
+
+def get_file_id(bot_id: int, image_name: str) -> Optional[str]:
+    key = (bot_id, image_name)
+    file_id = _file_ids.get(key)
+    if file_id is None and redis_client.is_connected():
+        try:
+            file_id = redis_client.client.hget(CACHE_KEYS['media_file_id'].format(bot_id=bot_id), image_name)
+            if file_id:
+                _file_ids[key] = file_id
+        except Exception as e:
+            logger.error(f"Get file_id error: {e}")
+    return file_id
+
+
+def _store(bot_id: int, image_name: str, file_id: str):
+    _file_ids[(bot_id, image_name)] = file_id
+    if redis_client.is_connected():
+        try:
+            redis_client.client.hset(CACHE_KEYS['media_file_id'].format(bot_id=bot_id), image_name, file_id)
+        except Exception as e:
+            logger.error(f"Store file_id error: {e}")
+
+
+def _forget(bot_id: int, image_name: str):
+    _file_ids.pop((bot_id, image_name), None)
+    if redis_client.is_connected():
+        try:
+            redis_client.client.hdel(CACHE_KEYS['media_file_id'].format(bot_id=bot_id), image_name)
+        except Exception as e:
+            logger.error(f"Forget file_id error: {e}")
+
+
+def invalidate(bot_id: int):
+    """Bot ning barcha file_id lari (admin rasmni almashtirganda)"""
+    for key in [key for key in _file_ids if key[0] == bot_id]:
+        del _file_ids[key]
+    if redis_client.is_connected():
+        try:
+            redis_client.client.delete(CACHE_KEYS['media_file_id'].format(bot_id=bot_id))
+        except Exception as e:
+            logger.error(f"Invalidate file_id error: {e}")
+
+
+async def send_photo(bot: Bot, bot_id: int, chat_id: int, image_name: str, **kwargs) -> bool:
+    """
+    Rasmni yuborish - file_id bo'lsa u bilan, aks holda yuklab file_id ni saqlash
+
+    Returns:
+        Yuborildi - False bo'lsa handler matnni o'zi yuboradi
+    """
+    key = (bot_id, image_name)
+    try:
+        file_id = get_file_id(bot_id, image_name)
+        if file_id is None and key in _uploads:
+            # Boshqa yuborish yuklayapti - uning file_id sini kutish
+            try:
+                file_id = await asyncio.shield(_uploads[key])
+            except Exception:
+                file_id = None
+
+        if file_id:
+            try:
+                # Navbatsiz - eskirgan file_id xatosi shu yerda ushlanadi
+                with outbound_queue.inline():
+                    await bot.send_photo(chat_id, file_id, **kwargs)
+                _stats['hits'] += 1
+                return True
+            except TelegramBadRequest as e:
+                if 'file' not in str(e).lower():
+                    raise
+                logger.warning(f"file_id rejected for bot {bot_id} ({image_name}): {e}")
+                _forget(bot_id, image_name)
+
+        return await _upload(bot, bot_id, chat_id, image_name, **kwargs)
+
+    except Exception as e:
+        logger.error(f"Send photo error: {e}")
+        return False
+
+
+async def _upload(bot: Bot, bot_id: int, chat_id: int, image_name: str, **kwargs) -> bool:
+    """Yuklash (natija kerak - navbatsiz) va file_id ni saqlash"""
+    key = (bot_id, image_name)
+    future = asyncio.get_running_loop().create_future()
+    _uploads[key] = future
+    try:
+        message = await bot.send_photo(chat_id, _input_file(image_name), **kwargs)
+        file_id = message.photo[-1].file_id
+        _store(bot_id, image_name, file_id)
+        _stats['uploads'] += 1
+        logger.info(f"Image uploaded for bot {bot_id}: {image_name}")
+        future.set_result(file_id)
+        return True
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # kutuvchi bo'lmasa "never retrieved" ogohlantirishi chiqmasin
+        raise
+    finally:
+        if _uploads.get(key) is future:
+            del _uploads[key]
+
+
+async def send_with_image(bot: Bot, bot_id: int, chat_id: int, image_name: Optional[str], text: str, **kwargs):
+    """
+    Matn rasm bilan (caption) - rasm bo'lmasa yoki yuborilmasa oddiy xabar.
+    Matn caption ga sig'masa rasm va matn alohida yuboriladi.
+    """
+    if image_name:
+        if len(text) <= CAPTION_LIMIT:
+            if await send_photo(bot, bot_id, chat_id, image_name, caption=text, **kwargs):
+                return
+        else:
+            await send_photo(bot, bot_id, chat_id, image_name)
+    await bot.send_message(chat_id, text, **kwargs)
+
+
+def get_stats() -> Dict[str, int]:
+    return dict(_stats, cached=len(_file_ids))
@@ -0,0 +1,261 @@
+# shared/outbound_queue.py
+"""
+Outbound queue - handler lardan Telegram ga ketadigan xabarlar navbati
+Vazifasi: Handler send/edit/answer ni navbatga qo'yib darhol qaytadi - sekin Telegram
+javobi DB thread, worker slot va foydalanuvchi navbatini band qilmaydi
+
+create_queued_bot() bilan yaratilgan bot da QUEUED_METHODS chaqiruvlari (sendMessage,
+editMessageText, answerCallbackQuery, ...) navbatga qo'yiladi va None qaytaradi.
+Javobi kerak metodlar (getMe, getChatMember, ...), fayl yuklash va inline() bloki ichidagi
+chaqiruvlar odatdagidek bajariladi.
+
+Chat lane lari:
+    - har chat (yoki callback) ning o'z deque si va task i - xabarlar ketma-ket, tartib saqlanadi;
+      lane bo'shasa task tugaydi
+    - bir vaqtda OUTBOUND_QUEUE_SENDERS tagacha chat yuboradi; sekin yoki 429 dagi chat
+      boshqa chat larni kutdirmaydi (retry kutishi slot siz)
+    - retry: RetryAfter / tarmoq / 5xx xatolarida lane boshidagi xabar qayta urinadi
+      (tartib buzilmaydi); BadRequest / Forbidden - tashlab yuboriladi
+    - navbat to'la (max_size) bo'lsa handler joy bo'shaguncha kutadi - back-pressure,
+      navbatni chetlab yuborish yo'q
+Yuborish token bo'yicha umumiy Bot (create_bot) orqali - ya'ni rate governor dan o'tadi.
+
+OUTBOUND_QUEUE_SENDERS=0 bo'lsa (va testlarda) chaqiruvlar handler ichida bajariladi.
+"""
+import asyncio
+import logging
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.types import InputFile
+from django.conf import settings
+
+from fastapi_app.monitoring import MetricsCollector
+from shared.constants import OUTBOUND_QUEUE_SETTINGS
+from shared.telegram_governor import RateLimitDeadline, create_bot
+
+logger = logging.getLogger(__name__)
+
+QUEUED_METHODS = frozenset({
+    'sendMessage', 'sendPhoto', 'sendDocument', 'sendVideo', 'sendAnimation',
+    'editMessageText', 'editMessageReplyMarkup', 'editMessageCaption',
+    'answerCallbackQuery', 'deleteMessage'
+})
+RETRYABLE_ERRORS = (TelegramRetryAfter, TelegramNetworkError, TelegramServerError, RateLimitDeadline)
+
+_inline: ContextVar[bool] = ContextVar('outbound_inline', default=False)
+
+
+class OutboundItem:
+    """Navbatdagi bitta API chaqiruv"""
+
+    __slots__ = ('token', 'method', 'key', 'enqueued_at', 'attempts')
+
+    def __init__(self, token: str, method):
+        self.token = token
+        self.method = method
+        chat_id = getattr(method, 'chat_id', None)
+        self.key = chat_id if chat_id is not None else getattr(method, 'callback_query_id', None)
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class OutboundQueue:
+    """Chat lane lari pool i (bitta event loop uchun)"""
+
+    def __init__(self, senders: int):
+        self.senders = senders
+        self._lanes: Dict[Any, Deque[OutboundItem]] = {}
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(senders)
+        self._size = 0
+        self._space = asyncio.Event()
+        self._space.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._bots: "OrderedDict[str, Bot]" = OrderedDict()
+        self.stats = {'senders': senders, 'enqueued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'waited': 0}
+
+    async def put(self, item: OutboundItem):
+        """Chat lane iga qo'yish - navbat to'la bo'lsa joy bo'shaguncha kutadi (back-pressure)"""
+        if self._size >= OUTBOUND_QUEUE_SETTINGS['max_size']:
+            self.stats['waited'] += 1
+            while self._size >= OUTBOUND_QUEUE_SETTINGS['max_size']:
+                self._space.clear()
+                await self._space.wait()
+
+        lane = self._lanes.get(item.key)
+        if lane is None:
+            lane = self._lanes[item.key] = deque()
+            self._tasks[item.key] = asyncio.create_task(self._lane(item.key, lane))
+        lane.append(item)
+        self._size += 1
+        self._idle.clear()
+        self.stats['enqueued'] += 1
+        _observe(depth=self._size)
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    async def _lane(self, key, lane: Deque[OutboundItem]):
+        """Bitta chat xabarlari - ketma-ket; lane bo'shasa task tugaydi"""
+        try:
+            while lane:
+                item = lane[0]
+                try:
+                    async with self._slots:
+                        delay = await self._send(item)
+                except Exception as e:
+                    logger.error(f"Outbound lane {key} error: {e}", exc_info=True)
+                    delay = None
+                if delay is not None:
+                    # Retry kutishi slot siz - boshqa chat lar yuborishda davom etadi
+                    await asyncio.sleep(delay)
+                    continue
+                lane.popleft()
+                self._size -= 1
+                self._space.set()
+                _observe(depth=self._size)
+        finally:
+            self._lanes.pop(key, None)
+            self._tasks.pop(key, None)
+            if not self._lanes:
+                self._idle.set()
+
+    async def _send(self, item: OutboundItem) -> Optional[float]:
+        """Bitta urinish; vaqtinchalik xatoda qayta urinish kutishi, aks holda None"""
+        max_attempts = OUTBOUND_QUEUE_SETTINGS['max_attempts']
+        api_method = item.method.__api_method__
+        item.attempts += 1
+        try:
+            await self._bot(item.token)(item.method)
+            self.stats['sent'] += 1
+            _observe(result='sent', latency=time.monotonic() - item.enqueued_at)
+        except RETRYABLE_ERRORS as e:
+            if item.attempts >= max_attempts:
+                self.stats['failed'] += 1
+                _observe(result='failed')
+                logger.error(f"Outbound {api_method} to {item.key} dropped after {item.attempts} attempts: {e}")
+                return None
+            delay = getattr(e, 'retry_after', None) or \
+                OUTBOUND_QUEUE_SETTINGS['retry_delay'] * 2 ** (item.attempts - 1)
+            self.stats['retried'] += 1
+            _observe(result='retried')
+            logger.warning(f"Outbound {api_method} to {item.key} retry in {delay}s: {e}")
+            return delay
+        except Exception as e:
+            self.stats['failed'] += 1
+            _observe(result='failed')
+            logger.warning(f"Outbound {api_method} to {item.key} failed: {e}")
+        return None
+
+    def _bot(self, token: str) -> Bot:
+        """Token bo'yicha umumiy Bot (session qayta ishlatiladi)"""
+        bot = self._bots.get(token)
+        if bot is None:
+            bot = self._bots[token] = create_bot(token)
+            if len(self._bots) > OUTBOUND_QUEUE_SETTINGS['max_bots']:
+                _, old_bot = self._bots.popitem(last=False)
+                asyncio.create_task(old_bot.session.close())
+        else:
+            self._bots.move_to_end(token)
+        return bot
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Navbatdagi hamma xabar yuborilguncha kutish"""
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for bot in self._bots.values():
+            await bot.session.close()
+        self._bots.clear()
+
+
+@contextmanager
+def inline():
+    """
+    Blok ichidagi chaqiruvlar navbatsiz - natija va xato chaqiruvchiga qaytadi
+    (masalan media_cache: eskirgan file_id ning BadRequest i ko'rinishi kerak)
+    """
+    token = _inline.set(True)
+    try:
+        yield
+    finally:
+        _inline.reset(token)
+
+
+def _sent_inline(method) -> bool:
+    """Fayl yuklash (javobdagi file_id kerak) yoki inline() bloki - navbatsiz yuboriladi"""
+    return _inline.get() or any(isinstance(value, InputFile) for value in vars(method).values())
+
+
+class QueuedBot(Bot):
+    """Bot - QUEUED_METHODS navbatga qo'yiladi, qolganlari odatdagidek"""
+
+    async def __call__(self, method, request_timeout: Optional[int] = None):
+        queue = get_queue()
+        if queue is not None and method.__api_method__ in QUEUED_METHODS and not _sent_inline(method):
+            await queue.put(OutboundItem(self.token, method))
+            return None
+        return await super().__call__(method, request_timeout)
+
+
+_queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OutboundQueue]" = weakref.WeakKeyDictionary()
+
+
+def get_queue() -> Optional[OutboundQueue]:
+    """Joriy event loop navbati (OUTBOUND_QUEUE_SENDERS=0 bo'lsa None)"""
+    senders = getattr(settings, 'OUTBOUND_QUEUE_SENDERS', 0)
+    if senders <= 0:
+        return None
+
+    loop = asyncio.get_running_loop()
+    queue = _queues.get(loop)
+    if queue is None:
+        queue = _queues[loop] = OutboundQueue(senders)
+        logger.info(f"Outbound queue started: {senders} senders")
+    return queue
+
+
+def create_queued_bot(token: str, **kwargs) -> Bot:
+    """Send/edit/answer navbat orqali ketadigan Bot (governor ham o'rnatilgan)"""
+    return create_bot(token, bot_class=QueuedBot, **kwargs)
+
+
+def get_stats() -> Dict[str, Any]:
+    """Joriy loop navbati metrikalari"""
+    try:
+        queue = _queues.get(asyncio.get_running_loop())
+    except RuntimeError:
+        queue = None
+    if queue is None:
+        return {'senders': 0}
+    return dict(queue.stats, depth=queue.depth)
+
+
+async def shutdown(timeout: float = 10):
+    """Navbatni yuborib bo'lib, sender larni to'xtatish"""
+    queue = _queues.pop(asyncio.get_running_loop(), None)
+    if queue is None:
+        return
+    try:
+        await queue.drain(timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Outbound queue shutdown: {queue.depth} messages not sent")
+    await queue.close()
+
+
+def _observe(depth: Optional[int] = None, result: Optional[str] = None, latency: Optional[float] = None):
+    """Prometheus metrikalari"""
+    MetricsCollector.record_outbound(depth=depth, result=result, latency=latency)
@@ -0,0 +1,309 @@
+# shared/point_ledger.py
+"""
+Point ledger - write-behind ballar (Redis stream -> Postgres)
+Vazifasi: Har bir ball uchun Participant qatorini lock qilmaslik
+
+award() ballni DB commit bo'lgandan keyin Redis stream ga yozadi (XADD - atomik).
+flush() stream ni tartib bilan o'qiydi va bitta transaction da:
+    - Point larni bulk_create qiladi
+    - current_points va breakdown counter larini F() bilan guruhlab oshiradi
+      (bir xil delta - bitta UPDATE)
+    - checkpoint (oxirgi stream ID) ni yangilaydi
+So'ng ko'chirilgan yozuvlar XTRIM bilan o'chiriladi. Flusher qulab qolsa,
+checkpoint dan keyingi yozuvlardan davom etadi - hech narsa ikki marta qo'llanmaydi.
+Checkpoint qatori batch transaction ida SELECT FOR UPDATE bilan olinadi va stream
+shundan keyin o'qiladi - Redis lock muddati o'tib ikkinchi flusher kirsa ham bitta
+diapazon ikki marta qo'llanmaydi. Redis lock tokenli: faqat egasi uzaytiradi / o'chiradi.
+
+source_ref li award lar (participant, source_ref) bo'yicha idempotent (reason ga
+qaramay - masalan referral / premium_ref bitta taklif uchun bitta award): batch
+ichidagi takrorlar tashlab yuboriladi, DB dagilari bilan to'qnashuv INSERT ning o'zida
+(ON CONFLICT DO NOTHING) hal bo'ladi va counter / leaderboard delta lari faqat
+haqiqatda yozilgan qatorlardan hisoblanadi. Shuning uchun award ni retry qilish /
+parallel yuborish xavfsiz va takror yozuv ledger ni to'xtatib qo'ymaydi.
+
+Redis bo'lmasa ball to'g'ridan-to'g'ri DB ga yoziladi.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from shared.constants import CACHE_KEYS, CACHE_TTL, POINT_LEDGER_SETTINGS
+from shared.leaderboard import on_points_changed
+from shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = CACHE_KEYS['points_ledger']
+
+# Lock faqat token egasiniki bo'lsa. KEYS: lock; ARGV: token, ttl (0 - o'chirish)
+LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '0' then
+    return redis.call('DEL', KEYS[1])
+end
+return redis.call('EXPIRE', KEYS[1], ARGV[2])
+"""
+
+
+def award(participant_id: int, competition_id: int, telegram_id: int, points: int,
+          reason: str, description: Optional[str] = None, source_ref: Optional[str] = None,
+          referrals: int = 0):
+    """
+    Ishtirokchiga ball berish (write-behind)
+
+    Joriy transaction commit bo'lgandan keyin stream ga yoziladi; transaction
+    tashqarisida darhol yoziladi. referrals - shu award bilan yaratilgan Referral
+    yozuvlari (referral_count ga qo'shiladi, hot referrer qatori lock qilinmaydi).
+    """
+    entry = {
+        'participant_id': participant_id,
+        'competition_id': competition_id,
+        'telegram_id': telegram_id,
+        'points': points,
+        'reason': reason,
+        'description': description or '',
+        'source_ref': source_ref or '',
+        'referrals': referrals
+    }
+    transaction.on_commit(lambda: _append(entry))
+
+
+def _append(entry: Dict):
+    """Stream ga qo'shish, bo'lmasa DB ga to'g'ridan-to'g'ri"""
+    if redis_client.is_connected():
+        try:
+            redis_client.client.xadd(STREAM_KEY, {k: str(v) for k, v in entry.items()})
+            return
+        except Exception as e:
+            logger.error(f"Point ledger append error: {e}")
+
+    _apply_direct(entry)
+
+
+def _apply_direct(entry: Dict):
+    """Fallback - bitta award ni DB ga yozish"""
+    from django_app.core.models import Participant, Point
+
+    try:
+        with transaction.atomic():
+            # Avval Point - source_ref takror bo'lsa IntegrityError va ball qo'shilmaydi
+            Point.objects.create(
+                participant_id=entry['participant_id'],
+                earned_points=entry['points'],
+                reason=entry['reason'],
+                description=entry['description'] or None,
+                source_ref=entry['source_ref'] or None
+            )
+            deltas = Participant.counter_deltas(entry['reason'], entry['points'], entry.get('referrals', 0))
+            Participant.objects.filter(id=entry['participant_id']).update(
+                updated_at=timezone.now(),
+                **{field: F(field) + delta for field, delta in deltas.items()}
+            )
+            on_points_changed(entry['competition_id'], entry['telegram_id'], entry['points'])
+    except IntegrityError:
+        logger.info(f"Duplicate award skipped: {entry}")
+    except Exception as e:
+        logger.error(f"Point ledger direct apply error: {e}, entry={entry}")
+
+
+def flush(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Stream dagi barcha award larni DB ga ko'chirish
+
+    Returns:
+        {'entries': int, 'batches': int} yoki lock band bo'lsa {'entries': 0, 'batches': 0, 'skipped': 1}
+    """
+    report = {'entries': 0, 'batches': 0}
+
+    if not redis_client.is_connected():
+        return report
+
+    client = redis_client.client
+    lock_key = CACHE_KEYS['points_ledger_lock']
+    token = uuid.uuid4().hex
+    if not client.set(lock_key, token, nx=True, ex=CACHE_TTL['points_ledger_lock']):
+        report['skipped'] = 1
+        return report
+
+    lock = client.register_script(LOCK_SCRIPT)
+    batch_size = batch_size or POINT_LEDGER_SETTINGS['batch_size']
+    try:
+        while True:
+            applied = _flush_batch(client, batch_size)
+            if not applied:
+                break
+            report['entries'] += applied
+            report['batches'] += 1
+            if applied < batch_size:
+                break
+            if not lock(keys=[lock_key], args=[token, CACHE_TTL['points_ledger_lock']]):
+                # Lock muddati o'tib boshqa flusher olgan - davomini u qiladi
+                logger.warning("Point ledger lock lost - flush stopped")
+                break
+    finally:
+        lock(keys=[lock_key], args=[token, 0])
+
+    if report['entries']:
+        logger.info(f"Point ledger flushed: {report}")
+    return report
+
+
+def _flush_batch(client, batch_size: int) -> int:
+    """Checkpoint dan keyingi bitta batch ni bitta transaction da qo'llash"""
+    from django_app.core.models import PointLedgerCheckpoint
+
+    PointLedgerCheckpoint.objects.get_or_create(stream=STREAM_KEY)
+    with transaction.atomic():
+        # Qator lock - parallel flusher shu commit gacha kutadi va yangi last_id dan o'qiydi
+        checkpoint = PointLedgerCheckpoint.objects.select_for_update().get(stream=STREAM_KEY)
+        start = f"({checkpoint.last_id}" if checkpoint.last_id else '-'
+
+        entries = client.xrange(STREAM_KEY, min=start, max='+', count=batch_size)
+        if not entries:
+            return 0
+
+        last_id = _apply_batch(entries, checkpoint, batch_size)
+
+    # Checkpoint commit bo'ldi - ko'chirilgan yozuvlarni o'chirish
+    try:
+        client.xtrim(STREAM_KEY, minid=last_id)
+    except Exception as e:
+        logger.error(f"Point ledger trim error: {e}")
+
+    return len(entries)
+
+
+def _apply_batch(entries, checkpoint, batch_size: int) -> str:
+    """Batch ni joriy (checkpoint qatori lock langan) transaction da qo'llash; oxirgi stream ID"""
+    from django_app.core.models import Point
+
+    now = timezone.now()
+    awards = []  # (Point, competition_id, telegram_id, referrals)
+    seen: Set[Tuple[int, str]] = set()
+
+    for _, fields in entries:
+        participant_id = int(fields['participant_id'])
+        source_ref = fields.get('source_ref') or None
+
+        if source_ref:
+            if (participant_id, source_ref) in seen:
+                continue
+            seen.add((participant_id, source_ref))
+
+        awards.append((Point(
+            participant_id=participant_id,
+            earned_points=int(fields['points']),
+            reason=fields['reason'],
+            description=fields.get('description') or None,
+            source_ref=source_ref,
+            created_at=now
+        ), int(fields['competition_id']), int(fields['telegram_id']), _referrals(fields)))
+
+    last_id = entries[-1][0]
+
+    Point.objects.bulk_create([award[0] for award in awards if not award[0].source_ref], batch_size=batch_size)
+    inserted = _insert_sourced([award[0] for award in awards if award[0].source_ref], now, batch_size)
+    applied = [
+        award for award in awards
+        if not award[0].source_ref or (award[0].participant_id, award[0].source_ref) in inserted
+    ]
+    if len(applied) < len(awards):
+        logger.info(f"Duplicate awards skipped: {len(awards) - len(applied)}")
+
+    participant_deltas, leaderboard_deltas = _deltas(applied)
+    increment_participants(participant_deltas, now)
+
+    checkpoint.last_id = last_id
+    checkpoint.save(update_fields=['last_id', 'updated_at'])
+
+    for (competition_id, telegram_id), delta in leaderboard_deltas.items():
+        on_points_changed(competition_id, telegram_id, delta)
+
+    return last_id
+
+
+def _insert_sourced(points, now, batch_size: int) -> Set[Tuple[int, str]]:
+    """
+    source_ref li Point lar - ON CONFLICT DO NOTHING bilan
+
+    Returns:
+        Haqiqatda yozilgan (participant_id, source_ref) lar. Batch qatorlari created_at=now
+        bilan yoziladi, checkpoint qatori lock ostida bo'lgani uchun shu belgi bilan ajratiladi.
+    """
+    from django_app.core.models import Point
+
+    if not points:
+        return set()
+
+    Point.objects.bulk_create(points, batch_size=batch_size, ignore_conflicts=True)
+    return set(Point.objects.filter(
+        participant_id__in={point.participant_id for point in points},
+        source_ref__in={point.source_ref for point in points},
+        created_at=now
+    ).values_list('participant_id', 'source_ref'))
+
+
+def _referrals(fields: Dict[str, str]) -> int:
+    """Stream yozuvidagi Referral soni (maydoni yo'q eski yozuvlarda - taklif award i = 1)"""
+    from django_app.core.models.pointrule import PointAction
+
+    if 'referrals' in fields:
+        return int(fields['referrals'] or 0)
+    return 1 if fields['reason'] in (PointAction.REFERRAL, PointAction.PREMIUM_REFERRAL) else 0
+
+
+def _deltas(awards) -> Tuple[Dict[int, Dict[str, int]], Dict[Tuple[int, int], int]]:
+    """Yozilgan award lardan participant counter va leaderboard delta lari"""
+    from django_app.core.models import Participant
+
+    participant_deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    leaderboard_deltas: Dict[Tuple[int, int], int] = defaultdict(int)
+    for point, competition_id, telegram_id, referrals in awards:
+        for field, delta in Participant.counter_deltas(point.reason, point.earned_points, referrals).items():
+            participant_deltas[point.participant_id][field] += delta
+        leaderboard_deltas[(competition_id, telegram_id)] += point.earned_points
+    return participant_deltas, leaderboard_deltas
+
+
+def increment_participants(participant_deltas: Dict[int, Dict[str, int]], now=None):
+    """
+    Participant field larini F() bilan oshirish
+
+    Bir xil delta li ishtirokchilar bitta UPDATE ga guruhlanadi - award qiymatlari
+    kam bo'lgani uchun batch da odatda bir nechta UPDATE bo'ladi.
+
+    Args:
+        participant_deltas: {participant_id: {'current_points': 5, 'referral_points': 5, ...}}
+    """
+    from django_app.core.models import Participant
+
+    now = now or timezone.now()
+    ids_by_delta: Dict[tuple, list] = defaultdict(list)
+    for participant_id, deltas in participant_deltas.items():
+        key = tuple(sorted((field, delta) for field, delta in deltas.items() if delta))
+        if key:
+            ids_by_delta[key].append(participant_id)
+
+    for deltas, participant_ids in ids_by_delta.items():
+        Participant.objects.filter(id__in=sorted(participant_ids)).update(
+            updated_at=now,
+            **{field: F(field) + delta for field, delta in deltas}
+        )
+
+
+def pending() -> int:
+    """Stream da hali DB ga yozilmagan yozuvlar soni (taxminiy)"""
+    if not redis_client.is_connected():
+        return 0
+    try:
+        return redis_client.client.xlen(STREAM_KEY)
+    except Exception:
+        return 0
@@ -0,0 +1,30 @@
+# shared/point_rules.py
+"""
+Point rules - PointRule qiymatlaridan award miqdori
+Vazifasi: Ro'yxatdan o'tish, handler lar va rescoring ballni bitta formula bilan hisoblashi
+
+    channel_join: channel_join * kanallar soni (premium foydalanuvchi - * premium_user)
+    referral:     taklif qilingan oddiy - referral;
+                  premium - premium_ref (premium_ref qoidasi 0 / yo'q bo'lsa referral * 2)
+
+rules - {action_type: points} (CompetitionService sozlamalaridagi point_rules)
+"""
+from typing import Dict, Tuple
+
+from shared.constants import DEFAULT_POINTS
+
+
+def channel_join_points(rules: Dict[str, int], channels_count: int, is_premium: bool) -> int:
+    """Kanallarga qo'shilgani uchun ball ('channel_join' Point qatori)"""
+    total = rules.get('channel_join', DEFAULT_POINTS['channel_join']) * channels_count
+    if is_premium:
+        total = int(total * rules.get('premium_user', DEFAULT_POINTS['premium_multiplier']))
+    return total
+
+
+def referral_award(rules: Dict[str, int], is_premium_referred: bool) -> Tuple[int, str]:
+    """Taklif qilgan ishtirokchiga (ball, reason)"""
+    base = rules.get('referral', DEFAULT_POINTS['referral'])
+    if is_premium_referred:
+        return rules.get('premium_ref') or base * 2, 'premium_ref'
+    return base, 'referral'
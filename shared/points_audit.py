@@ -0,0 +1,103 @@
+# shared/points_audit.py
+"""
+Points audit - Participant.current_points == SUM(Point.earned_points) tekshiruvi
+Vazifasi: Butun ledger bo'yicha drift ni topish va (ixtiyoriy) tuzatish
+
+Bitta GROUP BY query server-side cursor bilan chunk larda o'qiladi, xotirada faqat
+konkurs bo'yicha hisobot va tuzatish buferi turadi. Tuzatish F() delta bilan
+(point_ledger.increment_participants) - parallel flush bilan to'qnashmaydi.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+
+from shared.leaderboard import on_points_changed
+from shared.point_ledger import increment_participants
+
+logger = logging.getLogger(__name__)
+
+
+def audit_points(competition_id: Optional[int] = None, repair: bool = False,
+                 chunk_size: int = 5000, sample_limit: int = 20) -> Dict[str, Any]:
+    """
+    current_points ni Point ledger bilan solishtirish
+
+    Args:
+        competition_id: Faqat shu konkurs (None - hammasi)
+        repair: Farqlarni tuzatish
+        chunk_size: Cursor chunk va tuzatish batch hajmi
+        sample_limit: Hisobotga kiradigan namunaviy farqlar soni
+
+    Returns:
+        {'checked', 'mismatched', 'repaired', 'competitions': {id: {...}}, 'samples': [...]}
+    """
+    from django_app.core.models import Participant
+
+    participants = Participant.objects.all()
+    if competition_id:
+        participants = participants.filter(competition_id=competition_id)
+
+    rows = participants.order_by().annotate(
+        ledger_points=Coalesce(Sum('points__earned_points'), Value(0), output_field=IntegerField())
+    ).values_list(
+        'id', 'competition_id', 'user__telegram_id', 'current_points', 'ledger_points'
+    ).iterator(chunk_size=chunk_size)
+
+    report: Dict[str, Any] = {'checked': 0, 'mismatched': 0, 'repaired': 0, 'competitions': {}, 'samples': []}
+    competitions: Dict[int, Dict[str, int]] = defaultdict(
+        lambda: {'checked': 0, 'mismatched': 0, 'current_total': 0, 'ledger_total': 0}
+    )
+    pending: List[tuple] = []
+
+    for participant_id, comp_id, telegram_id, current, ledger in rows:
+        stats = competitions[comp_id]
+        stats['checked'] += 1
+        stats['current_total'] += current
+        stats['ledger_total'] += ledger
+        report['checked'] += 1
+
+        if current == ledger:
+            continue
+
+        stats['mismatched'] += 1
+        report['mismatched'] += 1
+        if len(report['samples']) < sample_limit:
+            report['samples'].append({
+                'participant_id': participant_id,
+                'competition_id': comp_id,
+                'current_points': current,
+                'ledger_points': ledger
+            })
+
+        if repair:
+            pending.append((participant_id, comp_id, telegram_id, ledger - current))
+            if len(pending) >= chunk_size:
+                report['repaired'] += _repair(pending)
+                pending = []
+
+    if pending:
+        report['repaired'] += _repair(pending)
+
+    report['competitions'] = dict(competitions)
+
+    if report['mismatched']:
+        logger.warning(f"Points audit: {report['mismatched']}/{report['checked']} mismatched, repaired={report['repaired']}")
+    else:
+        logger.info(f"Points audit: {report['checked']} checked, no drift")
+    return report
+
+
+def _repair(pending: List[tuple]) -> int:
+    """current_points ni ledger ga tenglashtirish - delta bilan, bitta transaction"""
+    with transaction.atomic():
+        increment_participants({
+            participant_id: {'current_points': delta}
+            for participant_id, _, _, delta in pending
+        })
+        for _, competition_id, telegram_id, delta in pending:
+            on_points_changed(competition_id, telegram_id, delta)
+    return len(pending)
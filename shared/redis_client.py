@@ -50,6 +50,11 @@ class RedisClient:
             logger.warning(f"Redis connection failed: {e} - running without Redis")
             self._connected = False
 
+    @property
+    def client(self):
+        """Xom redis client (ZSET, pipeline kabi maxsus operatsiyalar uchun)"""
+        return self._client
+
     def is_connected(self) -> bool:
         if not self._connected or not self._client:
             return False
@@ -111,9 +116,12 @@ class RedisClient:
             return False
         try:
             if settings:
-                self._client.setex(f"bot_settings:{bot_id}", ttl, json.dumps(settings))
+                pipe = self._client.pipeline(transaction=False)
+                pipe.setex(f"bot_settings:{bot_id}", ttl, json.dumps(settings))
+                pipe.setex(f"bot_settings_version:{bot_id}", ttl, settings.get('version') or '')
+                pipe.execute()
             else:
-                self._client.delete(f"bot_settings:{bot_id}")
+                self._client.delete(f"bot_settings:{bot_id}", f"bot_settings_version:{bot_id}")
             return True
         except:
             return False
@@ -145,7 +153,7 @@ class RedisClient:
         if not self.is_connected():
             return
         try:
-            self._client.delete(f"bot_settings:{bot_id}")
+            self._client.delete(f"bot_settings:{bot_id}", f"bot_settings_version:{bot_id}")
             self._client.delete(f"bot_queue:{bot_id}")
         except:
             pass
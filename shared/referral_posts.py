@@ -0,0 +1,52 @@
+# shared/referral_posts.py
+"""
+Referral posts - cache dagi taklif postini ishlatishdan oldin ishtirokchi tekshiruvi
+Vazifasi: render_cache dagi post (jarayon xotirasida) ishtirokchi chiqarilgan /
+bloklangandan keyin ham berilmasin
+
+    referral_post:{bot_id}:{user_id} - BotProcessor ishtirokchini DB dan tekshirganda qo'yiladi
+Participant saqlanganda / o'chirilganda (django_app/core/signals) kalit o'chiriladi va
+keyingi bosishda ishtirokchi qayta o'qiladi; bulk update() dan keyin ham kalit
+CACHE_TTL['referral_post'] dan ortiq yashamaydi. Kalit bo'lmasa (yoki Redis yo'q) -
+post cache ishlatilmaydi.
+"""
+import logging
+
+from shared.constants import CACHE_KEYS, CACHE_TTL
+from shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def key(bot_id: int, user_id: int) -> str:
+    return CACHE_KEYS['referral_post'].format(bot_id=bot_id, user_id=user_id)
+
+
+def mark_verified(bot_id: int, user_id: int):
+    """Ishtirokchi DB dan tekshirildi - post cache ishlatsa bo'ladi"""
+    if not redis_client.is_connected():
+        return
+    try:
+        redis_client.client.setex(key(bot_id, user_id), CACHE_TTL['referral_post'], 1)
+    except Exception as e:
+        logger.error(f"Mark referral post error: {e}")
+
+
+def is_verified(bot_id: int, user_id: int) -> bool:
+    if not redis_client.is_connected():
+        return False
+    try:
+        return bool(redis_client.client.exists(key(bot_id, user_id)))
+    except Exception as e:
+        logger.error(f"Check referral post error: {e}")
+        return False
+
+
+def revoke(bot_id: int, user_id: int):
+    """Ishtirokchi o'zgardi (is_participant / is_blocked) - keyingi bosishda DB dan"""
+    if not redis_client.is_connected():
+        return
+    try:
+        redis_client.client.delete(key(bot_id, user_id))
+    except Exception as e:
+        logger.error(f"Revoke referral post error: {e}")
@@ -0,0 +1,184 @@
+# shared/rescoring.py
+"""
+Rescoring - PointRule o'zgarganda konkurs ballarini qayta hisoblash
+Vazifasi: Millionlab qatorni bittalab yangilamasdan, batch larda set-based qayta hisoblash
+
+Har bir Point qatori joriy qoidalardan qaytadan hisoblanadi (shared/point_rules.py formulasi):
+    channel_join - channel_join * kanallar soni (* premium_user, foydalanuvchi premium bo'lsa)
+    referral     - referral
+    premium_ref  - premium_ref (0 bo'lsa referral * 2)
+Shuning uchun premium_user o'zgarishi channel_join qatorlarini, referral o'zgarishi
+premium_ref qatorlarini ham qayta hisoblaydi; eski qiymat 0 bo'lgan qoida ham ishlaydi.
+
+Ish boshida ledger stream DB ga ko'chiriladi va Point id chegarasi (cutoff) yoziladi -
+undan keyingi award lar yangi qoida bilan berilgan, ularga tegilmaydi.
+Ishtirokchilar id bo'yicha chunk larda olinadi va har chunk uchun bitta transaction da:
+    - (participant, reason, premium) bo'yicha eski yig'indi va qatorlar soni - bitta GROUP BY
+    - Point.earned_points - (reason, premium) bo'yicha UPDATE
+    - current_points va breakdown counter lar - F() bilan delta (point_ledger bilan bir xil)
+    - checkpoint (oxirgi participant id) - qayta ishga tushsa shu joydan davom etadi
+Oxirida leaderboard ZSET qayta quriladi.
+"""
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from shared import point_ledger
+from shared.leaderboard import Leaderboard
+from shared.point_ledger import increment_participants
+from shared.point_rules import channel_join_points, referral_award
+
+logger = logging.getLogger(__name__)
+
+# O'zgargan qoida -> qayta hisoblanadigan Point.reason lar
+AFFECTED_REASONS = {
+    'channel_join': ('channel_join',),
+    'premium_user': ('channel_join',),
+    'referral': ('referral', 'premium_ref'),
+    'premium_ref': ('premium_ref',),
+}
+
+
+def target_points(rules: Dict[str, int], channels_count: int) -> Dict[Tuple[str, bool], int]:
+    """(reason, foydalanuvchi premium) -> yangi earned_points"""
+    targets = {}
+    for is_premium in (False, True):
+        targets[('channel_join', is_premium)] = channel_join_points(rules, channels_count, is_premium)
+        # Referral da premium - taklif qilingan foydalanuvchi (reason ning o'zida), ishtirokchi emas
+        targets[('referral', is_premium)] = referral_award(rules, False)[0]
+        targets[('premium_ref', is_premium)] = referral_award(rules, True)[0]
+    return targets
+
+
+def rescore_competition(competition_id: int, changes: Dict[str, Tuple[Optional[int], Optional[int]]], job_id: str,
+                        chunk_size: int = 2000,
+                        on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """
+    Konkurs ballarini joriy qoidalar bo'yicha qayta hisoblash
+
+    Args:
+        competition_id: Konkurs ID
+        changes: {action_type: (eski_ball, yangi_ball)} - qaysi qoidalar o'zgargani
+        job_id: Ish ID si - checkpoint kaliti (retry da bir xil bo'lishi kerak)
+        chunk_size: Bitta transaction dagi ishtirokchilar
+        on_progress: (processed, total) callback
+
+    Returns:
+        {'participants', 'processed', 'points_delta', 'cutoff'} hisobot
+    """
+    from django_app.core.models import Channel, Participant, PointLedgerCheckpoint, PointRule
+
+    report = {'competition_id': competition_id, 'participants': 0, 'processed': 0, 'points_delta': 0}
+    reasons = sorted({reason for action in changes for reason in AFFECTED_REASONS.get(action, ())})
+    if not reasons:
+        return report
+
+    rules = dict(PointRule.objects.filter(competition_id=competition_id).values_list('action_type', 'points'))
+    targets = target_points(rules, Channel.objects.filter(competitions=competition_id).count())
+
+    checkpoint, _ = PointLedgerCheckpoint.objects.get_or_create(stream=f"rescore:{competition_id}:{job_id}")
+    cutoff = _cutoff(competition_id, job_id)
+    report['cutoff'] = cutoff
+    last_participant_id = int(checkpoint.last_id or 0)
+
+    participants = Participant.objects.filter(competition_id=competition_id)
+    report['participants'] = participants.count()
+    report['processed'] = participants.filter(id__lte=last_participant_id).count()
+
+    ids = participants.filter(id__gt=last_participant_id).order_by('id').values_list(
+        'id', flat=True
+    ).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for participant_id in ids:
+        chunk.append(participant_id)
+        if len(chunk) >= chunk_size:
+            report['points_delta'] += _rescore_chunk(chunk, reasons, targets, cutoff, checkpoint)
+            report['processed'] += len(chunk)
+            chunk = []
+            if on_progress:
+                on_progress(report['processed'], report['participants'])
+    if chunk:
+        report['points_delta'] += _rescore_chunk(chunk, reasons, targets, cutoff, checkpoint)
+        report['processed'] += len(chunk)
+        if on_progress:
+            on_progress(report['processed'], report['participants'])
+
+    PointLedgerCheckpoint.objects.filter(stream__startswith=f"rescore:{competition_id}:{job_id}").delete()
+
+    if Leaderboard(competition_id).try_rebuild() is None:
+        logger.warning(f"Rescore: leaderboard {competition_id} rebuild skipped (locked yoki Redis yo'q)")
+
+    logger.info(f"Rescore finished: {report}")
+    return report
+
+
+def _cutoff(competition_id: int, job_id: str) -> int:
+    """
+    Ish boshidagi oxirgi Point id (retry da saqlangani)
+
+    Avval ledger stream ko'chiriladi - qoida o'zgarishidan oldin berilgan, hali DB ga
+    yozilmagan award lar ham qayta hisoblansin.
+    """
+    from django_app.core.models import Point, PointLedgerCheckpoint
+
+    saved, created = PointLedgerCheckpoint.objects.get_or_create(stream=f"rescore:{competition_id}:{job_id}:cutoff")
+    if not created and saved.last_id:
+        return int(saved.last_id)
+
+    for _ in range(30):
+        if not point_ledger.flush().get('skipped'):
+            break
+        time.sleep(1)  # Boshqa flusher ishlayapti - tugashini kutish
+    else:
+        logger.warning(f"Rescore {competition_id}: ledger flush lock band - cutoff kutmasdan olinadi")
+
+    cutoff = Point.objects.filter(participant__competition_id=competition_id).aggregate(Max('id'))['id__max'] or 0
+    saved.last_id = str(cutoff)
+    saved.save(update_fields=['last_id', 'updated_at'])
+    return cutoff
+
+
+def _rescore_chunk(participant_ids, reasons, targets: Dict[Tuple[str, bool], int], cutoff: int, checkpoint) -> int:
+    """Bitta chunk ni bitta transaction da qayta hisoblash; jami ball farqini qaytaradi"""
+    from django_app.core.models import Participant, Point
+
+    points = Point.objects.filter(participant_id__in=participant_ids, reason__in=reasons, id__lte=cutoff)
+
+    with transaction.atomic():
+        groups = points.order_by().values('participant_id', 'reason', 'participant__user__is_premium').annotate(
+            old=Sum('earned_points'),
+            rows=Count('id')
+        )
+
+        participant_deltas: Dict[int, Dict[str, int]] = defaultdict(dict)
+        changed = set()
+        total_delta = 0
+        for row in groups:
+            key = (row['reason'], bool(row['participant__user__is_premium']))
+            delta = targets[key] * row['rows'] - row['old']
+            if not delta:
+                continue
+            changed.add(key)
+            deltas = participant_deltas[row['participant_id']]
+            deltas['current_points'] = deltas.get('current_points', 0) + delta
+            field = Participant.POINT_COUNTERS.get(row['reason'])
+            if field:
+                deltas[field] = deltas.get(field, 0) + delta
+            total_delta += delta
+
+        for reason, is_premium in changed:
+            points.filter(reason=reason, participant__user__is_premium=is_premium).exclude(
+                earned_points=targets[(reason, is_premium)]
+            ).update(earned_points=targets[(reason, is_premium)])
+        increment_participants(participant_deltas, timezone.now())
+
+        checkpoint.last_id = str(participant_ids[-1])
+        checkpoint.save(update_fields=['last_id', 'updated_at'])
+
+    return total_delta
@@ -0,0 +1,224 @@
+# shared/telegram_governor.py
+"""
+Telegram governor - Bot API chaqiruvlari uchun rate limit
+Vazifasi: Telegram ning bot va chat bo'yicha limitlaridan oshmaslik, 429 (RetryAfter)
+ni to'g'ri kutib qayta urinish
+
+create_bot() bilan yaratilgan har bir Bot session iga middleware o'rnatiladi - shu bot
+orqali ketadigan BARCHA API chaqiruvlar governor dan o'tadi. Governor jarayon ichida
+bot ID (token) bo'yicha yagona: har update uchun yangi Bot yaratilsa ham limitlar umumiy.
+
+Token bucket lar:
+    - messages: xabar yuboruvchi/tahrirlovchi metodlar - bot bo'yicha (~30/s)
+    - paid_messages: allow_paid_broadcast=True xabarlar (~1000/s, Stars evaziga)
+    - api: qolgan metodlar (getChatMember, answerCallbackQuery, ...)
+    - chat: bitta chat ga xabar - private ~1/s, guruh/kanal ~20/min
+Token band bo'lsa chaqiruv navbatda kutadi (rezervatsiya - FIFO). Kutish metod
+deadline idan oshsa RateLimitDeadline - handler xatoni odatdagidek qayta ishlaydi.
+RetryAfter kelsa bucket lar retry_after ga bloklanadi va chaqiruv deadline ichida
+qayta yuboriladi: guruh/kanal ga xabar - faqat chat bucket (20/min limiti), qolgan
+hammasi (private chat, chat siz metodlar) - bot bo'yicha bucket lar ham.
+
+Governor jarayon ichida: Telegram limiti esa bot bo'yicha umumiy. Shuning uchun bot
+bo'yicha bucket lar settings.TELEGRAM_RATE_SHARE ulushi bilan ishlaydi - FastAPI va
+Celery (har bir child process) ulushlari yig'indisi 1 dan oshmasligi kerak
+(fastapi_app/main.py va celery_worker.py da default lar).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Type
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from django.conf import settings
+
+from fastapi_app.monitoring import MetricsCollector
+from shared.constants import TELEGRAM_RATE_LIMITS
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_METHOD_PREFIXES = ('send', 'copy', 'forward', 'edit')
+
+
+class RateLimitDeadline(Exception):
+    """Chaqiruv deadline ichida limitdan o'ta olmadi"""
+
+
+class TokenBucket:
+    """Rezervatsiyali token bucket - token manfiy bo'lishi navbatni bildiradi"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Bitta token ni band qilish; token tayyor bo'lguncha kutish (sekund)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def cancel(self):
+        """Rezervatsiyani qaytarish (deadline dan oshdi)"""
+        self.tokens += 1
+
+    def block(self, now: float, seconds: float):
+        """RetryAfter - bucket ni bloklash"""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def idle(self, now: float) -> bool:
+        return now >= self.blocked_until and self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class RateGovernor:
+    """Bitta bot uchun limitlar"""
+
+    def __init__(self, bot_id: int):
+        limits = TELEGRAM_RATE_LIMITS
+        share = getattr(settings, 'TELEGRAM_RATE_SHARE', 1.0)
+        self.bot_id = bot_id
+        self.messages = self._shared_bucket(limits['messages_per_second'], share)
+        self.paid_messages = self._shared_bucket(limits['paid_messages_per_second'], share)
+        self.api = self._shared_bucket(limits['api_per_second'], share)
+        self.chats: Dict[int, TokenBucket] = {}
+        self.stats = {'calls': 0, 'throttled': 0, 'retry_after': 0, 'deadline_exceeded': 0}
+
+    @staticmethod
+    def _shared_bucket(per_second: float, share: float) -> TokenBucket:
+        """Bot bo'yicha limitning shu jarayonga tegishli ulushi"""
+        rate = per_second * share
+        return TokenBucket(rate, max(1.0, rate))
+
+    def _chat_bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self.chats.get(chat_id)
+        if bucket is None:
+            if len(self.chats) >= TELEGRAM_RATE_LIMITS['max_tracked_chats']:
+                self.chats = {cid: b for cid, b in self.chats.items() if not b.idle(now)}
+            limits = TELEGRAM_RATE_LIMITS
+            if chat_id < 0:
+                bucket = TokenBucket(limits['group_per_minute'] / 60, limits['chat_burst'])
+            else:
+                bucket = TokenBucket(limits['private_per_second'], limits['chat_burst'])
+            self.chats[chat_id] = bucket
+        return bucket
+
+    def _buckets(self, method, now: float) -> List[TokenBucket]:
+        api_method = getattr(method, '__api_method__', '')
+        if not api_method.startswith(MESSAGE_METHOD_PREFIXES):
+            return [self.api]
+
+        messages = self.paid_messages if getattr(method, 'allow_paid_broadcast', None) else self.messages
+        chat_id = getattr(method, 'chat_id', None)
+        if isinstance(chat_id, int):
+            return [messages, self._chat_bucket(chat_id, now)]
+        return [messages]
+
+    async def acquire(self, method, deadline: float):
+        """Limit bo'yicha navbat kutish"""
+        now = time.monotonic()
+        buckets = self._buckets(method, now)
+        wait = max(bucket.reserve(now) for bucket in buckets)
+        self.stats['calls'] += 1
+
+        if now + wait > deadline:
+            for bucket in buckets:
+                bucket.cancel()
+            self.stats['deadline_exceeded'] += 1
+            _observe(self.bot_id, 'deadline')
+            raise RateLimitDeadline(
+                f"{getattr(method, '__api_method__', method)}: {wait:.1f}s kutish kerak (bot={self.bot_id})"
+            )
+
+        if wait > 0:
+            self.stats['throttled'] += 1
+            _observe(self.bot_id, 'throttled', wait)
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, method) -> bool:
+        """Kutishsiz token olish (webhook javobi) - token yo'q bo'lsa False"""
+        now = time.monotonic()
+        buckets = self._buckets(method, now)
+        if max(bucket.reserve(now) for bucket in buckets) > 0:
+            for bucket in buckets:
+                bucket.cancel()
+            return False
+        self.stats['calls'] += 1
+        return True
+
+    def retry_after(self, method, seconds: float):
+        """
+        429 - guruh/kanal xabari bo'lsa faqat chat bucket (o'sha chat limiti),
+        aks holda bot bo'yicha limit ham - metodning barcha bucket lari bloklanadi
+        """
+        now = time.monotonic()
+        self.stats['retry_after'] += 1
+        _observe(self.bot_id, 'retry_after', seconds)
+        buckets = self._buckets(method, now)
+        chat_id = getattr(method, 'chat_id', None)
+        if len(buckets) > 1 and isinstance(chat_id, int) and chat_id < 0:
+            buckets[-1].block(now, seconds)
+            return
+        for bucket in buckets:
+            bucket.block(now, seconds)
+
+    @staticmethod
+    def deadline_for(method) -> float:
+        api_method = getattr(method, '__api_method__', '')
+        deadlines = TELEGRAM_RATE_LIMITS['deadlines']
+        return deadlines.get(api_method, deadlines['default'])
+
+
+class RateGovernorMiddleware(BaseRequestMiddleware):
+    """aiogram session middleware - har bir API chaqiruv governor dan o'tadi"""
+
+    async def __call__(self, make_request, bot: Bot, method):
+        governor = get_governor(bot.id)
+        deadline = time.monotonic() + governor.deadline_for(method)
+
+        for attempt in range(TELEGRAM_RATE_LIMITS['max_retries'] + 1):
+            await governor.acquire(method, deadline)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                governor.retry_after(method, e.retry_after)
+                logger.warning(f"RetryAfter {e.retry_after}s: bot={bot.id}, method={method.__api_method__}")
+                if attempt == TELEGRAM_RATE_LIMITS['max_retries'] or time.monotonic() + e.retry_after > deadline:
+                    raise
+
+
+_governors: Dict[int, RateGovernor] = {}
+_middleware = RateGovernorMiddleware()
+
+
+def get_governor(bot_id: int) -> RateGovernor:
+    """Bot uchun (jarayon ichida yagona) governor"""
+    governor = _governors.get(bot_id)
+    if governor is None:
+        governor = _governors[bot_id] = RateGovernor(bot_id)
+    return governor
+
+
+def create_bot(token: str, bot_class: Type[Bot] = Bot, **kwargs) -> Bot:
+    """Governor o'rnatilgan Bot"""
+    bot = bot_class(token=token, **kwargs)
+    bot.session.middleware(_middleware)
+    return bot
+
+
+def get_stats(bot_id: int) -> Optional[Dict[str, int]]:
+    """Bot governor metrikalari"""
+    governor = _governors.get(bot_id)
+    return dict(governor.stats, tracked_chats=len(governor.chats)) if governor else None
+
+
+def _observe(bot_id: int, event: str, seconds: float = 0.0):
+    """Prometheus metrikalari"""
+    MetricsCollector.record_telegram_throttle(bot_id, event, seconds)